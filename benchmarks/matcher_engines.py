@@ -0,0 +1,64 @@
+"""Compare the recursive and iterative matching engines.
+
+Run from the root of the repository:
+
+    python -m benchmarks.matcher_engines
+
+"""
+import timeit
+
+from literate_integration.matcher import Matcher, _match_iteratively
+
+
+def nested(depth, width):
+    """A value nested `depth` levels deep, with `width` keys per level."""
+    value = {'id': 0}
+    for level in range(depth):
+        value = dict(
+            {'key{}'.format(i): i for i in range(width)},
+            level=level,
+            children=[value],
+        )
+    return value
+
+
+def wide(rows):
+    """A list response with `rows` elements."""
+    return {
+        'count': rows,
+        'results': [
+            {'id': i, 'name': 'Row {}'.format(i), 'tags': [i % 7]}
+            for i in range(rows)
+        ],
+    }
+
+
+PAYLOADS = [
+    ('nested, depth 20', nested(20, 5), nested(20, 5)),
+    ('nested, depth 90', nested(90, 5), nested(90, 5)),
+    ('wide, 1000 rows', wide(1000), {
+        'results': [{'tags': [3]}, {'id': 999, 'name': 'Row 999'}],
+    }),
+]
+
+
+def main(number=200):
+    print('{:<20} {:>12} {:>12}'.format('payload', 'recursive', 'iterative'))
+    for name, actual, expected in PAYLOADS:
+        node = Matcher(expected).matcher
+        assert node.matches(actual)
+        assert _match_iteratively(node, actual, max_depth=0)
+        recursive = timeit.timeit(lambda: node.matches(actual), number=number)
+        iterative = timeit.timeit(
+            lambda: _match_iteratively(node, actual, max_depth=0),
+            number=number,
+        )
+        print('{:<20} {:>10.1f}us {:>10.1f}us'.format(
+            name,
+            recursive / number * 1e6,
+            iterative / number * 1e6,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Enforce the performance budgets of literate tests.
+
+A literate test can declare budgets next to its example, the same way
+it declares the data it expects back: `max_latency`, `max_response_size`
+and `max_allocation`.  The generated tests fail when a budget is
+exceeded.  A `Baseline` also catches gradual regressions, by failing
+when a request gets much slower than it was on the last run.
+
+"""
+import json
+import os
+import threading
+
+
+def _key(klass):
+    return '{}.{}'.format(klass.__module__, klass.__qualname__)
+
+
+class Baseline(object):
+    """The request latencies of a previous run, stored in a file.
+
+    Pass a baseline to `rest_test_factory`, and each generated test
+    fails if its request took more than `tolerance` longer than the
+    latency recorded for it.  Otherwise, its latency is recorded, and
+    the file is rewritten when the test class is torn down.  (The
+    latency of a regressed test isn't recorded, so it keeps failing
+    until it is fixed, or the file is removed.)
+
+    Args:
+        path: The path of the baseline file (JSON.)  It is created
+            if it doesn't exist.
+        tolerance: How much slower than its baseline a request may be,
+            as a fraction.  (0.2 allows requests to be 20% slower.)
+        floor: The smallest slowdown, in seconds, which counts as a
+            regression.  Very fast requests vary by more than any
+            sensible tolerance from run to run.
+
+    """
+
+    def __init__(self, path, tolerance=0.2, floor=0.0):
+        self.path = path
+        self.tolerance = tolerance
+        self.floor = floor
+        self.latencies = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as fin:
+                self.latencies = json.load(fin)
+
+    def check(self, klass, latency):
+        """Check a request's latency against the baseline.
+
+        Args:
+            klass: The LiterateRESTTest subclass.
+            latency: How long its request took, in seconds.
+
+        Returns:
+            A message describing the regression, or None if there
+            wasn't one (in which case, the latency is recorded.)
+
+        """
+        key = _key(klass)
+        with self._lock:
+            previous = self.latencies.get(key)
+            if (previous is not None
+                    and latency > previous * (1 + self.tolerance)
+                    and latency - previous > self.floor):
+                return (
+                    'The request took {:.1f}ms, {:.0f}% longer than '
+                    'its baseline of {:.1f}ms.'
+                ).format(
+                    latency * 1000,
+                    (latency / previous - 1) * 100 if previous else 100,
+                    previous * 1000,
+                )
+            self.latencies[key] = latency
+        return None
+
+    def __getstate__(self):
+        # Baselines are sent to the worker processes of `run_sharded`.
+        state = dict(vars(self))
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self._lock = threading.Lock()
+
+    def merge(self, other, klasses):
+        """Take the latencies of some literate tests from another baseline.
+
+        `run_sharded` uses this to collect the latencies recorded in
+        its worker processes.
+
+        Args:
+            other: The other `Baseline`.
+            klasses: The LiterateRESTTest subclasses whose latencies
+                are taken.
+
+        """
+        with self._lock:
+            for klass in klasses:
+                key = _key(klass)
+                if key in other.latencies:
+                    self.latencies[key] = other.latencies[key]
+
+    def save(self):
+        """Write the recorded latencies to the baseline file."""
+        with self._lock:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w') as fout:
+                json.dump(self.latencies, fout, indent=4, sort_keys=True)
+            os.replace(temporary, self.path)
+
+
+def _check_budgets(test_case, klass, timing, baseline=None):
+    """Fail a test if it exceeded its performance budgets.
+
+    Args:
+        test_case: The TestCase running the literate test.
+        klass: The LiterateRESTTest subclass.
+        timing: The `Timing` of its run.
+        baseline: If given, the `Baseline` to compare the request's
+            latency against.
+
+    """
+    if (klass.max_response_size is not None
+            and timing.size is not None
+            and timing.size > klass.max_response_size):
+        test_case.fail(
+            'The response was {} bytes, over its budget of {}.'.format(
+                timing.size,
+                klass.max_response_size,
+            )
+        )
+    if timing.request is None:
+        # The response was replayed, rather than requested.
+        return
+    if klass.max_latency is not None and timing.request > klass.max_latency:
+        test_case.fail(
+            'The request took {:.1f}ms, over its budget of {:.1f}ms.'.format(
+                timing.request * 1000,
+                klass.max_latency * 1000,
+            )
+        )
+    if (klass.max_allocation is not None
+            and timing.allocation is not None
+            and timing.allocation > klass.max_allocation):
+        test_case.fail(
+            'The request allocated {} bytes, over its budget of {}.'.format(
+                timing.allocation,
+                klass.max_allocation,
+            )
+        )
+    if baseline is not None:
+        message = baseline.check(klass, timing.request)
+        if message is not None:
+            test_case.fail(message)
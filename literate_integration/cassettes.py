@@ -0,0 +1,183 @@
+"""Record literate tests' responses, and replay them offline.
+
+Pass a `CassetteStore` to `rest_test_factory` as its `cassettes`.  In
+the record mode, every response is saved to the store's directory as it
+is received; in the replay mode, the saved responses are served back
+instead of calling `request_function`.  Changes to `expected_data` (or
+to the documentation) can then be checked in milliseconds, without a
+running backend.
+
+Each response is stored in a JSON file of its own, keyed by the
+literate test's class, url, method and a hash of its data.  So changing
+any of those needs the response to be recorded again.
+
+"""
+import base64
+import hashlib
+import json
+import os
+
+from .matcher import content_hash
+
+
+# Send every request, and save the responses.
+RECORD = 'record'
+
+# Serve the saved responses, and fail if one is missing.
+REPLAY = 'replay'
+
+# Serve the saved responses, and record the missing ones.
+ONCE = 'once'
+
+MODES = (RECORD, REPLAY, ONCE)
+
+
+class CassetteNotFound(Exception):
+    """Raised when replaying a response which was never recorded."""
+
+
+class CassetteResponse(object):
+    """A recorded response.
+
+    It has the same interface as the responses literate tests expect:
+    `status_code`, `content` and `json()`, plus the response's
+    `headers`.
+
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+    def to_dict(self):
+        try:
+            body = self.content.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            body = base64.b64encode(self.content).decode('ascii')
+            encoding = 'base64'
+        return {
+            'status': self.status_code,
+            'headers': self.headers,
+            'body': body,
+            'encoding': encoding,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data['encoding'] == 'base64':
+            content = base64.b64decode(data['body'])
+        else:
+            content = data['body'].encode('utf-8')
+        return cls(data['status'], data['headers'], content)
+
+
+def _get_headers(response):
+    headers = getattr(response, 'headers', None)
+    if headers is None and hasattr(response, 'items'):
+        # Django's responses, before 3.2.
+        headers = response.items()
+    return dict(headers or {})
+
+
+def _get_content(response):
+    if getattr(response, 'streaming', False):
+        chunks = response.streaming_content
+    else:
+        chunks = [response.content]
+    return b''.join(
+        chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+        for chunk in chunks
+    )
+
+
+class CassetteStore(object):
+    """A directory of recorded responses.
+
+    Args:
+        directory: Where the responses are stored.  It is created
+            if it doesn't exist.
+        mode: One of `MODES`.
+
+    """
+
+    def __init__(self, directory, mode=ONCE):
+        if mode not in MODES:
+            raise ValueError('Unknown cassette mode: {!r}'.format(mode))
+        self.directory = directory
+        self.mode = mode
+
+    def _get_path(self, klass, spec):
+        key = '\n'.join([
+            '{}.{}'.format(klass.__module__, klass.__qualname__),
+            str(spec.url),
+            str(spec.request_method),
+            content_hash(spec.data),
+        ])
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(
+            self.directory,
+            '{}-{}.json'.format(klass.__name__, digest[:16]),
+        )
+
+    def replay(self, klass, spec):
+        """Get the recorded response to a literate test's request.
+
+        Args:
+            klass: The LiterateRESTTest subclass.
+            spec: Its `LiterateSpec`, resolved after its setUp.
+
+        Returns:
+            The `CassetteResponse`, or None if the request should be
+            sent (and recorded.)
+
+        Raises:
+            CassetteNotFound: If replaying, and the response was never
+                recorded.
+
+        """
+        if self.mode == RECORD:
+            return None
+        path = self._get_path(klass, spec)
+        try:
+            with open(path) as fin:
+                return CassetteResponse.from_dict(json.load(fin))
+        except FileNotFoundError:
+            if self.mode == REPLAY:
+                raise CassetteNotFound(
+                    'No response was recorded for {} (at {})'.format(
+                        klass.__name__,
+                        path,
+                    )
+                )
+        return None
+
+    def record(self, klass, spec, response):
+        """Save the response to a literate test's request.
+
+        Args:
+            klass: The LiterateRESTTest subclass.
+            spec: Its `LiterateSpec`, resolved after its setUp.
+            response: The response.
+
+        Returns:
+            The recorded `CassetteResponse`, to be checked in place of
+            the response.  (A streamed response can only be read once.)
+
+        """
+        recorded = CassetteResponse(
+            response.status_code,
+            _get_headers(response),
+            _get_content(response),
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._get_path(klass, spec)
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary, 'w') as fout:
+            json.dump(recorded.to_dict(), fout, indent=4, sort_keys=True)
+        os.replace(temporary, path)
+        return recorded
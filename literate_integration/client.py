@@ -0,0 +1,268 @@
+"""A pooled HTTP client, for literate tests run against a live server.
+
+Opening a connection for every request dominates the time taken by
+small endpoints.  An `HTTPClient` keeps its connections alive, and
+shares them between all the literate tests which use it:
+
+```
+client = HTTPClient('http://localhost:8000', pool_size=8, timeout=5)
+
+
+class ListBooksTest(LiterateRESTTest):
+    url = '/api/books/'
+    request_function = client.request_function
+    request_method = 'GET'
+    ...
+```
+
+`client.request_function` sends each class's request with the class's
+own `request_method` (which may be a property.)
+
+"""
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import functools
+import http.client
+import json
+import threading
+
+
+# Methods whose data is sent in the query string, rather than the body.
+QUERY_METHODS = ('GET', 'HEAD', 'DELETE', 'OPTIONS')
+
+# Raised when a kept-alive connection was closed by the server.
+_STALE_ERRORS = (
+    http.client.BadStatusLine,
+    http.client.CannotSendRequest,
+    ConnectionError,
+)
+
+
+class HTTPResponse(object):
+    """A response read in full, with the interface literate tests expect.
+
+    Attributes:
+        status_code: The status of the response.
+        headers: The response's headers, as a dictionary.
+        content: The body of the response, as bytes.
+
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class _Pool(object):
+    """Kept-alive connections to a single host."""
+
+    def __init__(self, connection_class, host, port, size, timeout,
+                 pool_timeout):
+        self.connection_class = connection_class
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool_timeout = pool_timeout
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Get a connection, and whether it was used before."""
+        if not self.slots.acquire(timeout=self.pool_timeout):
+            raise TimeoutError(
+                'No connection to {} was free after {}s'.format(
+                    self.host,
+                    self.pool_timeout,
+                )
+            )
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+        return self._connect(), False
+
+    def _connect(self):
+        return self.connection_class(
+            self.host,
+            self.port,
+            timeout=self.timeout,
+        )
+
+    def reconnect(self, connection):
+        connection.close()
+        return self._connect()
+
+    def release(self, connection, reusable):
+        if reusable:
+            with self.lock:
+                self.idle.append(connection)
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class _RequestFunction(object):
+    """Sends requests with the `request_method` of the class it's on.
+
+    If `request_method` is a property, it can only be read from an
+    instance.  The generated tests pass the resolved method to `bind`.
+
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def bind(self, method):
+        """Get a function which sends requests with the given method."""
+        return functools.partial(self.client.request, method)
+
+    def __get__(self, instance, owner):
+        if instance is not None:
+            return self.bind(instance.request_method)
+        method = owner.request_method
+        if not isinstance(method, str):
+            return functools.partial(self._unresolved, owner)
+        return self.bind(method)
+
+    def _unresolved(self, owner, *args, **kwargs):
+        raise TypeError(
+            '{}.request_method is a property, so the request can only be '
+            'sent from an instance.'.format(owner.__name__)
+        )
+
+
+class HTTPClient(object):
+    """An HTTP client which keeps a pool of connections alive.
+
+    It is safe to share between threads.  Connections are opened as
+    they are needed, up to `pool_size` per host.  A request which finds
+    every connection busy waits for one to be released.
+
+    Args:
+        base_url: The url which relative urls are resolved against,
+            such as 'http://localhost:8000'.
+        pool_size: The most connections to keep open to each host.
+        timeout: The timeout for connecting and reading, in seconds.
+        pool_timeout: How long to wait for a free connection, in
+            seconds.  None waits forever.
+        headers: Headers to send with every request.
+
+    Attributes:
+        request_function: A `request_function` for literate tests.
+            It sends requests with the method given by the test's
+            `request_method`.
+
+    """
+
+    def __init__(self, base_url='', pool_size=10, timeout=10.0,
+                 pool_timeout=None, headers=None):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pool_timeout = pool_timeout
+        self.headers = dict(headers or {})
+        self.request_function = _RequestFunction(self)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                if scheme == 'https':
+                    connection_class = http.client.HTTPSConnection
+                else:
+                    connection_class = http.client.HTTPConnection
+                pool = self._pools[key] = _Pool(
+                    connection_class,
+                    host,
+                    port,
+                    self.pool_size,
+                    self.timeout,
+                    self.pool_timeout,
+                )
+        return pool
+
+    def _encode(self, method, url, data):
+        """Get the path, body and headers of a request."""
+        parts = urlsplit(urljoin(self.base_url, url))
+        path = parts.path or '/'
+        query = parts.query
+        headers = dict(self.headers)
+        body = None
+        if data is not None:
+            if method.upper() in QUERY_METHODS:
+                extra = urlencode(data, doseq=True)
+                query = '&'.join(x for x in (query, extra) if x)
+            else:
+                body = json.dumps(data).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+        if query:
+            path = '{}?{}'.format(path, query)
+        return parts, path, body, headers
+
+    def request(self, method, url, data=None):
+        """Send a request.
+
+        Args:
+            method: The HTTP method, such as 'GET'.
+            url: The url, absolute or relative to `base_url`.
+            data: The payload.  For GET (and other methods without a
+                body), it is sent as the query string; otherwise, as
+                JSON.
+
+        Returns:
+            An `HTTPResponse`.
+
+        """
+        method = method.upper()
+        parts, path, body, headers = self._encode(method, url, data)
+        pool = self._get_pool(parts.scheme, parts.hostname, parts.port)
+        connection, reused = pool.acquire()
+        reusable = False
+        try:
+            try:
+                response = self._send(connection, method, path, body, headers)
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                # The server closed the idle connection; try a new one.
+                connection = pool.reconnect(connection)
+                response = self._send(connection, method, path, body, headers)
+            content = response.read()
+            reusable = not response.will_close
+            return HTTPResponse(
+                response.status,
+                dict(response.getheaders()),
+                content,
+            )
+        finally:
+            pool.release(connection, reusable)
+
+    def _send(self, connection, method, path, body, headers):
+        connection.request(method, path, body=body, headers=headers)
+        return connection.getresponse()
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
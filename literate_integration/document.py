@@ -4,10 +4,18 @@ import re
 import json
 
 from .models import LiterateRESTTest
+from .spec import LiterateSpec, get_spec
 
 
+# The version of the rendered documentation.  Bump it when the output
+# changes, so cached fragments (see `fragments`) are rendered again.
+DOCGEN_VERSION = 1
+
 MAX_LENGTH = 60
 
+# The fields of a literate test which are documented.
+DOCUMENTED_FIELDS = ('url', 'request_method', 'data')
+
 CAPITALS = re.compile('[A-Z]')
 LEADING_SPACE = re.compile('^\s*')
 SECTION_DATA = re.compile(' -\w')
@@ -102,61 +110,91 @@ def format_json(raw_data):
     return '\n'.join(data)
 
 
+def _get_spec(TestClass, resolve=True):
+    """Get the spec of a literate test, or the spec it was given.
+
+    The documented fields of a class's spec are resolved from an
+    instance (without running its setUp), if `resolve` is true.  The
+    others may depend on setUp, so they aren't.
+
+    """
+    if isinstance(TestClass, LiterateSpec):
+        return TestClass
+    spec = get_spec(TestClass)
+    if resolve and set(spec.dynamic) & set(DOCUMENTED_FIELDS):
+        spec = spec.resolve(TestClass(), DOCUMENTED_FIELDS)
+    return spec
+
+
 def _format_example(TestClass, add_class=True):
-    test_class = TestClass()
+    spec = _get_spec(TestClass)
     try:
-        data = format_json(test_class.data)
+        data = format_json(spec.data)
     except Exception as ex:
         raise Exception(
-            'data "{}" must be valid json: {}'.format(test_class.data, ex)
+            'data "{}" must be valid json: {}'.format(spec.data, ex)
         )
     request = 'curl -H {} -X {} -d \'{}\''.format(
         '"Content-Type: application/json"',
-        test_class.request_method,
+        spec.request_method,
         data,
     )
     wrapped_request = wrap_curl(request)
     wrapped = '\n' in wrapped_request
-    long_url = (len(wrapped_request) + len(test_class.url) + 1) > MAX_LENGTH
+    long_url = (len(wrapped_request) + len(spec.url) + 1) > MAX_LENGTH
     if wrapped or long_url:
-        request = wrapped_request + ' \\\n' + ' ' * 3 + test_class.url
+        request = wrapped_request + ' \\\n' + ' ' * 3 + spec.url
     else:
-        request = wrapped_request + ' ' + test_class.url
+        request = wrapped_request + ' ' + spec.url
     return '### Example:\n\n```{}\n{}\n```'.format(
         CODE_CLASS if add_class else '',
         request,
     )
 
 
+def _get_setup_body(docstring):
+    """Get the body of a setup docstring, or None."""
+    same_as_default = docstring == LiterateRESTTest.setUp.__doc__
+    not_specified = docstring == '' or docstring is None
+    if same_as_default or not_specified:
+        return None
+
+    # Take everything after the first newline and empty line.
+    # That is,
+    remaining = docstring.split('\n')[2:]
+    if remaining == []:
+        return None
+    return '\n'.join(remove_leading_whitespace(remaining))
+
+
 def _format_setup(TestClass):
     """Describe necessary setup steps.
 
     Only uses everything after the first line.
     (That is, the docstring should have the first line, followed
-    by an empty line, followed by the body.)
+    by an empty line, followed by the body.)  The docstrings of the
+    class's shared fixtures (see `fixtures`) come first, followed by
+    that of its `setUp`.
 
     Args:
-        TestClass: The LiterateRESTTest subclass.
+        TestClass: The LiterateRESTTest subclass, or its `LiterateSpec`.
 
     Returns:
-        The body of the docstring with leading indentation removed,
+        The body of the docstrings with leading indentation removed,
         and a title added.
 
     """
-    docstring = TestClass.setUp.__doc__
-    same_as_default = docstring == LiterateRESTTest.setUp.__doc__
-    not_specified = docstring == '' or docstring is None
-    if same_as_default or not_specified:
+    docstrings = _get_spec(TestClass, resolve=False).setup_docs
+    bodies = [
+        body
+        for body in map(_get_setup_body, docstrings)
+        if body is not None
+    ]
+    if bodies == []:
         return None
-
-    # Take everything after the first newline and empty line.
-    # That is,
-    remaining = docstring.split('\n')[2:]
-    if remaining == []:
-        return None
-    return '### Setup Required\n\n{}'.format(
-        '\n'.join(remove_leading_whitespace(remaining))
-    )
+    # The last body is kept as it is, as it was before fixtures.
+    bodies = [body.rstrip() for body in bodies[:-1]] + bodies[-1:]
+    return '### Setup Required\n\n{}'.format('\n\n'.join(bodies))
 
 
 def wrap_curl(curl):
@@ -214,17 +252,20 @@ def generate_rest_documentation(TestClass):
     be valid markdown and will be passed in as-is.
 
     Args:
-        TestClass: A subclass of LiterateRESTTest.
+        TestClass: A subclass of LiterateRESTTest, or its
+            `LiterateSpec` (see `spec`.)  With a spec, the test's
+            module doesn't need to be imported.
 
     Returns:
         A string representation of the LiterateRESTTest.
         The string will be valid markdown.
 
     """
-    title = _to_title(TestClass.__name__)
-    body = _format_docstring(TestClass.__doc__)
-    example = _format_example(TestClass)
-    setup = _format_setup(TestClass)
+    spec = _get_spec(TestClass)
+    title = _to_title(spec.name)
+    body = _format_docstring(spec.docstring)
+    example = _format_example(spec)
+    setup = _format_setup(spec)
 
     documentation = [title, '', body, setup, example, '']
 
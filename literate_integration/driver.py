@@ -1,9 +1,12 @@
 import argparse
-import inspect
 from importlib import import_module
 
 from .document import generate_rest_documentation
-from .models import LiterateRESTTest
+from .fragments import FragmentCache
+from .manifest import EXTENSION, Manifest
+from .registry import find_literate_tests
+from .spec import LiterateSpec
+from .static import read_specs
 
 parser = argparse.ArgumentParser(
     description='Generate documentation from literate integration tests.'
@@ -13,7 +16,26 @@ parser.add_argument(
     'files',
     nargs='+',
     help=(
-        'The files containing the tests to generate documentation from.'
+        'The files containing the tests to generate documentation from, '
+        'or manifests compiled from them.'
+    )
+)
+
+parser.add_argument(
+    '--cache',
+    help=(
+        'The path of a cache of rendered documentation, so that only '
+        'the tests which changed since the last run are rendered.'
+    )
+)
+
+parser.add_argument(
+    '--import',
+    dest='static',
+    action='store_false',
+    help=(
+        'Import every file, rather than reading the tests from their '
+        'source where possible.'
     )
 )
 
@@ -28,32 +50,124 @@ def get_documentations(module):
         The documentation for each literate test in the module.
 
     """
-    klasses = inspect.getmembers(module, inspect.isclass)
-    for name, klass in klasses:
-        if inspect.isabstract(klass):
-            continue
-        if issubclass(klass, LiterateRESTTest):
-            yield generate_rest_documentation(klass)
+    for klass in find_literate_tests(module).values():
+        yield generate_rest_documentation(klass)
+
+
+def _read_tests(filename):
+    """Read the literate tests in a file, from its source where possible.
 
+    Returns:
+        A tuple of a dictionary and whether the module was imported.
+        The dictionary maps names to the `LiterateSpec` of each test
+        which was read statically, or the class of each test which had
+        to be imported, sorted by name.
 
-def generate_documentation(files):
+    """
+    module_name = filename.replace('/', '.')[:-3]
+    tests, unknown = read_specs(filename, module_name)
+    if unknown is None:
+        module = import_module(module_name)
+        tests = find_literate_tests(module)
+    elif unknown:
+        module = import_module(module_name)
+        klasses = find_literate_tests(module)
+        tests.update(
+            (name, klasses[name]) for name in unknown if name in klasses
+        )
+    tests = {name: tests[name] for name in sorted(tests)}
+    return tests, unknown != []
+
+
+def get_static_documentations(filename):
+    """Yield documentation for each literate test in a file.
+
+    The tests are read from the source where possible (see `static`).
+    The module is only imported if some of them can't be.
+
+    Args:
+        filename: The path of a python file containing literate tests.
+
+    Yields:
+        The documentation for each literate test in the file, in the
+        same order as `get_documentations`.
+
+    """
+    tests, _ = _read_tests(filename)
+    for test in tests.values():
+        yield generate_rest_documentation(test)
+
+
+def get_cached_documentations(filename, cache):
+    """Get documentation for each literate test in a file, from a cache.
+
+    Only the tests which changed since they were cached are rendered.
+    (See `fragments`.)
+
+    Args:
+        filename: The path of a python file containing literate tests.
+        cache: A `fragments.FragmentCache`.
+
+    Returns:
+        A list of the documentation for each literate test in the file,
+        the same as `get_static_documentations`.
+
+    """
+    documentation = cache.get(filename)
+    if documentation is not None:
+        return documentation
+    tests, imported = _read_tests(filename)
+    documentation = []
+    keys = []
+    for test in tests.values():
+        if isinstance(test, LiterateSpec):
+            fragment, key = cache.render(test)
+            keys.append(key)
+        else:
+            fragment = generate_rest_documentation(test)
+        documentation.append(fragment)
+    if imported:
+        # The tests may depend on other files.
+        cache.forget(filename)
+    else:
+        cache.put(filename, keys)
+    return documentation
+
+
+def generate_documentation(files, static=True, cache=None):
     """Generate documentation.
 
     Prints documentation to standard out.
 
     Args:
-        files: A list of filenames.
+        files: A list of filenames.  Manifests (see `manifest`) are
+            read without importing the tests they were compiled from.
+        static: If true, literate tests are read from their source
+            where possible, rather than by importing their modules.
+        cache: If given, the path of a `fragments.FragmentCache`, to
+            reuse the documentation of unchanged tests from.  It is
+            only used when `static` is true.
 
     """
-    new_files = [
-        x.replace('/', '.')[:-3]
-        for x in files if x.endswith('.py')
-    ]
+    if cache is not None and static:
+        cache = FragmentCache(cache)
+    else:
+        cache = None
     documentation = []
-    for filename in new_files:
-        module = import_module(filename)
-        documentation.extend(get_documentations(module))
-
+    for filename in files:
+        if filename.endswith(EXTENSION):
+            with Manifest(filename) as manifest:
+                documentation.extend(manifest.documentations())
+        elif filename.endswith('.py') and cache is not None:
+            documentation.extend(get_cached_documentations(filename, cache))
+        elif filename.endswith('.py') and static:
+            documentation.extend(get_static_documentations(filename))
+        elif filename.endswith('.py'):
+            module = import_module(filename.replace('/', '.')[:-3])
+            documentation.extend(get_documentations(module))
+
+    if cache is not None:
+        cache.save()
     print('\n\n'.join(documentation))
 
 
@@ -65,4 +179,4 @@ def main():
 
     """
     args = parser.parse_args()
-    generate_documentation(args.files)
+    generate_documentation(args.files, args.static, args.cache)
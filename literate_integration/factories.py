@@ -1,16 +1,39 @@
 """Define a function which can run integration tests."""
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from unittest import TestCase
 
+import asyncio
 import inspect
 import re
+import threading
 
+from .budgets import _check_budgets
+from .client import _RequestFunction
+from .fixtures import get_fixtures, set_up_fixtures, tear_down_fixtures
+from .matcher import Matcher, assertMatches, content_hash
 from .models import LiterateRESTTest
-from .matcher import assertMatches
+from .registry import (
+    find_incomplete_tests,
+    find_literate_tests,
+    get_abstract_attributes,
+)
+from .spec import get_spec
+from .streaming import assertMatchesStream
+from .timing import Timing
 
 
 CAPITALS = re.compile('[A-Z]')
 
+# The reason literate tests are skipped by change-aware selection.
+UNCHANGED = 'Unchanged since its last passing run.'
+
+# The latest compiled matcher of each literate test class (and list
+# mode), with the content hash of the expected data it was compiled
+# from.  Only the latest is kept, so expected data which changes on
+# every run (say, ids from `setUp`) doesn't grow the cache.
+_matchers = {}
+
 
 def _to_snake_case(name):
     uppers = CAPITALS.findall(name)
@@ -24,25 +47,658 @@ def _to_snake_case(name):
     return 'test_' + new_name
 
 
-def _get_rest_test(klass):
+def _get_matcher(klass, expected_data, digest=None):
+    """Get the compiled matcher for a literate test.
+
+    The matcher is compiled the first time it is requested, and
+    reused afterwards.  Since the expected data is hashed by content,
+    changing it (say, from a property) still gets a fresh matcher,
+    which replaces the class's previous one.
+
+    Args:
+        klass: The LiterateRESTTest subclass.
+        expected_data: The data the class expects back.
+        digest: The content hash of `expected_data`, if it is known
+            (see `LiterateSpec.expected_hash`.)
+
+    Returns:
+        A `Matcher` for the expected data.
+
+    """
+    if digest is None:
+        digest = content_hash(expected_data)
+    key = (klass, klass.list_mode)
+    cached = _matchers.get(key)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    matcher = Matcher(expected_data, list_mode=klass.list_mode)
+    _matchers[key] = (digest, matcher)
+    return matcher
+
+
+def _get_body(response):
+    """Get the body of a response, as bytes or an iterable of chunks."""
+    if getattr(response, 'streaming', False):
+        return response.streaming_content
+    return response.content
+
+
+def _get_status_message(response):
+    """Get the message shown when a response has the wrong status.
+
+    A streaming response has no `content` (reading it would also use
+    up the stream), so it isn't shown.
+
+    """
+    if getattr(response, 'streaming', False):
+        return 'The response was streamed.'
+    return response.content
+
+
+def _size(chunk):
+    if isinstance(chunk, str):
+        return len(chunk.encode('utf-8'))
+    return len(chunk)
+
+
+class _CountedChunks(object):
+    """Iterates over the chunks of a body, counting their bytes.
+
+    It isn't a generator, so it isn't closed along with the stream
+    matcher's generators when matching stops early, and the rest of the
+    body can still be read.
+
+    """
+
+    def __init__(self, chunks, timing):
+        self.chunks = iter(chunks)
+        self.timing = timing
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self.chunks)
+        self.timing.size += _size(chunk)
+        return chunk
+
+
+def _count_bytes(body, timing):
+    """Record the size of a body in a timing, as it's read.
+
+    Returns:
+        The body, or an iterator over its chunks which counts them.
+
+    """
+    if isinstance(body, (bytes, bytearray, str)):
+        timing.size = _size(body)
+        return body
+    timing.size = 0
+    return _CountedChunks(body, timing)
+
+
+def _read_rest(body):
+    """Read (and so count) what's left of a body from `_count_bytes`."""
+    if not isinstance(body, (bytes, bytearray, str)):
+        for _ in body:
+            pass
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def _send_request(klass, spec):
+    """Call a literate test's `request_function` with its resolved spec.
+
+    An `HTTPClient.request_function` is given the resolved
+    `request_method`, since it may be a property.
+
+    Returns:
+        The response, or an awaitable of it.
+
+    """
+    function = inspect.getattr_static(klass, 'request_function', None)
+    if isinstance(function, _RequestFunction):
+        function = function.bind(spec.request_method)
+    else:
+        function = klass.request_function
+    return function(spec.url, data=spec.data)
+
+
+def _perform_request(klass, timing=None, cassettes=None):
+    """Set up a literate test and send its request.
+
+    If `setUp` or `request_function` are coroutine functions, they
+    are run on a new event loop.
+
+    Args:
+        klass: The LiterateRESTTest subclass.
+        timing: If given, the `Timing` to record the phases in.
+        cassettes: If given, the `CassetteStore` to replay the
+            response from, or record it in.
+
+    Returns:
+        A tuple of the class's resolved `LiterateSpec`, and the response.
+
+    """
+    if timing is None:
+        timing = Timing(klass.__name__)
+    spec = get_spec(klass)
+    with timing.phase('setup'):
+        instance = _get_instance(klass, spec)
+        if instance is not None:
+            result = instance.setUp()
+            if inspect.isawaitable(result):
+                asyncio.run(_await(result))
+        else:
+            # The class's attributes may have been patched.
+            instance = klass
+        spec = spec.resolve(instance)
+    response = _replay(klass, spec, cassettes)
+    if response is None:
+        trace = klass.max_allocation is not None
+        with timing.phase('request', trace=trace):
+            response = _send_request(klass, spec)
+            if inspect.isawaitable(response):
+                response = asyncio.run(_await(response))
+        if cassettes is not None:
+            response = cassettes.record(klass, spec, response)
+    return spec, response
+
+
+def _get_instance(klass, spec):
+    """Instantiate a literate test, if it has any setup or properties.
+
+    Otherwise, its fields can be read from the class.
+
+    """
+    if (spec.dynamic
+            or klass.setUp is not LiterateRESTTest.setUp
+            or klass.__init__ is not LiterateRESTTest.__init__):
+        return klass()
+    return None
+
+
+def _replay(klass, spec, cassettes):
+    """Get a literate test's recorded response, if it should be replayed.
+
+    Replayed requests aren't timed (so they aren't held to the
+    latency budgets.)
+
+    """
+    if cassettes is None:
+        return None
+    return cassettes.replay(klass, spec)
+
+
+async def _perform_request_async(klass, timing=None, cassettes=None):
+    """Set up a literate test and send its request, asynchronously.
+
+    Args:
+        klass: The LiterateRESTTest subclass.
+        timing: If given, the `Timing` to record the phases in.
+        cassettes: If given, the `CassetteStore` to replay the
+            response from, or record it in.
+
+    Returns:
+        A tuple of the class's resolved `LiterateSpec`, and the response.
+
+    """
+    if timing is None:
+        timing = Timing(klass.__name__)
+    spec = get_spec(klass)
+    with timing.phase('setup'):
+        instance = _get_instance(klass, spec)
+        if instance is not None:
+            result = instance.setUp()
+            if inspect.isawaitable(result):
+                await result
+        else:
+            # The class's attributes may have been patched.
+            instance = klass
+        spec = spec.resolve(instance)
+    response = _replay(klass, spec, cassettes)
+    if response is None:
+        trace = klass.max_allocation is not None
+        with timing.phase('request', trace=trace):
+            response = _send_request(klass, spec)
+            if inspect.isawaitable(response):
+                response = await response
+        if cassettes is not None:
+            response = cassettes.record(klass, spec, response)
+    return spec, response
+
+
+def _is_concurrent(klass):
+    """Whether a literate test's request may be sent alongside others."""
+    # Allocations are traced for the whole process.
+    return klass.concurrent and klass.max_allocation is None
+
+
+def _check_response(test_case, klass, spec, response, timing=None):
+    """Check the response to a literate test's request.
+
+    Args:
+        test_case: The TestCase running the literate test.
+        klass: The LiterateRESTTest subclass.
+        spec: The resolved `LiterateSpec` the request was sent with.
+        response: The response.
+        timing: If given, the `Timing` to record the phases in.
+
+    """
+    if timing is None:
+        timing = Timing(klass.__name__)
+    test_case.assertEqual(
+        response.status_code,
+        spec.expected_status,
+        _get_status_message(response),
+    )
+    matcher = _get_matcher(klass, spec.expected_data, spec.expected_hash)
+    if spec.stream_response:
+        body = _count_bytes(_get_body(response), timing)
+        with timing.phase('match'):
+            assertMatchesStream(matcher, body)
+        if klass.max_response_size is not None:
+            # Matching stops as soon as it can, so the whole body has
+            # to be read to hold it to its size budget.
+            _read_rest(body)
+    else:
+        timing.size = _size(response.content)
+        with timing.phase('json'):
+            data = response.json()
+        with timing.phase('match'):
+            assertMatches(matcher, data)
+
+
+def _get_rest_test(klass, recorder=None, baseline=None, cassettes=None,
+                   selection=None):
     def inner(self):
-        instance = klass()
-        instance.setUp()
-        response = klass.request_function(
-            instance.url,
-            data=instance.data,
-        )
-        self.assertEqual(
-            response.status_code,
-            instance.expected_status,
-            response.content
-        )
-        data = response.json()
-        assertMatches(instance.expected_data, data)
+        if selection is not None and selection.is_unchanged(klass):
+            self.skipTest(UNCHANGED)
+        futures = getattr(self, '_literate_futures', None)
+        if futures is not None and klass in futures:
+            timing = self._literate_timings[klass]
+        else:
+            timing = Timing(klass.__name__)
+        passed = False
+        try:
+            if futures is None:
+                spec, response = _perform_request(
+                    klass,
+                    timing,
+                    cassettes,
+                )
+            elif klass in futures:
+                spec, response = futures[klass].result()
+            else:
+                # Don't run alongside the concurrent requests.
+                wait(futures.values())
+                spec, response = _perform_request(
+                    klass,
+                    timing,
+                    cassettes,
+                )
+            _check_response(self, klass, spec, response, timing)
+            _check_budgets(self, klass, timing, baseline)
+            passed = True
+        finally:
+            if recorder is not None:
+                recorder.record(timing)
+            if selection is not None:
+                selection.update(klass, passed)
     return inner
 
 
-def rest_test_factory(module, class_name, BaseClass=TestCase):
+def _get_running_names(test_case, result, loaded):
+    """Get the names of the generated tests which are being run.
+
+    pytest runs each test with its own item as the result, and its
+    session holds the items which were selected.  unittest's loader
+    makes an instance of each test it runs before the class is set up,
+    so otherwise, those are the tests which were loaded.
+
+    Args:
+        test_case: The generated test which is about to run.
+        result: The result it is run with.
+        loaded: The names of the tests which were instantiated.
+
+    Returns:
+        A set of test method names.
+
+    """
+    items = getattr(getattr(result, 'session', None), 'items', None)
+    if items is None:
+        return set(loaded)
+    return {
+        item.name for item in items
+        if getattr(item, 'cls', None) is type(test_case)
+    }
+
+
+def _get_concurrent_fixtures(klasses, concurrency, get_test_class,
+                             cassettes=None):
+    """Get class fixtures which send the requests on a thread pool.
+
+    The requests are sent when the first test runs, and only for the
+    tests which are being run; a runner may have selected only some of
+    them (say, with `pytest -k`.)
+
+    Args:
+        klasses: The LiterateRESTTest subclasses to run.
+        concurrency: The number of requests to have in flight at once.
+        get_test_class: Returns the generated test class.  (It doesn't
+            exist yet when the fixtures are defined.)
+        cassettes: If given, the `CassetteStore` for the responses.
+
+    Returns:
+        The __init__, run, setUpClass and tearDownClass methods.
+
+    """
+    names = {_to_snake_case(klass.__name__): klass for klass in klasses}
+    loaded = set()
+
+    def __init__(self, *args, **kwargs):
+        super(get_test_class(), self).__init__(*args, **kwargs)
+        loaded.add(self._testMethodName)
+
+    def run(self, result=None):
+        cls = type(self)
+        if getattr(cls, '_literate_executor', None) is not None and (
+                cls._literate_futures is None):
+            running = [
+                klass for name, klass in names.items()
+                if name in _get_running_names(self, result, loaded)
+                and _is_concurrent(klass)
+            ]
+            cls._literate_timings = {
+                klass: Timing(klass.__name__) for klass in running
+            }
+            cls._literate_futures = {
+                klass: cls._literate_executor.submit(
+                    _perform_request,
+                    klass,
+                    timing,
+                    cassettes,
+                )
+                for klass, timing in cls._literate_timings.items()
+            }
+        return super(get_test_class(), self).run(result)
+
+    def setUpClass(cls):
+        super(get_test_class(), cls).setUpClass()
+        set_up_fixtures(klasses)
+        cls._literate_executor = ThreadPoolExecutor(max_workers=concurrency)
+        cls._literate_timings = {}
+        cls._literate_futures = None
+
+    def tearDownClass(cls):
+        cls._literate_executor.shutdown(wait=True)
+        del cls._literate_executor
+        del cls._literate_futures
+        del cls._literate_timings
+        tear_down_fixtures(klasses)
+        super(get_test_class(), cls).tearDownClass()
+
+    return __init__, run, classmethod(setUpClass), classmethod(tearDownClass)
+
+
+async def run_literate_tests(klasses, concurrency=10, on_result=None,
+                             recorder=None, baseline=None, cassettes=None):
+    """Run literate tests on the current event loop.
+
+    The requests are sent with at most `concurrency` in flight at a
+    time, and each response is checked as soon as it arrives.
+
+    Args:
+        klasses: The LiterateRESTTest subclasses to run.
+        concurrency: The number of requests to have in flight at once.
+        on_result: Called with each class, and the exception raised by
+            its check (or None, if it passed), as soon as it's checked.
+        recorder: If given, a `TimingRecorder` to record each
+            test's timing in.
+        baseline: If given, a `Baseline` to check each request's
+            latency against.
+        cassettes: If given, a `CassetteStore` to replay the responses
+            from, or record them in.
+
+    Returns:
+        A dictionary from each class to its exception (or None.)
+
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    checker = TestCase()
+    results = {}
+
+    async def run(klass):
+        async with semaphore:
+            timing = Timing(klass.__name__)
+            try:
+                spec, response = await _perform_request_async(
+                    klass,
+                    timing,
+                    cassettes,
+                )
+                _check_response(checker, klass, spec, response, timing)
+                _check_budgets(checker, klass, timing, baseline)
+            except Exception as ex:
+                results[klass] = ex
+            else:
+                results[klass] = None
+            if recorder is not None:
+                recorder.record(timing)
+        if on_result is not None:
+            on_result(klass, results[klass])
+
+    await asyncio.gather(*[run(klass) for klass in klasses])
+    return results
+
+
+def _get_async_rest_test(klass, recorder=None, baseline=None,
+                         cassettes=None, selection=None):
+    async def inner(self):
+        if selection is not None and selection.is_unchanged(klass):
+            self.skipTest(UNCHANGED)
+        futures = getattr(self, '_literate_futures', None)
+        if futures is not None and klass in futures:
+            # Timed by the runner.
+            error = await asyncio.wrap_future(futures[klass])
+            if selection is not None:
+                selection.update(klass, error is None)
+            if error is not None:
+                raise error
+            return
+        if futures is not None:
+            # Don't run alongside the concurrent requests.
+            await asyncio.gather(*[
+                asyncio.wrap_future(future) for future in futures.values()
+            ])
+        timing = Timing(klass.__name__)
+        passed = False
+        try:
+            spec, response = await _perform_request_async(
+                klass,
+                timing,
+                cassettes,
+            )
+            _check_response(self, klass, spec, response, timing)
+            _check_budgets(self, klass, timing, baseline)
+            passed = True
+        finally:
+            if recorder is not None:
+                recorder.record(timing)
+            if selection is not None:
+                selection.update(klass, passed)
+    return inner
+
+
+def _get_async_fixtures(klasses, concurrency, get_test_class,
+                        recorder=None, baseline=None, cassettes=None):
+    """Get class fixtures which run the requests on an event loop.
+
+    The event loop runs in its own thread from when the first test
+    runs until the class is torn down, since each test of an
+    IsolatedAsyncioTestCase gets an event loop of its own.  Only the
+    tests which are being run are scheduled on it.
+
+    Args:
+        klasses: The LiterateRESTTest subclasses to run.
+        concurrency: The number of requests to have in flight at once.
+        get_test_class: Returns the generated test class.
+        recorder: If given, a `TimingRecorder` for the tests' timings.
+        baseline: If given, a `Baseline` for the requests' latencies.
+        cassettes: If given, a `CassetteStore` for the responses.
+
+    Returns:
+        The __init__, run, setUpClass and tearDownClass methods.
+
+    """
+    names = {_to_snake_case(klass.__name__): klass for klass in klasses}
+    loaded = set()
+
+    def __init__(self, *args, **kwargs):
+        super(get_test_class(), self).__init__(*args, **kwargs)
+        loaded.add(self._testMethodName)
+
+    def run(self, result=None):
+        cls = type(self)
+        if hasattr(cls, '_literate_thread') and (
+                cls._literate_futures is None):
+            running = _get_running_names(self, result, loaded)
+            concurrent = [
+                klass for name, klass in names.items()
+                if name in running and _is_concurrent(klass)
+            ]
+            futures = {klass: Future() for klass in concurrent}
+
+            def on_result(klass, error):
+                futures[klass].set_result(error)
+
+            cls._literate_futures = futures
+            cls._literate_thread = threading.Thread(
+                target=asyncio.run,
+                args=(run_literate_tests(
+                    concurrent,
+                    concurrency,
+                    on_result,
+                    recorder,
+                    baseline,
+                    cassettes,
+                ),),
+                daemon=True,
+            )
+            cls._literate_thread.start()
+        return super(get_test_class(), self).run(result)
+
+    def setUpClass(cls):
+        super(get_test_class(), cls).setUpClass()
+        set_up_fixtures(klasses)
+        cls._literate_futures = None
+        cls._literate_thread = None
+
+    def tearDownClass(cls):
+        if cls._literate_thread is not None:
+            cls._literate_thread.join()
+        del cls._literate_thread
+        del cls._literate_futures
+        tear_down_fixtures(klasses)
+        super(get_test_class(), cls).tearDownClass()
+
+    return __init__, run, classmethod(setUpClass), classmethod(tearDownClass)
+
+
+def _get_shared_fixtures(klasses, get_test_class):
+    """Get class fixtures which set up the literate tests' fixtures.
+
+    Args:
+        klasses: The LiterateRESTTest subclasses to run.
+        get_test_class: Returns the generated test class.
+
+    Returns:
+        The setUpClass and tearDownClass methods.
+
+    """
+
+    def setUpClass(cls):
+        super(get_test_class(), cls).setUpClass()
+        set_up_fixtures(klasses)
+
+    def tearDownClass(cls):
+        tear_down_fixtures(klasses)
+        super(get_test_class(), cls).tearDownClass()
+
+    return classmethod(setUpClass), classmethod(tearDownClass)
+
+
+def _get_saving_fixture(stores, tearDownClass, get_test_class):
+    """Get a tearDownClass method which saves files of results.
+
+    Args:
+        stores: The objects to save (such as a `Baseline`), each
+            with a `save` method.
+        tearDownClass: The tearDownClass method to run first, if any.
+        get_test_class: Returns the generated test class.
+
+    Returns:
+        The tearDownClass method.
+
+    """
+
+    def inner(cls):
+        try:
+            if tearDownClass is None:
+                super(get_test_class(), cls).tearDownClass()
+            else:
+                tearDownClass.__func__(cls)
+        finally:
+            for store in stores:
+                store.save()
+
+    return classmethod(inner)
+
+
+def _get_selected(klasses, selection):
+    """Get the literate tests which need to be run."""
+    if selection is None:
+        return list(klasses)
+    return [klass for klass in klasses if not selection.is_unchanged(klass)]
+
+
+def _get_literate_classes(module):
+    """Get the literate tests in a module, by name."""
+    return {
+        name: klass
+        for name, klass in find_literate_tests(module).items()
+        if 'LiterateRESTTest' not in name
+    }
+
+
+def _get_incomplete_tests(module):
+    """Get a failing test for each incomplete literate test in a module."""
+    return {
+        _to_snake_case(name): _get_incomplete_test(klass)
+        for name, klass in find_incomplete_tests(module).items()
+        if 'LiterateRESTTest' not in name
+    }
+
+
+def _get_incomplete_test(klass):
+    message = (
+        '{} must define {}, or set `abstract = True` if it is a base '
+        'for other literate tests.'
+    ).format(
+        klass.__name__,
+        ', '.join(sorted(get_abstract_attributes(klass))),
+    )
+
+    def inner(self):
+        self.fail(message)
+    return inner
+
+
+def rest_test_factory(module, class_name, BaseClass=TestCase,
+                      concurrency=None, recorder=None, baseline=None,
+                      cassettes=None, selection=None):
     """Get a test class for the given module.
 
     Args:
@@ -52,6 +708,28 @@ def rest_test_factory(module, class_name, BaseClass=TestCase):
             will probably be rest_framework's APITestCase, but
             it doesn't have to be.  However, it _must_ have the
             method `assertEqual` and `assertTrue` defined.
+        concurrency: If given, the requests of the literate tests
+            being run are all sent when the first test runs, on a pool
+            of this many threads.  Each test then waits for its own response,
+            and checks it as usual.  Literate tests with `concurrent`
+            set to false are run one at a time, once the others'
+            requests have finished.  This suits tests against a live
+            server; the requests don't share the test's database
+            connection (or transaction.)
+        recorder: If given, a `TimingRecorder` which each test records
+            its `Timing` in: how long it spent in `setUp`, sending the
+            request, decoding and matching the response, and the size
+            of the response.
+        baseline: If given, a `budgets.Baseline`.  Tests fail if their
+            request got much slower than the latency recorded in it,
+            and it is saved when the class is torn down.
+        cassettes: If given, a `cassettes.CassetteStore`.  Depending
+            on its mode, responses are recorded in it, or replayed
+            from it without calling `request_function`.
+        selection: If given, a `selection.ResultsCache`.  Literate
+            tests which are unchanged since they last passed are
+            skipped (and their requests aren't sent.)  It is saved
+            when the class is torn down.
 
     Returns:
         A single integration test containing all of the
@@ -59,27 +737,153 @@ def rest_test_factory(module, class_name, BaseClass=TestCase):
 
     """
 
+    return _rest_test_factory(
+        module,
+        class_name,
+        BaseClass,
+        concurrency,
+        recorder,
+        baseline,
+        cassettes,
+        selection,
+    )
+
+
+def _rest_test_factory(module, class_name, BaseClass=TestCase,
+                       concurrency=None, recorder=None, baseline=None,
+                       cassettes=None, selection=None, save=True):
+    """Make the test class of `rest_test_factory`.
+
+    Args:
+        save: Whether the `baseline` and `selection` are saved when the
+            class is torn down.  `sharding` saves them itself, once the
+            results of every shard are merged.
+
+    """
+
     def __init__(self, *args, **kwargs):
         # return BaseClass.__init__(self, name[:-len('Class')])
         return BaseClass.__init__(self, *args, **kwargs)
 
-    tests = inspect.getmembers(module, inspect.isclass)
-
-    # Make sure all the tests follow the pattern.
-    for name, klass in tests:
-        if inspect.isabstract(klass):
-            continue
-        if not issubclass(klass, LiterateRESTTest):
-            continue
-        klass()
-
     # Make the tests
+    klasses = _get_literate_classes(module)
     fns = {
-        _to_snake_case(name): _get_rest_test(klass)
-        for name, klass in tests
-        if (issubclass(klass, LiterateRESTTest)
-            and 'LiterateRESTTest' not in name)
+        _to_snake_case(name): _get_rest_test(
+            klass,
+            recorder,
+            baseline,
+            cassettes,
+            selection,
+        )
+        for name, klass in klasses.items()
     }
+    fns.update(_get_incomplete_tests(module))
     fns['__init__'] = __init__
+    selected = _get_selected(klasses.values(), selection)
+    if concurrency:
+        (
+            fns['__init__'],
+            fns['run'],
+            fns['setUpClass'],
+            fns['tearDownClass'],
+        ) = _get_concurrent_fixtures(
+            selected,
+            concurrency,
+            lambda: testClass,
+            cassettes,
+        )
+    elif any(get_fixtures(klass) for klass in selected):
+        fns['setUpClass'], fns['tearDownClass'] = _get_shared_fixtures(
+            selected,
+            lambda: testClass,
+        )
+    stores = [store for store in (baseline, selection) if store is not None]
+    if stores and save:
+        fns['tearDownClass'] = _get_saving_fixture(
+            stores,
+            fns.get('tearDownClass'),
+            lambda: testClass,
+        )
+    testClass = type(class_name, (BaseClass,), fns)
+    return testClass
+
+
+def async_rest_test_factory(module, class_name, BaseClass=None,
+                            concurrency=None, recorder=None,
+                            baseline=None, cassettes=None, selection=None):
+    """Get an asynchronous test class for the given module.
+
+    The generated tests are coroutines, so the literate tests'
+    `request_function` (and `setUp`) may be coroutine functions, such
+    as the methods of an asynchronous HTTP client.
+
+    Args:
+        module: The module which holds the classes.
+        class_name: The name the integration test case should have.
+        BaseClass: The base class for this test.  Defaults to
+            `unittest.IsolatedAsyncioTestCase`.
+        concurrency: If given, every literate test being run is
+            scheduled when the first test runs, on an event loop of its
+            own, with at most this many requests in flight.  Responses
+            are checked as they arrive, and each test reports its own
+            result.
+            Literate tests with `concurrent` set to false are run one
+            at a time, once the others have finished.
+        recorder: If given, a `TimingRecorder` which each test records
+            its `Timing` in.
+        baseline: If given, a `budgets.Baseline` to check the requests'
+            latencies against.
+        cassettes: If given, a `cassettes.CassetteStore` to record the
+            responses in, or replay them from.
+        selection: If given, a `selection.ResultsCache`, to skip the
+            literate tests which are unchanged since they last passed.
+
+    Returns:
+        A single integration test containing all of the
+        tests defined in the module.
+
+    """
+    if BaseClass is None:
+        from unittest import IsolatedAsyncioTestCase as BaseClass
+
+    klasses = _get_literate_classes(module)
+    fns = {
+        _to_snake_case(name): _get_async_rest_test(
+            klass,
+            recorder,
+            baseline,
+            cassettes,
+            selection,
+        )
+        for name, klass in klasses.items()
+    }
+    fns.update(_get_incomplete_tests(module))
+    selected = _get_selected(klasses.values(), selection)
+    if concurrency:
+        (
+            fns['__init__'],
+            fns['run'],
+            fns['setUpClass'],
+            fns['tearDownClass'],
+        ) = _get_async_fixtures(
+            selected,
+            concurrency,
+            lambda: testClass,
+            recorder,
+            baseline,
+            cassettes,
+        )
+    elif any(get_fixtures(klass) for klass in selected):
+        fns['setUpClass'], fns['tearDownClass'] = _get_shared_fixtures(
+            selected,
+            lambda: testClass,
+        )
+    stores = [store for store in (baseline, selection) if store is not None]
+    if stores:
+        fns['tearDownClass'] = _get_saving_fixture(
+            stores,
+            fns.get('tearDownClass'),
+            lambda: testClass,
+        )
     testClass = type(class_name, (BaseClass,), fns)
     return testClass
@@ -0,0 +1,171 @@
+"""Share expensive setup between literate tests.
+
+A literate test's `setUp` runs before every request.  Setup which many
+tests need (say, seeding the same catalog) can instead be declared once
+as a fixture, and assigned to each literate test that depends on it:
+
+```
+@fixture(scope=MODULE)
+def catalog():
+    \"\"\"Seed the catalog.
+
+    The catalog must hold at least one book.
+
+    \"\"\"
+    return seed_catalog()
+
+
+class ListBooksTest(LiterateRESTTest):
+    catalog = catalog
+
+    @property
+    def url(self):
+        return '/api/catalogs/{}/books/'.format(self.catalog.id)
+```
+
+The fixture runs the first time it is used within its scope, and its
+value is reused for the rest of that scope.  The generated test classes
+set up their literate tests' fixtures in `setUpClass`, and tear down the
+class-scoped ones in `tearDownClass`.  The rest are torn down when the
+process exits.  (With Django's `TestCase`, changes to the database are
+rolled back at the end of each class, so fixtures which write to it
+should have the class scope.)
+
+The body of a fixture's docstring is documented as a prerequisite
+of the tests which use it, along with that of their `setUp`.
+
+"""
+import atexit
+import threading
+import weakref
+
+
+# Shared by the literate tests of one generated TestCase.
+CLASS = 'class'
+
+# Shared by the literate tests of one module.
+MODULE = 'module'
+
+# Shared by every literate test.
+SESSION = 'session'
+
+SCOPES = (CLASS, MODULE, SESSION)
+
+# Every fixture, so that they can be torn down at exit.
+_fixtures = weakref.WeakSet()
+
+
+class Fixture(object):
+    """Setup shared by literate tests.
+
+    A fixture is a descriptor: assign it to an attribute of a literate
+    test, and reading the attribute from an instance gets the fixture's
+    value.
+
+    Args:
+        function: Called with no arguments to set the fixture up.
+            It returns the fixture's value.
+        scope: One of `SCOPES`.
+        teardown: If given, called with the fixture's value to
+            tear it down.
+
+    """
+
+    def __init__(self, function, scope=MODULE, teardown=None):
+        if scope not in SCOPES:
+            raise ValueError('Unknown fixture scope: {!r}'.format(scope))
+        self.function = function
+        self.scope = scope
+        self.teardown_function = teardown
+        self.name = function.__name__
+        self.__doc__ = function.__doc__
+        self._values = {}
+        self._lock = threading.Lock()
+        _fixtures.add(self)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return self.get(owner)
+
+    def _key(self, klass):
+        if self.scope == MODULE:
+            return klass.__module__
+        return None
+
+    def get(self, klass):
+        """Get the fixture's value for a literate test.
+
+        The fixture is set up, if it isn't already set up in the scope
+        of the class.
+
+        Args:
+            klass: The LiterateRESTTest subclass.
+
+        Returns:
+            The fixture's value.
+
+        """
+        key = self._key(klass)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self.function()
+            return self._values[key]
+
+    def teardown(self):
+        """Tear down every value of the fixture."""
+        with self._lock:
+            values, self._values = self._values, {}
+        if self.teardown_function is not None:
+            for value in values.values():
+                self.teardown_function(value)
+
+
+def fixture(function=None, scope=MODULE, teardown=None):
+    """Declare a fixture.
+
+    May be used as `@fixture`, or with arguments, as
+    `@fixture(scope=SESSION)`.
+
+    Returns:
+        A `Fixture`, or a decorator which makes one.
+
+    """
+    if function is None:
+        return lambda function: Fixture(function, scope, teardown)
+    return Fixture(function, scope, teardown)
+
+
+def get_fixtures(klass):
+    """Get the fixtures a literate test uses, in the order declared."""
+    fixtures = []
+    for base in reversed(klass.__mro__):
+        for value in vars(base).values():
+            if isinstance(value, Fixture) and value not in fixtures:
+                fixtures.append(value)
+    return fixtures
+
+
+def set_up_fixtures(klasses):
+    """Set up the fixtures of literate tests, ahead of their requests."""
+    for klass in klasses:
+        for value in get_fixtures(klass):
+            value.get(klass)
+
+
+def tear_down_fixtures(klasses, scope=CLASS):
+    """Tear down the fixtures of literate tests, in the given scope."""
+    torn_down = set()
+    for klass in klasses:
+        for value in reversed(get_fixtures(klass)):
+            if value.scope == scope and value not in torn_down:
+                torn_down.add(value)
+                value.teardown()
+
+
+def _tear_down_all():
+    for value in list(_fixtures):
+        value.teardown()
+
+
+atexit.register(_tear_down_all)
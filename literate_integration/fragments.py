@@ -0,0 +1,174 @@
+"""Cache rendered documentation between `docgen` runs.
+
+Pass `--cache PATH` to `docgen`, and the markdown rendered for each
+literate test is kept in a JSON file.  On the next run:
+
+- A file whose size and modification time (or, failing that, whose
+  content hash) haven't changed reuses all of its fragments, without
+  being parsed.
+- A changed file is parsed again (see `static`), but each test whose
+  spec is the same as before reuses its fragment, rather than being
+  rendered again.  A test's spec covers everything its documentation
+  is rendered from: its docstring, its setup docstrings and its fields,
+  whether they are written in the class, its bases in the same file,
+  or module-level constants and fixtures.
+
+Fragments are also keyed by `document.DOCGEN_VERSION`, so a new version
+of the renderer starts afresh.  The output is the same as a full
+rebuild.
+
+Tests which have to be imported can depend on other files (say, a base
+class imported from elsewhere), so their fragments are never reused.
+Files holding such tests are imported on every run.
+
+"""
+import hashlib
+import json
+import os
+import threading
+
+from .document import DOCGEN_VERSION, generate_rest_documentation
+
+
+def _hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fin:
+        for chunk in iter(lambda: fin.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _get_key(spec):
+    """Get the key of a spec's fragment."""
+    encoded = json.dumps(
+        [DOCGEN_VERSION, spec.to_dict()],
+        sort_keys=True,
+        separators=(',', ':'),
+        default=repr,
+    )
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+class FragmentCache(object):
+    """Rendered documentation, by file and by spec.
+
+    Args:
+        path: The path of the cache file (JSON.)  It is created if it
+            doesn't exist, and rewritten by `save`.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.fragments = {}
+        self.rendered = 0
+        self._used = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as fin:
+                cached = json.load(fin)
+            if cached.get('version') == DOCGEN_VERSION:
+                self.files = cached['files']
+                self.fragments = cached['fragments']
+
+    def _stat(self, filename):
+        stat = os.stat(filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, filename):
+        """Get the fragments of a file, if it hasn't changed.
+
+        Args:
+            filename: The path of a python file of literate tests.
+
+        Returns:
+            A list of the documentation of each test in the file, in
+            order, or None if the file has to be read again.
+
+        """
+        with self._lock:
+            entry = self.files.get(filename)
+            if entry is None:
+                return None
+            mtime, size = self._stat(filename)
+            if (entry['mtime'], entry['size']) != (mtime, size):
+                if size != entry['size'] or (
+                        _hash_file(filename) != entry['hash']):
+                    return None
+                # Touched, but not changed.
+                entry['mtime'] = mtime
+            if any(key not in self.fragments for key in entry['fragments']):
+                return None
+            self._used.update(entry['fragments'])
+            return [self.fragments[key] for key in entry['fragments']]
+
+    def render(self, spec):
+        """Get the documentation of a spec, rendering it if it's new.
+
+        Args:
+            spec: A resolved `LiterateSpec`.
+
+        Returns:
+            A tuple of its documentation, and the key of the fragment.
+
+        """
+        key = _get_key(spec)
+        with self._lock:
+            fragment = self.fragments.get(key)
+        if fragment is None:
+            fragment = generate_rest_documentation(spec)
+            with self._lock:
+                self.fragments[key] = fragment
+                self.rendered += 1
+        with self._lock:
+            self._used.add(key)
+        return fragment, key
+
+    def put(self, filename, keys):
+        """Record the fragments of a file, to be reused while it's unchanged.
+
+        Args:
+            filename: The path of the file.
+            keys: The keys of its fragments (from `render`), in order.
+
+        """
+        mtime, size = self._stat(filename)
+        digest = _hash_file(filename)
+        with self._lock:
+            self.files[filename] = {
+                'mtime': mtime,
+                'size': size,
+                'hash': digest,
+                'fragments': list(keys),
+            }
+
+    def forget(self, filename):
+        """Stop reusing the fragments of a file."""
+        with self._lock:
+            self.files.pop(filename, None)
+
+    def save(self):
+        """Write the cache file.
+
+        Fragments which no file refers to, and which weren't used in
+        this run, are dropped.
+
+        """
+        with self._lock:
+            kept = set(self._used)
+            for entry in self.files.values():
+                kept.update(entry['fragments'])
+            cached = {
+                'version': DOCGEN_VERSION,
+                'files': self.files,
+                'fragments': {
+                    key: fragment
+                    for key, fragment in self.fragments.items()
+                    if key in kept
+                },
+            }
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w') as fout:
+                json.dump(cached, fout, indent=4, sort_keys=True)
+            os.replace(temporary, self.path)
@@ -0,0 +1,348 @@
+"""Replay literate tests as load, to measure an API's capacity.
+
+The literate tests which document the endpoints double as the traffic
+scenarios: each request is replayed (with the url, method and data of
+its class) for a fixed duration, at a given concurrency or rate.  A
+sample of the responses is validated with the matcher, and latencies are
+collected into histograms, so that throughput, error rates and latency
+percentiles can be reported for each class.
+
+"""
+from unittest import TestCase
+
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from importlib import import_module
+
+from .factories import (
+    _await,
+    _check_response,
+    _get_literate_classes,
+    _send_request,
+)
+from .spec import get_spec
+
+
+# The relative precision of the latency histograms.
+PRECISION = 0.01
+
+# The smallest latency the histograms distinguish, in seconds.
+_RESOLUTION = 1e-6
+
+_LOG_BASE = math.log(1 + PRECISION)
+
+# Provides the assertions for validating sampled responses.
+_checker = TestCase()
+
+
+class Histogram(object):
+    """A histogram of latencies with logarithmic buckets.
+
+    Each bucket is `PRECISION` wider than the last, so percentiles
+    are accurate to within that fraction, however many latencies are
+    recorded.
+
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, latency):
+        index = max(0, math.ceil(
+            math.log(max(latency, _RESOLUTION) / _RESOLUTION) / _LOG_BASE
+        ))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += latency
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, percent):
+        """Get a percentile of the recorded latencies, in seconds.
+
+        Returns:
+            The upper bound of the bucket holding the percentile, or
+            None if nothing was recorded.
+
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100.0))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return _RESOLUTION * (1 + PRECISION) ** index
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class ClassStats(object):
+    """The load results for a single literate test class."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = Histogram()
+        self.errors = 0
+        self.sampled = 0
+        self.mismatches = 0
+
+    def merge(self, other):
+        self.latencies.merge(other.latencies)
+        self.errors += other.errors
+        self.sampled += other.sampled
+        self.mismatches += other.mismatches
+
+    @property
+    def requests(self):
+        return self.latencies.count
+
+    def to_dict(self, elapsed):
+        return {
+            'name': self.name,
+            'requests': self.requests,
+            'throughput': self.requests / elapsed if elapsed else 0.0,
+            'error_rate': (
+                self.errors / self.requests if self.requests else 0.0
+            ),
+            'errors': self.errors,
+            'sampled': self.sampled,
+            'mismatches': self.mismatches,
+            'mean': self.latencies.mean,
+            'p50': self.latencies.percentile(50),
+            'p95': self.latencies.percentile(95),
+            'p99': self.latencies.percentile(99),
+        }
+
+
+class LoadReport(object):
+    """The results of a load run, for each literate test class."""
+
+    def __init__(self, stats, elapsed):
+        self.stats = stats
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            'elapsed': self.elapsed,
+            'classes': [
+                stats.to_dict(self.elapsed) for stats in self.stats.values()
+            ],
+        }
+
+    def format(self):
+        """Format the report as a table."""
+        lines = ['{:<32} {:>8} {:>9} {:>7} {:>9} {:>9} {:>9}'.format(
+            'class', 'requests', 'req/s', 'errors', 'p50 ms', 'p95 ms',
+            'p99 ms',
+        )]
+        for stats in self.stats.values():
+            row = stats.to_dict(self.elapsed)
+            lines.append(
+                '{:<32} {:>8} {:>9.1f} {:>6.1f}% {:>9} {:>9} {:>9}'.format(
+                    row['name'][:32],
+                    row['requests'],
+                    row['throughput'],
+                    row['error_rate'] * 100,
+                    _format_ms(row['p50']),
+                    _format_ms(row['p95']),
+                    _format_ms(row['p99']),
+                )
+            )
+        return '\n'.join(lines)
+
+
+def _format_ms(seconds):
+    return '-' if seconds is None else '{:.1f}'.format(seconds * 1000)
+
+
+def _set_up(klass):
+    """Run a literate test's setUp, and get its resolved spec."""
+    spec = get_spec(klass)
+    instance = klass()
+    result = instance.setUp()
+    if inspect.isawaitable(result):
+        asyncio.run(_await(result))
+    return spec.resolve(instance)
+
+
+def _replay(klass, spec, check, send_at=None):
+    """Send a literate test's request once.
+
+    Args:
+        klass: The LiterateRESTTest subclass.
+        spec: Its `LiterateSpec`, resolved after its setUp.
+        check: Whether to validate the response with the matcher.
+        send_at: If given, when the request was scheduled to be sent
+            (by `time.perf_counter`.)  Its latency is measured from
+            then, so the time it spent waiting behind earlier requests
+            is included.
+
+    Returns:
+        A tuple of the latency, whether the request failed, and
+        whether the response was checked and didn't match.
+
+    """
+    start = time.perf_counter()
+    if send_at is not None:
+        start = min(start, send_at)
+    try:
+        response = _send_request(klass, spec)
+        if inspect.isawaitable(response):
+            response = asyncio.run(_await(response))
+    except Exception:
+        return time.perf_counter() - start, True, False
+    latency = time.perf_counter() - start
+    if response.status_code != spec.expected_status:
+        return latency, True, False
+    if check:
+        try:
+            _check_response(_checker, klass, spec, response)
+        except Exception:
+            return latency, True, True
+    return latency, False, False
+
+
+def run_load(klasses, duration, concurrency=1, rate=None, sample=0.1,
+             seed=None):
+    """Replay literate tests as load.
+
+    Each class's `setUp` is run once, before the load starts.  The
+    classes' requests are then sent in turn, until the duration is up.
+
+    Args:
+        klasses: The LiterateRESTTest subclasses to replay (or a module
+            holding them.)
+        duration: How long to send requests for, in seconds.
+        concurrency: The number of requests to have in flight at once.
+        rate: If given, the total number of requests to send per second.
+            Latencies are measured from when each request was due, so
+            if the server falls behind, the wait counts.  Otherwise,
+            each thread sends requests as fast as it can.
+        sample: The fraction of responses to validate with the matcher.
+            Responses which don't match are counted as errors.
+        seed: Seeds the sampling, for reproducible runs.
+
+    Returns:
+        A `LoadReport`.
+
+    """
+    if not isinstance(klasses, (list, tuple)):
+        klasses = list(_get_literate_classes(klasses).values())
+    specs = [_set_up(klass) for klass in klasses]
+    scenarios = itertools.cycle(list(zip(klasses, specs)))
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    sent = itertools.count()
+    results = []
+
+    def worker(index):
+        rng = random.Random(None if seed is None else seed + index)
+        stats = {klass: ClassStats(klass.__name__) for klass in klasses}
+        while True:
+            with lock:
+                klass, spec = next(scenarios)
+                count = next(sent)
+            if rate:
+                send_at = start + count / rate
+                if send_at >= deadline:
+                    break
+                delay = send_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif time.perf_counter() >= deadline:
+                break
+            else:
+                send_at = None
+            check = rng.random() < sample
+            latency, failed, mismatched = _replay(
+                klass,
+                spec,
+                check,
+                send_at,
+            )
+            klass_stats = stats[klass]
+            klass_stats.sampled += check
+            klass_stats.latencies.record(latency)
+            klass_stats.errors += failed
+            klass_stats.mismatches += mismatched
+        results.append(stats)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    merged = {klass: ClassStats(klass.__name__) for klass in klasses}
+    for stats in results:
+        for klass, klass_stats in stats.items():
+            merged[klass].merge(klass_stats)
+    return LoadReport(
+        {klass.__name__: stats for klass, stats in merged.items()},
+        elapsed,
+    )
+
+
+parser = argparse.ArgumentParser(
+    description='Replay literate integration tests as load.'
+)
+parser.add_argument(
+    'files',
+    nargs='+',
+    help='The files containing the tests to replay.',
+)
+parser.add_argument('--duration', type=float, default=10.0)
+parser.add_argument('--concurrency', type=int, default=1)
+parser.add_argument('--rate', type=float, default=None)
+parser.add_argument('--sample', type=float, default=0.1)
+parser.add_argument(
+    '--json',
+    action='store_true',
+    help='Print the report as JSON, rather than as a table.',
+)
+
+
+def main():
+    """Replay literate tests as load, and print the report.
+
+    Called as a script when setup.py is installed.
+
+    """
+    args = parser.parse_args()
+    klasses = []
+    for filename in args.files:
+        if filename.endswith('.py'):
+            module = import_module(filename.replace('/', '.')[:-3])
+            klasses.extend(_get_literate_classes(module).values())
+    report = run_load(
+        klasses,
+        args.duration,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        sample=args.sample,
+    )
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=4))
+    else:
+        print(report.format())
@@ -11,6 +11,21 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('files', nargs='+', type=str)
+        parser.add_argument(
+            '--cache',
+            type=str,
+            help='The path of a cache of rendered documentation.',
+        )
+        parser.add_argument(
+            '--import',
+            dest='static',
+            action='store_false',
+            help='Import every file, rather than reading its source.',
+        )
 
     def handle(self, *args, **options):
-        generate_documentation(options['files'])
+        generate_documentation(
+            options['files'],
+            options['static'],
+            options['cache'],
+        )
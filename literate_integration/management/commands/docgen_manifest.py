@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from ...manifest import EXTENSION, compile_manifest
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Compile literate tests into a manifest, for docgen and other '
+        'tools to read without importing them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', type=str)
+        parser.add_argument(
+            '--output',
+            required=True,
+            type=str,
+            help='The path of the manifest (ending in {}).'.format(
+                EXTENSION,
+            ),
+        )
+
+    def handle(self, *args, **options):
+        count = compile_manifest(options['files'], options['output'])
+        self.stdout.write(
+            'Wrote {} literate tests to {}'.format(count, options['output'])
+        )
@@ -0,0 +1,269 @@
+"""Compile literate tests into a manifest, to be read without importing them.
+
+Importing a module of literate tests can be slow (with Django, it loads
+the settings and every app.)  `compile_manifest` imports the modules
+once, and writes the `LiterateSpec` of each literate test, its content
+hash, and its rendered documentation into one file.  `Manifest` reads
+the file through `mmap`, and only decodes the entries which are used, so
+thousands of tests load in milliseconds:
+
+```
+literate-manifest integration_tests/*.py --output tests.litman
+docgen tests.litman > docs/endpoint_documentation.md
+```
+
+The file starts with a header (`_HEADER`): the magic string, the format
+version and the number of entries.  A fixed-size record (`_RECORD`)
+follows for each entry, giving the offsets and lengths of its key, spec
+and documentation (each UTF-8), and the digest of its spec.  The
+records are in the order the documentation is generated in.
+
+A spec's dynamic fields (see `spec`) can't be evaluated without running
+the test, so they are stored unresolved.  The documentation is rendered
+as `docgen` would, so it includes them.
+
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from importlib import import_module
+
+from .document import generate_rest_documentation
+from .registry import find_literate_tests
+from .spec import LiterateSpec, get_spec
+
+
+# The extension `docgen` recognizes manifests by.
+EXTENSION = '.litman'
+
+MAGIC = b'LITMAN\r\n'
+
+VERSION = 1
+
+# The magic string, the version and the number of entries.
+_HEADER = struct.Struct('<8sII')
+
+# The offsets and lengths of the key, the spec and the documentation,
+# and the digest of the spec.
+_RECORD = struct.Struct('<QIQIQI20s')
+
+
+class ManifestError(Exception):
+    pass
+
+
+def _encode_spec(spec):
+    return json.dumps(
+        spec.to_dict(),
+        sort_keys=True,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def write_manifest(path, klasses):
+    """Write a manifest of literate tests.
+
+    The file is replaced atomically, so readers never see half of it.
+
+    Args:
+        path: The path of the manifest.
+        klasses: The LiterateRESTTest subclasses, in the order their
+            documentation should be generated in.
+
+    """
+    entries = []
+    for klass in klasses:
+        spec = get_spec(klass)
+        encoded = _encode_spec(spec)
+        entries.append((
+            '{}.{}'.format(spec.module, spec.qualname).encode('utf-8'),
+            encoded,
+            generate_rest_documentation(klass).encode('utf-8'),
+            hashlib.sha1(encoded).digest(),
+        ))
+
+    offset = _HEADER.size + _RECORD.size * len(entries)
+    records = []
+    blobs = []
+    for key, encoded, documentation, digest in entries:
+        fields = []
+        for blob in (key, encoded, documentation):
+            fields.extend([offset, len(blob)])
+            blobs.append(blob)
+            offset += len(blob)
+        records.append(_RECORD.pack(*(fields + [digest])))
+
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'wb') as fout:
+        fout.write(_HEADER.pack(MAGIC, VERSION, len(entries)))
+        for record in records:
+            fout.write(record)
+        for blob in blobs:
+            fout.write(blob)
+    os.replace(temporary, path)
+
+
+def _import_files(files):
+    """Import the literate tests in the given python files."""
+    klasses = []
+    for filename in files:
+        if filename.endswith('.py'):
+            module = import_module(filename.replace('/', '.')[:-3])
+            klasses.extend(find_literate_tests(module).values())
+    return klasses
+
+
+def compile_manifest(files, path):
+    """Compile the literate tests in some python files into a manifest.
+
+    Args:
+        files: A list of filenames, as given to `docgen`.
+        path: The path of the manifest.
+
+    Returns:
+        The number of literate tests in the manifest.
+
+    """
+    klasses = _import_files(files)
+    write_manifest(path, klasses)
+    return len(klasses)
+
+
+class Manifest(object):
+    """A manifest of literate tests, read through `mmap`.
+
+    Entries are decoded when they are first read.  Close the manifest
+    (or use it as a context manager) to release the file.
+
+    Args:
+        path: The path of the manifest.
+
+    Raises:
+        ManifestError: If the file isn't a manifest of this version.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fin:
+            if os.fstat(fin.fileno()).st_size < _HEADER.size:
+                raise ManifestError('{} is not a manifest.'.format(path))
+            self._map = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ManifestError(
+                '{} is not a version {} manifest.'.format(path, VERSION)
+            )
+        if len(self._map) < _HEADER.size + _RECORD.size * self._count:
+            self.close()
+            raise ManifestError('{} is truncated.'.format(path))
+        self._index = None
+        self._specs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key):
+        return key in self._get_index()
+
+    def close(self):
+        self._map.close()
+
+    def _record(self, position):
+        return _RECORD.unpack_from(
+            self._map,
+            _HEADER.size + _RECORD.size * position,
+        )
+
+    def _read(self, offset, length):
+        return self._map[offset:offset + length].decode('utf-8')
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = {
+                self._read(*self._record(position)[:2]): position
+                for position in range(self._count)
+            }
+        return self._index
+
+    def _position(self, key):
+        try:
+            return self._get_index()[key]
+        except KeyError:
+            raise KeyError('No literate test {!r} in {}'.format(
+                key,
+                self.path,
+            ))
+
+    def keys(self):
+        """Get the keys ('module.qualname') of the entries, in order."""
+        return [
+            self._read(*self._record(position)[:2])
+            for position in range(self._count)
+        ]
+
+    def get_spec(self, key):
+        """Get the `LiterateSpec` of a literate test."""
+        spec = self._specs.get(key)
+        if spec is None:
+            record = self._record(self._position(key))
+            spec = self._specs[key] = LiterateSpec.from_dict(
+                json.loads(self._read(*record[2:4]))
+            )
+        return spec
+
+    def get_digest(self, key):
+        """Get the content hash of a literate test's spec, as hex."""
+        return self._record(self._position(key))[6].hex()
+
+    def get_documentation(self, key):
+        """Get the rendered documentation of a literate test."""
+        return self._read(*self._record(self._position(key))[4:6])
+
+    def documentations(self):
+        """Get the rendered documentation of every entry, in order."""
+        return [
+            self._read(*self._record(position)[4:6])
+            for position in range(self._count)
+        ]
+
+
+parser = argparse.ArgumentParser(
+    description='Compile literate integration tests into a manifest.'
+)
+parser.add_argument(
+    'files',
+    nargs='+',
+    help='The files containing the tests to compile.',
+)
+parser.add_argument(
+    '--output',
+    required=True,
+    help='The path of the manifest (conventionally, ending in {}).'.format(
+        EXTENSION,
+    ),
+)
+
+
+def main():
+    """Compile a manifest.
+
+    Called as a script when setup.py is installed.
+
+    """
+    args = parser.parse_args()
+    count = compile_manifest(args.files, args.output)
+    print('Wrote {} literate tests to {}'.format(count, args.output))
@@ -1,101 +1,1012 @@
 """Define a matcher for tests."""
-from collections import deque
+from collections import namedtuple
+import hashlib
+import json
+import multiprocessing
+import re
+import reprlib
 
 
-# A global context store.  This will track the context of
-# the matcher during its runtime.
-_context = deque()
+# Used to show the offending value in failure messages, without
+# rendering the whole (possibly huge) response.
+_preview = reprlib.Repr()
+_preview.maxlevel = 3
+_preview.maxdict = 5
+_preview.maxlist = 5
+_preview.maxstring = 60
+_preview.maxother = 60
 
+# Lists shorter than this are scanned directly, since indexing
+# them would cost more than it saves.
+_INDEX_THRESHOLD = 8
 
-def _add_context(context):
-    global _context
-    _context.append(context)
 
+class _Sentinel(object):
+    """A unique marker, which is still the same object once unpickled.
 
-def _remove_context():
-    global _context
-    _context.pop()
+    Matchers are pickled to send them to `match_batch`'s processes.
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+    def __reduce__(self):
+        # Unpickled as the module's attribute of this name.
+        return self.name
+
+
+# Index key used for list elements which are terminals themselves.
+_SELF = _Sentinel('_SELF')
+
+# Matchers nested deeper than this are run by the iterative engine,
+# so that deeply nested values don't hit the recursion limit.
+_MAX_RECURSION_DEPTH = 100
+
+# How the elements of an expected list are matched.  In ANY mode, each
+# expected element must match some actual element.  In UNIQUE mode,
+# each must match a different actual element.  In ORDERED mode, they
+# must match different elements, in the same order.
+ANY = 'any'
+UNIQUE = 'unique'
+ORDERED = 'ordered'
+LIST_MODES = (ANY, UNIQUE, ORDERED)
+
+
+def _render_path(path):
+    """Render a path of keys and indices as a JSON pointer.
+
+    Args:
+        path: A list of dictionary keys and list indices.
+
+    Returns:
+        The JSON pointer (RFC 6901) for the path.
+
+    """
+    return ''.join(
+        '/' + str(segment).replace('~', '~0').replace('/', '~1')
+        for segment in path
+    )
+
+
+def _format_failure(path, message):
+    """Render a failure's path, and prefix the message with it.
+
+    Args:
+        path: A list of keys and indices.
+        message: The message describing the failure.
+
+    Returns:
+        A tuple of the JSON pointer and the full message.
+
+    """
+    path = _render_path(path)
+    if path:
+        message = 'At {}: {}'.format(path, message)
+    return path, message
 
 
-def _get_context():
-    global _context
-    return _context
+def _explain(matcher, value):
+    """Find out why a value didn't match.
 
+    This is only called once a match has failed, so that the
+    matchers don't have to track any context while they succeed.
+    It descends to the innermost failing part of the value.
 
-def _reset_context():
-    global _context
-    _context = deque()
+    All of the state lives in this call, so values can be matched
+    concurrently from different threads or tasks.
+
+    Args:
+        matcher: A matcher node which didn't match the value.
+        value: The value which didn't match.
+
+    Returns:
+        A tuple of the path (a list of keys and indices) to the
+        failing part of the value, and a message describing the
+        failure.
+
+    """
+    path = []
+    while True:
+        failure = matcher.failure(value)
+        if isinstance(failure, str):
+            return path, failure
+        segment, matcher, value = failure
+        path.append(segment)
+
+
+# The types of terminal values.  Looking a value's type up here is
+# much cheaper than a chain of `isinstance` calls.
+_TERMINAL_TYPES = frozenset((str, int, float, bool, type(None)))
 
 
 def is_terminal(value):
-    return (isinstance(value, float)
-            or isinstance(value, int)
-            or isinstance(value, bool)
-            or isinstance(value, str)
-            or value is None
+    return (type(value) in _TERMINAL_TYPES
+            # Subclasses, such as enumerations of integers.
+            or isinstance(value, (str, int, float)))
+
+
+# The kinds of the items `_encode_json` visits.
+_VALUE = 'value'
+_TEXT = 'text'
+_EXIT = 'exit'
+
+
+def _encode_key(key):
+    """Encode a dictionary key, as `json.dumps` would."""
+    if isinstance(key, str):
+        return json.dumps(key)
+    if isinstance(key, (int, float)) or key is None:
+        # Numbers, booleans and None become strings.
+        return json.dumps(json.dumps(key))
+    raise TypeError(
+        'keys must be str, int, float, bool or None, not {}'.format(
+            key.__class__.__name__,
+        )
+    )
+
+
+def _encode_json(value):
+    """Encode a value as `content_hash` hashes it.
+
+    This gives the same text as `json.dumps` with sorted keys, compact
+    separators, and `repr` for unknown types, but walks the value with
+    an explicit stack, so it can be nested arbitrarily deeply.
+
+    Args:
+        value: The value to encode.
+
+    Returns:
+        The encoded value, as a string.
+
+    Raises:
+        ValueError: If the value contains itself.
+        TypeError: If a dictionary has keys of an unsupported type.
+
+    """
+    parts = []
+    # The ids of the containers being encoded, to detect cycles.
+    active = set()
+    pending = [(_VALUE, value)]
+    while pending:
+        kind, item = pending.pop()
+        if kind is _TEXT:
+            parts.append(item)
+            continue
+        if kind is _EXIT:
+            active.discard(item)
+            continue
+        if isinstance(item, (str, int, float)) or item is None:
+            parts.append(json.dumps(item))
+            continue
+        if isinstance(item, (list, tuple)):
+            opening, closing = '[', ']'
+            children = [[(_VALUE, child)] for child in item]
+        elif isinstance(item, dict):
+            opening, closing = '{', '}'
+            children = [
+                [(_TEXT, _encode_key(key) + ':'), (_VALUE, child)]
+                for key, child in sorted(item.items())
+            ]
+        else:
+            parts.append(json.dumps(repr(item)))
+            continue
+        if id(item) in active:
+            raise ValueError('Circular reference detected')
+        active.add(id(item))
+        queued = [(_TEXT, opening)]
+        for index, child in enumerate(children):
+            if index:
+                queued.append((_TEXT, ','))
+            queued.extend(child)
+        queued.extend([(_TEXT, closing), (_EXIT, id(item))])
+        pending.extend(reversed(queued))
+    return ''.join(parts)
+
+
+def content_hash(value):
+    """Get a stable hash of a JSON-like value.
+
+    Dictionaries are hashed independently of their key order, so
+    two equal expected values always produce the same hash.  The value
+    may be nested arbitrarily deeply.
+
+    Args:
+        value: The value to hash.
+
+    Returns:
+        A hex digest of the value's content.
+
+    """
+    encoded = _encode_json(value)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def _compile(value, list_mode=ANY):
+    """Compile a value into the matcher node which checks it.
+
+    The value is walked with an explicit stack, so it can be nested
+    arbitrarily deeply.
+
+    Args:
+        value: A terminal or composite value to match against.
+        list_mode: The mode used for lists in the value, unless
+            a subtree is wrapped in a marker (such as `Unique`.)
+
+    Returns:
+        A matcher node.  Nodes hold their children in tuples, so
+        a compiled node can be reused any number of times.
+
+    """
+    compiled = []
+    # Composite values are visited twice: once to queue their
+    # children, and once (when ready) to collect the compiled children.
+    pending = [(value, list_mode, False)]
+    while pending:
+        value, mode, ready = pending.pop()
+        kind = type(value)
+        if kind in _TERMINAL_TYPES:
+            compiled.append(_TerminalMatcher(value))
+            continue
+        elif kind is list:
+            children = value
+        elif kind is dict:
+            children = list(value.values())
+        elif isinstance(value, Expectation):
+            mode = value._mode(mode)
+            children = value._children()
+        elif is_terminal(value):
+            compiled.append(_TerminalMatcher(value))
+            continue
+        elif isinstance(value, (list, dict)):
+            children = value if isinstance(value, list) else value.values()
+            children = list(children)
+        else:
+            raise Exception('Unsupported comparision type {}:{}'.format(
+                value,
+                value.__class__.__name__
+            ))
+        if not ready:
+            pending.append((value, mode, True))
+            pending.extend(
+                (child, mode, False) for child in reversed(children)
             )
+            continue
+        start = len(compiled) - len(children)
+        nodes = compiled[start:]
+        del compiled[start:]
+        if isinstance(value, Expectation):
+            compiled.append(value._build(nodes, mode))
+        elif isinstance(value, list):
+            compiled.append(_ListMatcher(nodes, mode))
+        else:
+            compiled.append(_DictMatcher(zip(value.keys(), nodes)))
+    return compiled[0]
+
+
+def _match(matcher, value):
+    """Match a value, choosing the engine by the matcher's depth.
+
+    Args:
+        matcher: A matcher node.
+        value: The value to match.
+
+    Returns:
+        True if the value matches.
+
+    """
+    if matcher.depth > _MAX_RECURSION_DEPTH:
+        return _match_iteratively(matcher, value)
+    return matcher.matches(value)
+
+
+def _match_iteratively(matcher, value, max_depth=_MAX_RECURSION_DEPTH):
+    """Match a value using an explicit stack rather than recursion.
+
+    Each composite matcher node has a `steps` generator, with the same
+    semantics as its `matches` method.  Rather than calling its
+    children, it yields them (with the value they should match), and is
+    sent back whether they matched.  The generators are kept on a stack
+    here, so the depth of the value is only limited by memory.
+
+    Args:
+        matcher: A matcher node.
+        value: The value to match.
+        max_depth: Children no deeper than this are matched by calling
+            their `matches` method directly, which is faster.  If 0,
+            only terminals are.
+
+    Returns:
+        True if the value matches.
+
+    """
+    if matcher.depth <= max_depth:
+        return matcher.matches(value)
+    stack = [matcher.steps(value)]
+    result = None
+    while stack:
+        try:
+            child, child_value = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+        if child.depth <= max_depth:
+            result = child.matches(child_value)
+        else:
+            stack.append(child.steps(child_value))
+            result = None
+    return result
+
+
+class Expectation(object):
+    """Something other than a literal value in an expected value.
+
+    Subclasses are compiled into their own matcher nodes.  They may
+    have children (expected values of their own), which are compiled
+    first, and passed to `_build`.
+
+    """
+
+    __slots__ = ()
+
+    def _mode(self, mode):
+        """Get the list mode for this expectation and its children."""
+        return mode
+
+    def _children(self):
+        """Get the expected values nested in this expectation."""
+        return []
+
+    def _build(self, nodes, mode):
+        """Build the matcher node, given the compiled children."""
+        raise NotImplementedError()
+
+
+class _ListMode(Expectation):
+    """Marks a list in the expected value as using a given mode.
+
+    The mode applies to the list, and to every list nested inside
+    of it which isn't marked itself.
+
+    """
+
+    __slots__ = ('values',)
+
+    mode = None
+
+    def __init__(self, values):
+        assert(isinstance(values, list))
+        self.values = values
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.values)
+
+    def _mode(self, mode):
+        return self.mode
+
+    def _children(self):
+        return self.values
+
+    def _build(self, nodes, mode):
+        return _ListMatcher(nodes, self.mode)
+
+
+class Unique(_ListMode):
+    """Match each expected element with a different actual element.
+
+    For example, `Unique([{'name': 'A'}, {'name': 'A'}])` only matches
+    lists holding at least two elements named "A".
+
+    """
+
+    __slots__ = ()
+
+    mode = UNIQUE
+
+
+class Ordered(_ListMode):
+    """Match the expected elements in order.
+
+    The expected elements must appear in the actual list as a
+    subsequence.  For example, `Ordered([1, 3])` matches `[1, 2, 3]`
+    but not `[3, 2, 1]`.
+
+    """
+
+    __slots__ = ()
+
+    mode = ORDERED
+
+
+class OfType(Expectation):
+    """Match values of the given JSON types.
+
+    Types are compared exactly, so `OfType(int)` doesn't match `True`,
+    and `OfType(float)` doesn't match `3`.  Use `OfType(int, float)`
+    to match any number.
+
+    """
+
+    __slots__ = ('types',)
+
+    def __init__(self, *types):
+        assert(types)
+        self.types = types
+
+    def __repr__(self):
+        return 'OfType({})'.format(
+            ', '.join(kind.__name__ for kind in self.types)
+        )
+
+    def _build(self, nodes, mode):
+        return _TypeMatcher(self.types)
+
+
+class Regex(Expectation):
+    """Match strings containing a match for the regular expression.
+
+    As with `re.search`, the pattern may match anywhere in the
+    string, unless it is anchored.  For example,
+    `Regex(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}T')` matches ISO 8601 datetimes.
+
+    """
+
+    __slots__ = ('pattern', 'flags')
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __repr__(self):
+        return 'Regex({!r}, {!r})'.format(self.pattern, self.flags)
+
+    def _build(self, nodes, mode):
+        return _RegexMatcher(re.compile(self.pattern, self.flags))
+
+
+class InRange(Expectation):
+    """Match numbers within the (inclusive) bounds.
+
+    Either bound may be left out.
+
+    """
+
+    __slots__ = ('minimum', 'maximum')
+
+    def __init__(self, minimum=None, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __repr__(self):
+        return 'InRange({!r}, {!r})'.format(self.minimum, self.maximum)
+
+    def _build(self, nodes, mode):
+        return _RangeMatcher(self.minimum, self.maximum)
+
+
+class Each(Expectation):
+    """Match lists whose elements all match the expected value.
+
+    For example, `Each({'id': OfType(int)})` matches lists of objects
+    which all have an integer id.
+
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return 'Each({!r})'.format(self.value)
+
+    def _children(self):
+        return [self.value]
+
+    def _build(self, nodes, mode):
+        return _EachMatcher(nodes[0])
 
 
 class _TerminalMatcher(object):
     """Matches a terminal value."""
 
+    __slots__ = ('original',)
+
+    depth = 0
+
     def __init__(self, value):
         assert(is_terminal(value))
         self.original = value
 
     def matches(self, value):
-        if not self.original == value:
-            _add_context(
-                'Expected {} but received {}'.format(self.original, value)
-            )
+        return self.original == value
+
+    def failure(self, value):
+        return 'Expected {!r} but received {}'.format(
+            self.original,
+            _preview.repr(value),
+        )
+
+
+class _TypeMatcher(object):
+    """Matches values of any of the given types."""
+
+    __slots__ = ('types',)
+
+    depth = 0
+
+    def __init__(self, types):
+        self.types = frozenset(types)
+
+    def matches(self, value):
+        return type(value) in self.types
+
+    def failure(self, value):
+        return 'Expected {} but received {}'.format(
+            ' or '.join(sorted(kind.__name__ for kind in self.types)),
+            _preview.repr(value),
+        )
+
+
+class _RegexMatcher(object):
+    """Matches strings containing a match for a compiled pattern."""
+
+    __slots__ = ('pattern',)
+
+    depth = 0
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def matches(self, value):
+        return (isinstance(value, str)
+                and self.pattern.search(value) is not None)
+
+    def failure(self, value):
+        return 'Expected a string matching {!r} but received {}'.format(
+            self.pattern.pattern,
+            _preview.repr(value),
+        )
+
+
+class _RangeMatcher(object):
+    """Matches numbers within inclusive bounds."""
+
+    __slots__ = ('minimum', 'maximum')
+
+    depth = 0
+
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def matches(self, value):
+        return (type(value) in (int, float)
+                and (self.minimum is None or self.minimum <= value)
+                and (self.maximum is None or value <= self.maximum))
+
+    def failure(self, value):
+        return 'Expected a number in [{}, {}] but received {}'.format(
+            '-inf' if self.minimum is None else self.minimum,
+            'inf' if self.maximum is None else self.maximum,
+            _preview.repr(value),
+        )
+
+
+class _EachMatcher(object):
+    """Matches lists whose elements all match a node."""
+
+    __slots__ = ('matcher', 'depth')
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.depth = 1 + matcher.depth
+
+    def matches(self, values):
+        if not isinstance(values, list):
+            return False
+        matcher = self.matcher
+        if isinstance(matcher, _TypeMatcher):
+            # Checked in a single pass in C.
+            return matcher.types.issuperset(map(type, values))
+        if matcher.depth > _MAX_RECURSION_DEPTH:
+            return all(_match(matcher, value) for value in values)
+        return all(map(matcher.matches, values))
+
+    def steps(self, values):
+        """Match the values, yielding children to the engine.
+
+        See `_match_iteratively`.
+
+        """
+        if not isinstance(values, list):
             return False
+        for value in values:
+            if not (yield self.matcher, value):
+                return False
         return True
 
+    def failure(self, values):
+        """Describe why the values didn't match.
+
+        Should only be called with values which don't match.
+
+        Returns:
+            A message, or a tuple of the index, matcher node and value
+            to descend into.
+
+        """
+        if not isinstance(values, list):
+            return 'Expected list but received {}'.format(
+                _preview.repr(values),
+            )
+        for i, value in enumerate(values):
+            if not _match(self.matcher, value):
+                return i, self.matcher, value
+
+
+def _index_key(matcher):
+    """Get the key an expected list element can be looked up by.
+
+    Terminals are looked up by their own value.  Dictionaries are
+    looked up by the values of their terminal-valued keys.
+
+    Args:
+        matcher: The matcher node for an expected list element.
+
+    Returns:
+        A pair, (keys, probe), where keys identifies the index to
+        build and probe is the value to look up in it.  None, if
+        the element can't be indexed.
+
+    """
+    if isinstance(matcher, _TerminalMatcher):
+        return _SELF, matcher.original
+    if isinstance(matcher, _DictMatcher):
+        terminals = sorted((
+            (key, child.original) for key, child in matcher.matchers
+            if isinstance(child, _TerminalMatcher)
+        ), key=lambda item: str(item[0]))
+        if terminals:
+            keys, probe = zip(*terminals)
+            return keys, probe
+    return None
+
+
+def _build_index(keys, values):
+    """Index the positions of actual list elements.
+
+    Elements which can't possibly match (because they are missing
+    one of the keys, or because the value is unhashable and so can't
+    equal a terminal) are left out of the index.
+
+    Args:
+        keys: The keys from `_index_key`.
+        values: The actual list.
+
+    Returns:
+        A dictionary from probe values to lists of positions.
+
+    """
+    index = {}
+    for position, value in enumerate(values):
+        if keys is _SELF:
+            probe = value
+        elif isinstance(value, dict):
+            try:
+                probe = tuple(value[key] for key in keys)
+            except KeyError:
+                continue
+        else:
+            continue
+        try:
+            index.setdefault(probe, []).append(position)
+        except TypeError:
+            continue
+    return index
+
+
+def _maximum_matching(adjacency, right_size):
+    """Find the size of a maximum bipartite matching.
+
+    Uses the Hopcroft-Karp algorithm.  The augmenting paths are
+    searched with an explicit stack, so long lists don't run into the
+    recursion limit.
+
+    Args:
+        adjacency: For each left vertex, a list of the right vertices
+            it may be matched with.
+        right_size: The number of right vertices.
+
+    Returns:
+        The number of left vertices in a maximum matching.
+
+    """
+    unmatched = -1
+    infinity = len(adjacency) + 1
+    match_left = [unmatched] * len(adjacency)
+    match_right = [unmatched] * right_size
+    size = 0
+    while True:
+        # Layer the left vertices by their distance from a free one.
+        distance = [infinity] * len(adjacency)
+        queue = []
+        for left, right in enumerate(match_left):
+            if right == unmatched:
+                distance[left] = 0
+                queue.append(left)
+        found = False
+        for left in queue:
+            for right in adjacency[left]:
+                other = match_right[right]
+                if other == unmatched:
+                    found = True
+                elif distance[other] == infinity:
+                    distance[other] = distance[left] + 1
+                    queue.append(other)
+        if not found:
+            return size
+
+        # Augment along vertex-disjoint shortest paths.
+        edge = [0] * len(adjacency)
+        for root in range(len(adjacency)):
+            if match_left[root] != unmatched:
+                continue
+            stack = [root]
+            while stack:
+                left = stack[-1]
+                edges = adjacency[left]
+                if edge[left] == len(edges):
+                    distance[left] = infinity
+                    stack.pop()
+                    if stack:
+                        edge[stack[-1]] += 1
+                    continue
+                right = edges[edge[left]]
+                other = match_right[right]
+                if other == unmatched:
+                    for left in stack:
+                        right = adjacency[left][edge[left]]
+                        match_left[left] = right
+                        match_right[right] = left
+                    size += 1
+                    break
+                if distance[other] == distance[left] + 1:
+                    stack.append(other)
+                else:
+                    edge[left] += 1
+
 
 class _ListMatcher(object):
-    """Matches a list value."""
+    """Matches a list value.
 
-    def __init__(self, values):
-        assert(isinstance(values, list))
-        self.matchers = map(Matcher, values)
+    Each expected element must match some element of the actual
+    list (in UNIQUE mode, a different element for each, and in ORDERED
+    mode, different elements in the same order.)  Expected
+    elements which are terminals, or dictionaries with terminal values,
+    are looked up in an index of the actual list rather than compared
+    against every element.
+
+    """
+
+    __slots__ = ('matchers', 'index_keys', 'mode', 'depth')
+
+    def __init__(self, matchers, mode=ANY):
+        assert(mode in LIST_MODES)
+        self.matchers = tuple(matchers)
+        self.index_keys = tuple(map(_index_key, self.matchers))
+        self.mode = mode
+        self.depth = 1 + max(
+            (matcher.depth for matcher in self.matchers),
+            default=0,
+        )
+
+    def _candidates(self, values):
+        """Get the positions worth checking for each expected element.
+
+        Args:
+            values: The actual list.
+
+        Yields:
+            Pairs of the matcher for an expected element, and the
+            positions in the actual list which could match it.
+
+        """
+        indexes = {}
+        everything = range(len(values))
+        use_index = len(values) >= _INDEX_THRESHOLD
+        for matcher, index_key in zip(self.matchers, self.index_keys):
+            if index_key is None or not use_index:
+                yield matcher, everything
+                continue
+            keys, probe = index_key
+            index = indexes.get(keys)
+            if index is None:
+                index = indexes[keys] = _build_index(keys, values)
+            yield matcher, index.get(probe, ())
 
     def matches(self, values):
-        _add_context('In list')
         if not isinstance(values, list):
-            _add_context(
-                'Expected List but got {}'.format(values)
-            )
             return False
-        for matcher in self.matchers:
-            if not any([matcher.matches(value) for value in values]):
+        if self.mode == UNIQUE:
+            return self._unique_failure(values) is None
+        elif self.mode == ORDERED:
+            return self._ordered_failure(values) is None
+        return self._any_failure(values) is None
+
+    def steps(self, values):
+        """Match the values, yielding children to the engine.
+
+        See `_match_iteratively`.
+
+        """
+        if not isinstance(values, list):
+            return False
+        if self.mode == UNIQUE:
+            if len(self.matchers) > len(values):
+                return False
+            adjacency = []
+            for matcher, positions in self._candidates(values):
+                compatible = []
+                for j in positions:
+                    if (yield matcher, values[j]):
+                        compatible.append(j)
+                if not compatible:
+                    return False
+                adjacency.append(compatible)
+            matched = _maximum_matching(adjacency, len(values))
+            return matched == len(self.matchers)
+        elif self.mode == ORDERED:
+            position = 0
+            for matcher in self.matchers:
+                while position < len(values):
+                    position += 1
+                    if (yield matcher, values[position - 1]):
+                        break
+                else:
+                    return False
+            return True
+        for matcher, positions in self._candidates(values):
+            for j in positions:
+                if (yield matcher, values[j]):
+                    break
+            else:
                 return False
-        _remove_context()
         return True
 
+    def failure(self, values):
+        """Describe why the values didn't match.
+
+        Should only be called with values which don't match.
+
+        Returns:
+            A message, or a tuple of the index, matcher node and value
+            to descend into.
+
+        """
+        if not isinstance(values, list):
+            return 'Expected list but received {}'.format(
+                _preview.repr(values),
+            )
+        if self.mode == UNIQUE:
+            return self._unique_failure(values)
+        elif self.mode == ORDERED:
+            return self._ordered_failure(values)
+        return self._any_failure(values, explain=True)
+
+    def _any_failure(self, values, explain=False):
+        last = len(self.matchers) - 1
+        for i, (matcher, positions) in enumerate(self._candidates(values)):
+            # When explaining, the values are known not to match.  So
+            # if every other item matched, this one needn't be checked.
+            known = explain and i == last
+            if known or not any(_match(matcher, values[j]) for j in positions):
+                # With a single candidate, the mismatch inside of
+                # it is more useful than the mismatch here.
+                if explain and len(positions) == 1:
+                    j = positions[0]
+                    return j, matcher, values[j]
+                return 'No element matched expected item {}'.format(i)
+        return None
+
+    def _unique_failure(self, values):
+        if len(self.matchers) > len(values):
+            return 'Expected at least {} elements but received {}'.format(
+                len(self.matchers),
+                len(values),
+            )
+        # The compatibility table: the actual elements each
+        # expected element matches.
+        adjacency = []
+        for i, (matcher, positions) in enumerate(self._candidates(values)):
+            compatible = [j for j in positions if _match(matcher, values[j])]
+            if not compatible:
+                return 'No element matched expected item {}'.format(i)
+            adjacency.append(compatible)
+        matched = _maximum_matching(adjacency, len(values))
+        if matched < len(self.matchers):
+            return 'Only {} of {} items matched distinct elements'.format(
+                matched,
+                len(self.matchers),
+            )
+        return None
+
+    def _ordered_failure(self, values):
+        # Matching each expected element with the earliest actual
+        # element that fits is optimal, so one pass is enough.
+        position = 0
+        for i, matcher in enumerate(self.matchers):
+            while position < len(values):
+                position += 1
+                if _match(matcher, values[position - 1]):
+                    break
+            else:
+                return 'No element matched expected item {} in order'.format(
+                    i,
+                )
+        return None
+
 
 class _DictMatcher(object):
     """Matches a dictionary value."""
 
-    def __init__(self, values):
-        assert(isinstance(values, dict))
-        self.matchers = {
-            key: Matcher(value) for key, value in values.items()
-        }
+    __slots__ = ('matchers', 'depth')
+
+    def __init__(self, matchers):
+        self.matchers = tuple(matchers)
+        self.depth = 1 + max(
+            (matcher.depth for _, matcher in self.matchers),
+            default=0,
+        )
 
     def matches(self, value):
-        _add_context('In dict')
         if not isinstance(value, dict):
             return False
-        for key, matcher in self.matchers.items():
-            _add_context('For key {}'.format(key))
-            if key not in value:
-                _add_context('Key was not present')
+        for key, matcher in self.matchers:
+            if key not in value or not matcher.matches(value[key]):
                 return False
-            if not matcher.matches(value[key]):
+        return True
+
+    def steps(self, value):
+        """Match the value, yielding children to the engine.
+
+        See `_match_iteratively`.
+
+        """
+        if not isinstance(value, dict):
+            return False
+        for key, matcher in self.matchers:
+            if key not in value or not (yield matcher, value[key]):
                 return False
-        _remove_context()
         return True
 
+    def failure(self, value):
+        """Describe why the value didn't match.
+
+        Should only be called with a value which doesn't match.
+
+        Returns:
+            A message, or a tuple of the key, matcher node and value
+            to descend into.
+
+        """
+        if not isinstance(value, dict):
+            return 'Expected dict but received {}'.format(
+                _preview.repr(value),
+            )
+        last = len(self.matchers) - 1
+        for i, (key, matcher) in enumerate(self.matchers):
+            if key not in value:
+                return 'Key {!r} was not present'.format(key)
+            # The value is known not to match, so if every other key
+            # matched, this one needn't be checked.
+            if i == last or not _match(matcher, value[key]):
+                return key, matcher, value[key]
+
 
 class Matcher(object):
     """Tells if response objects match.
@@ -105,46 +1016,220 @@ class Matcher(object):
     (lists, dictionaries.)
 
     Terminal values much match exactly.  Composite values must have
-    at least one instance which satisfies the matcher.
+    at least one instance which satisfies the matcher.  Parts of the
+    value can also be described by an `Expectation`, such as
+    `OfType(int)`, `Regex(...)`, `InRange(0, 10)` or `Each(...)`.
+
+    The value is compiled once, when the matcher is created, and
+    the matcher can then be used against any number of responses.
 
     """
 
-    def __init__(self, value):
+    __slots__ = ('matcher',)
+
+    def __init__(self, value, list_mode=ANY):
         """Create a new matcher instance.
 
         Args:
             value: The value we would like to match against.
                 This can be a terminal value or composite value.
+            list_mode: How lists in the value are matched, one of
+                `LIST_MODES`.  Parts of the value can be given their
+                own mode by wrapping them in a marker, such as `Unique`.
 
         """
-        if is_terminal(value):
-            self.matcher = _TerminalMatcher(value)
-        elif isinstance(value, list):
-            self.matcher = _ListMatcher(value)
-        elif isinstance(value, dict):
-            self.matcher = _DictMatcher(value)
-        else:
-            raise Exception('Unsupported comparision type {}:{}'.format(
-                value,
-                value.__class__.__name__
-            ))
+        if list_mode not in LIST_MODES:
+            raise Exception('Unsupported list mode {}'.format(list_mode))
+        self.matcher = _compile(value, list_mode)
 
     def matches(self, value):
-        """Return true if this value matches the original."""
-        return self.matcher.matches(value)
+        """Return true if this value matches the original.
+
+        Shallow matchers recurse through their children, which is
+        fastest.  Matchers nested more deeply than the recursion limit
+        allows are run on an explicit stack instead.
+
+        """
+        return _match(self.matcher, value)
+
+    def check(self, value, index=0):
+        """Match a value, describing the failure if it doesn't match.
+
+        Args:
+            value: The value to match.  Raw JSON bodies (bytes) are
+                matched as streams (see `streaming.match_stream`.)
+            index: The index to report in the result.
+
+        Returns:
+            A `MatchResult`.
+
+        """
+        if isinstance(value, (bytes, bytearray)):
+            # The streaming module depends on this one.
+            from .streaming import _run
+            matched, stream = _run(self, value)
+            if matched:
+                return MatchResult(index, True, '', '')
+            path, message = _format_failure(
+                reversed(stream.path),
+                stream.message,
+            )
+        elif _match(self.matcher, value):
+            return MatchResult(index, True, '', '')
+        else:
+            path, message = _format_failure(*_explain(self.matcher, value))
+        return MatchResult(index, False, path, message)
+
+    def match_batch(self, payloads, processes=None, chunksize=64):
+        """Match many values against this matcher.
+
+        Args:
+            payloads: An iterable of values (or raw JSON bodies) to
+                match.
+            processes: If more than 1, the payloads are split into
+                chunks and matched by a pool of this many processes.
+                The payloads have to be sent to the processes, so this
+                is only worthwhile when matching them (or, for raw
+                bodies, decoding them) is the expensive part.
+            chunksize: The number of payloads sent to a process at once.
+
+        Returns:
+            A list with a `MatchResult` for each payload, in order.
+
+        """
+        if not processes or processes < 2:
+            return [
+                self.check(payload, index)
+                for index, payload in enumerate(payloads)
+            ]
+        pool = multiprocessing.Pool(
+            processes,
+            initializer=_start_worker,
+            initargs=(self,),
+        )
+        try:
+            chunks = pool.imap(_check_chunk, _chunked(payloads, chunksize))
+            return [result for chunk in chunks for result in chunk]
+        finally:
+            pool.terminate()
+
+
+# The outcome of matching one of a batch of values.  `path` and
+# `message` are empty if the value matched.
+MatchResult = namedtuple(
+    'MatchResult',
+    ['index', 'matched', 'path', 'message'],
+)
+
+# The matcher used by a process in `Matcher.match_batch`'s pool.
+_worker_matcher = None
+
+
+def _start_worker(matcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+
+
+def _check_chunk(chunk):
+    start, payloads = chunk
+    return [
+        _worker_matcher.check(payload, start + i)
+        for i, payload in enumerate(payloads)
+    ]
+
+
+def _chunked(payloads, size):
+    """Split payloads into lists of the given size.
+
+    Yields:
+        Tuples of the index of the first payload and the list.
+
+    """
+    chunk = []
+    start = 0
+    for payload in payloads:
+        chunk.append(payload)
+        if len(chunk) == size:
+            yield start, chunk
+            start += size
+            chunk = []
+    if chunk:
+        yield start, chunk
 
 
 # Below is defined a convenience method for passing on the context
 # for a single call.  That context is passed through an exception.
+# It holds no state between calls, so it is safe to call from
+# multiple threads (or from within another assertion.)
 
 class MatcherException(Exception):
 
-    def __init__(self, message=''):
+    def __init__(self, message='', path=''):
+        super().__init__(message)
         self.message = message
+        self.path = path
 
 
 def assertMatches(expected, actual):
-    """Run the given check, raising an exception if it fails."""
-    _reset_context()
-    if not Matcher(expected).matches(actual):
-        raise MatcherException(': '.join(_get_context()))
+    """Run the given check, raising an exception if it fails.
+
+    Args:
+        expected: The expected value, or an already compiled
+            `Matcher` for it.
+        actual: The value to check.
+
+    Raises:
+        MatcherException: If the actual value doesn't match.
+
+    """
+    if not isinstance(expected, Matcher):
+        expected = Matcher(expected)
+    if not expected.matches(actual):
+        path, message = _format_failure(*_explain(expected.matcher, actual))
+        raise MatcherException(message, path)
+
+
+# The number of failures listed in the message of `assertMatchesMany`.
+_MAX_REPORTED_FAILURES = 10
+
+
+def assertMatchesMany(expected, actuals, processes=None):
+    """Check many values, raising an exception if any fail.
+
+    The expected value is compiled once, and matched against each of
+    the actual values.  See `Matcher.match_batch`.
+
+    Args:
+        expected: The expected value, or an already compiled
+            `Matcher` for it.
+        actuals: An iterable of values (or raw JSON bodies) to check.
+        processes: The number of processes to match them with.
+
+    Returns:
+        The list of `MatchResult`s, if they all matched.
+
+    Raises:
+        MatcherException: If any of the values don't match.  Its
+            `results` attribute holds the `MatchResult`s of all of the
+            values, and its `path` is the path of the first failure.
+
+    """
+    if not isinstance(expected, Matcher):
+        expected = Matcher(expected)
+    results = expected.match_batch(actuals, processes=processes)
+    failures = [result for result in results if not result.matched]
+    if failures:
+        lines = ['{} of {} values did not match:'.format(
+            len(failures),
+            len(results),
+        )]
+        lines.extend(
+            '  [{}] {}'.format(failure.index, failure.message)
+            for failure in failures[:_MAX_REPORTED_FAILURES]
+        )
+        if len(failures) > _MAX_REPORTED_FAILURES:
+            lines.append('  ...')
+        exception = MatcherException('\n'.join(lines), failures[0].path)
+        exception.results = results
+        raise exception
+    return results
@@ -2,6 +2,9 @@
 
 import abc
 
+from . import registry
+from .matcher import ANY
+
 
 class LiterateRESTTest(abc.ABC):
     """A literate test.
@@ -16,6 +19,48 @@ class LiterateRESTTest(abc.ABC):
 
     """
 
+    # How lists in `expected_data` are matched (one of
+    # `matcher.LIST_MODES`.)  Individual lists can override this
+    # by being wrapped in a marker, such as `matcher.Unique`.
+    list_mode = ANY
+
+    # If true, the response body is matched as a stream, rather than
+    # decoded with `json()`.  Only the parts of it mentioned in
+    # `expected_data` are built, which suits very large responses.
+    stream_response = False
+
+    # Whether the request may be sent alongside other literate tests'
+    # requests, when `rest_test_factory` is given a `concurrency`.
+    # Set this to false if `setUp` changes state other tests rely on.
+    concurrent = True
+
+    # Performance budgets, enforced by the generated tests: the longest
+    # `request_function` may take, in seconds; the largest response
+    # body, in bytes; and the most memory `request_function` may
+    # allocate at its peak, in bytes (measured with `tracemalloc`, so
+    # only allocations in this process count.)  None means no budget.
+    max_latency = None
+    max_response_size = None
+    max_allocation = None
+
+    # The files, directories or modules (by name) which the endpoint's
+    # behaviour depends on, such as its view and serializer modules.
+    # With change-aware selection (see `selection`), the test is rerun
+    # when any of them changes.
+    dependencies = ()
+
+    # Tags to look the test up by.  (See `registry.get_literate_tests`.)
+    tags = ()
+
+    # Set this to true in a base for other literate tests, which may
+    # leave abstract attributes undefined.  (Bases whose names contain
+    # "LiterateRESTTest" needn't.)  It isn't inherited.
+    abstract = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        registry.register(cls)
+
     @abc.abstractproperty
     def data(self):
         """The payload to send to the endpoint."""
@@ -35,6 +80,10 @@ class LiterateRESTTest(abc.ABC):
         which has the method, `json` defined. (That returns the
         json for the request.)
 
+        It may also be a coroutine function (say, the `get` method
+        of an asynchronous HTTP client), in which case it is awaited.
+        See `factories.async_rest_test_factory`.
+
         """
         ...
 
@@ -71,5 +120,8 @@ class LiterateRESTTest(abc.ABC):
         documentation describing prerequisites for calling a given
         endpoint.
 
+        Setup which several tests need can be shared between them
+        as a fixture, instead.  (See `fixtures`.)
+
         """
         pass
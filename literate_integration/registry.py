@@ -0,0 +1,203 @@
+"""Keep track of literate tests as they are defined.
+
+Every concrete subclass of `LiterateRESTTest` registers itself when its
+class statement runs, so finding a module's literate tests doesn't mean
+instantiating (or checking the abstractness of) everything the module
+defines or imports.  Classes which leave any of the abstract attributes
+undefined aren't registered.  Unless they are declared as bases for
+other literate tests (with `abstract = True`, or by having
+"LiterateRESTTest" in their names), they are recorded as incomplete, so
+`rest_test_factory` can fail a test for each, rather than leave them
+out.
+
+Literate tests can also be looked up by tag.  Tags are the strings in a
+literate test's `tags` attribute:
+
+```
+class ListBooksTest(LiterateRESTTest):
+    tags = ('books', 'smoke')
+    ...
+
+
+get_literate_tests(tag='smoke')
+```
+
+"""
+import threading
+import weakref
+
+
+# The registered literate tests, by module name, then qualified name.
+# Classes made at run time (say, by a test) are dropped once unused.
+_modules = {}
+
+# The literate tests which leave abstract attributes undefined, without
+# being declared as bases, by module name, then qualified name.
+_incomplete = {}
+
+# The names of the registered literate tests, by tag.
+_tags = {}
+
+_lock = threading.Lock()
+
+
+def _key(klass):
+    return '{}.{}'.format(klass.__module__, klass.__qualname__)
+
+
+def get_abstract_attributes(klass):
+    """Get the abstract attributes a class leaves undefined.
+
+    This gives the same answer as `inspect.isabstract`, but also works
+    while the class is being created (from `__init_subclass__`), before
+    `abc.ABCMeta` has worked it out.
+
+    Args:
+        klass: A subclass of `LiterateRESTTest`.
+
+    Returns:
+        A frozenset of the attributes' names.
+
+    """
+    names = {
+        name for name, value in vars(klass).items()
+        if getattr(value, '__isabstractmethod__', False)
+    }
+    for base in klass.__bases__:
+        for name in getattr(base, '__abstractmethods__', ()):
+            value = getattr(klass, name, None)
+            if getattr(value, '__isabstractmethod__', False):
+                names.add(name)
+    return frozenset(names)
+
+
+def is_base(klass):
+    """Whether a class is declared as a base for other literate tests."""
+    return (vars(klass).get('abstract', False)
+            or 'LiterateRESTTest' in klass.__name__)
+
+
+def register(klass):
+    """Register a literate test, if it is concrete.
+
+    Called for every subclass of `LiterateRESTTest` as it is defined.
+    Incomplete classes which aren't declared as bases are recorded
+    instead (see `find_incomplete_tests`.)
+
+    Args:
+        klass: The new subclass.
+
+    Returns:
+        Whether the class was registered.
+
+    """
+    if get_abstract_attributes(klass):
+        if not is_base(klass):
+            with _lock:
+                _incomplete.setdefault(
+                    klass.__module__,
+                    weakref.WeakValueDictionary(),
+                )[klass.__qualname__] = klass
+        return False
+    if isinstance(klass.tags, str):
+        raise TypeError(
+            '{}.tags should be a sequence of tags, not a string.'.format(
+                klass.__name__,
+            )
+        )
+    key = _key(klass)
+    with _lock:
+        _modules.setdefault(
+            klass.__module__,
+            weakref.WeakValueDictionary(),
+        )[klass.__qualname__] = klass
+        for tag in klass.tags:
+            _tags.setdefault(tag, set()).add(key)
+    return True
+
+
+def is_registered(klass):
+    """Whether a class is a registered (so, concrete) literate test."""
+    with _lock:
+        klasses = _modules.get(klass.__module__)
+        return (klasses is not None
+                and klasses.get(klass.__qualname__) is klass)
+
+
+def get_literate_tests(module=None, tag=None):
+    """Get registered literate tests.
+
+    Args:
+        module: If given, only get the tests defined in this module
+            (or the module with this name.)
+        tag: If given, only get the tests with this tag.
+
+    Returns:
+        A list of literate test classes, sorted by module and name.
+
+    """
+    if module is not None and not isinstance(module, str):
+        module = module.__name__
+    with _lock:
+        if module is None:
+            klasses = [
+                klass
+                for name in sorted(_modules)
+                for klass in _modules[name].values()
+            ]
+        else:
+            klasses = list(_modules.get(module, {}).values())
+        if tag is not None:
+            keys = _tags.get(tag, set())
+            klasses = [klass for klass in klasses if _key(klass) in keys]
+    return sorted(
+        klasses,
+        key=lambda klass: (klass.__module__, klass.__qualname__),
+    )
+
+
+def _find(module, registered):
+    with _lock:
+        tests = [
+            (name, value) for name, value in vars(module).items()
+            if isinstance(value, type)
+            and registered.get(value.__module__, {}).get(
+                value.__qualname__) is value
+        ]
+    return dict(sorted(tests, key=lambda test: test[0]))
+
+
+def find_literate_tests(module):
+    """Get the literate tests in a module, by name.
+
+    These are the registered tests which the module binds to a name,
+    whether it defines them or imports them from elsewhere (so, a
+    module can gather the tests of others.)  Abstract bases aren't
+    registered, so they aren't included.
+
+    Args:
+        module: A module, or another object whose attributes are
+            literate tests (such as a `types.SimpleNamespace`.)
+
+    Returns:
+        A dictionary from names to literate tests, sorted by name.
+
+    """
+    return _find(module, _modules)
+
+
+def find_incomplete_tests(module):
+    """Get the incomplete literate tests in a module, by name.
+
+    These leave abstract attributes undefined, without being declared
+    as bases for other literate tests, so they can't be run.
+
+    Args:
+        module: A module, or another object whose attributes are
+            literate tests.
+
+    Returns:
+        A dictionary from names to classes, sorted by name.
+
+    """
+    return _find(module, _incomplete)
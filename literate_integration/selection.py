@@ -0,0 +1,194 @@
+"""Skip literate tests whose inputs haven't changed since they passed.
+
+Pass a `ResultsCache` to `rest_test_factory` as its `selection`, and
+each literate test is fingerprinted before it runs: its source (and
+that of its literate base classes and its fixtures), its `url`,
+`request_method`, `data` and `expected_data`, and the contents of its
+declared `dependencies`.
+Tests whose fingerprint is the same as on their last passing run are
+skipped, so a run only repeats the tests which something could have
+broken.
+
+"""
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+
+from .fixtures import get_fixtures
+from .matcher import content_hash
+from .models import LiterateRESTTest
+
+
+# The attributes of a literate test which describe its request.
+FIELDS = ('url', 'request_method', 'data', 'expected_data')
+
+# Directories which don't hold dependencies.
+_IGNORED_DIRECTORIES = ('__pycache__', '.git')
+
+
+def _key(klass):
+    return '{}.{}'.format(klass.__module__, klass.__qualname__)
+
+
+def _get_source(value):
+    """Get the source of a class or function."""
+    try:
+        return inspect.getsource(value)
+    except (OSError, TypeError):
+        # It was made at run time; its bytecode or attributes will do.
+        code = getattr(value, '__code__', None)
+        if code is not None:
+            return repr((code.co_code, code.co_consts))
+        return repr(sorted(vars(value)))
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as fin:
+        for chunk in iter(lambda: fin.read(64 * 1024), b''):
+            digest.update(chunk)
+
+
+def _fingerprint_dependency(dependency):
+    """Hash the contents of a file, directory or module."""
+    digest = hashlib.sha1(dependency.encode('utf-8'))
+    path = dependency
+    if not os.path.exists(path):
+        try:
+            spec = importlib.util.find_spec(dependency)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or not spec.origin or not os.path.exists(spec.origin):
+            digest.update(b'missing')
+            return digest.hexdigest()
+        path = spec.origin
+    if os.path.isdir(path):
+        for root, directories, files in os.walk(path):
+            directories[:] = sorted(
+                x for x in directories if x not in _IGNORED_DIRECTORIES
+            )
+            for name in sorted(files):
+                if name.endswith('.pyc'):
+                    continue
+                filename = os.path.join(root, name)
+                digest.update(os.path.relpath(filename, path).encode('utf-8'))
+                _hash_file(digest, filename)
+    else:
+        _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+class ResultsCache(object):
+    """The fingerprints of literate tests on their last passing run.
+
+    Args:
+        path: The path of the cache file (JSON.)  It is created if it
+            doesn't exist, and rewritten when the generated test class
+            is torn down.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.passed = {}
+        self._fingerprints = {}
+        self._dependencies = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as fin:
+                self.passed = json.load(fin)
+
+    def _fingerprint_dependency(self, dependency):
+        fingerprint = self._dependencies.get(dependency)
+        if fingerprint is None:
+            fingerprint = _fingerprint_dependency(dependency)
+            self._dependencies[dependency] = fingerprint
+        return fingerprint
+
+    def fingerprint(self, klass):
+        """Get the fingerprint of a literate test.
+
+        Only the static values of the fields are hashed.  (A field
+        defined by a property is covered by the class's source, and
+        evaluating it could set up fixtures.)  Fingerprints are
+        computed once per class, and dependencies once per cache.
+
+        """
+        with self._lock:
+            fingerprint = self._fingerprints.get(klass)
+            if fingerprint is not None:
+                return fingerprint
+            digest = hashlib.sha1()
+            for base in klass.__mro__:
+                if base is LiterateRESTTest:
+                    break
+                digest.update(_get_source(base).encode('utf-8'))
+            for value in get_fixtures(klass):
+                # What a fixture sets up can change what the test sees.
+                digest.update(_get_source(value.function).encode('utf-8'))
+            for field in FIELDS:
+                value = inspect.getattr_static(klass, field, None)
+                if hasattr(value, '__get__'):
+                    value = None
+                digest.update(content_hash(value).encode('utf-8'))
+            for dependency in klass.dependencies:
+                digest.update(
+                    self._fingerprint_dependency(dependency).encode('utf-8')
+                )
+            fingerprint = self._fingerprints[klass] = digest.hexdigest()
+            return fingerprint
+
+    def is_unchanged(self, klass):
+        """Whether a literate test is unchanged since it last passed."""
+        return self.passed.get(_key(klass)) == self.fingerprint(klass)
+
+    def update(self, klass, passed):
+        """Record the outcome of a literate test."""
+        fingerprint = self.fingerprint(klass)
+        with self._lock:
+            if passed:
+                self.passed[_key(klass)] = fingerprint
+            else:
+                self.passed.pop(_key(klass), None)
+
+    def __getstate__(self):
+        # Caches are sent to the worker processes of `run_sharded`.
+        state = dict(vars(self))
+        del state['_lock']
+        # Fingerprints are computed again in the worker's process.
+        state['_fingerprints'] = {}
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self._lock = threading.Lock()
+
+    def merge(self, other, klasses):
+        """Take the outcomes of some literate tests from another cache.
+
+        `run_sharded` uses this to collect the outcomes recorded in its
+        worker processes.
+
+        Args:
+            other: The other `ResultsCache`.
+            klasses: The LiterateRESTTest subclasses whose outcomes
+                are taken.
+
+        """
+        with self._lock:
+            for klass in klasses:
+                key = _key(klass)
+                if key in other.passed:
+                    self.passed[key] = other.passed[key]
+                else:
+                    self.passed.pop(key, None)
+
+    def save(self):
+        """Write the cache file."""
+        with self._lock:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w') as fout:
+                json.dump(self.passed, fout, indent=4, sort_keys=True)
+            os.replace(temporary, self.path)
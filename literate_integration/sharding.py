@@ -0,0 +1,284 @@
+"""Run literate tests across a pool of processes.
+
+Threads don't help when the server runs in the same process as the
+tests (as with Django's test client), since the server's work holds the
+GIL.  Instead, `run_sharded` partitions a module's literate tests into
+shards, and runs each shard's generated test class in a process of its
+own.  The results and timings of the shards are merged into one report.
+
+Shards are assigned deterministically: by a stable hash of each literate
+test's name, or, given the durations of a previous run, so that each
+shard takes about as long as the others.
+
+"""
+from collections import namedtuple
+
+import hashlib
+import multiprocessing
+import os
+import types
+import unittest
+
+from .factories import _get_literate_classes, _rest_test_factory
+from .timing import TimingRecorder
+
+
+# The arguments of `rest_test_factory` which collect results in a file.
+# Each worker gets a copy, which is merged back and saved by the parent.
+_STORES = ('baseline', 'selection')
+
+PASSED = 'passed'
+FAILED = 'failed'
+ERROR = 'error'
+SKIPPED = 'skipped'
+
+# The outcome of a single generated test.  `message` is the
+# traceback of a failure or error, or the reason for a skip.
+ShardOutcome = namedtuple(
+    'ShardOutcome',
+    ['name', 'shard', 'outcome', 'message'],
+)
+
+
+def _stable_hash(name):
+    # `hash` is randomized per process, so it can't assign shards.
+    return int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def partition(names, shards, durations=None):
+    """Partition literate tests into shards.
+
+    Args:
+        names: The names of the literate test classes.
+        shards: The number of shards.
+        durations: If given, a dictionary from names to how long
+            each test took, in seconds.  The longest tests are assigned
+            first, each to the shard with the least work so far.  Tests
+            without a duration are assumed to take the average time.
+            Otherwise, tests are assigned by a stable hash of their
+            names.
+
+    Returns:
+        A list of `shards` lists of names, each sorted.
+
+    """
+    buckets = [[] for _ in range(shards)]
+    if not durations:
+        for name in names:
+            buckets[_stable_hash(name) % shards].append(name)
+        return [sorted(bucket) for bucket in buckets]
+
+    known = [durations[name] for name in names if name in durations]
+    default = sum(known) / len(known) if known else 1.0
+    loads = [0.0] * shards
+    for name in sorted(names, key=lambda x: (-durations.get(x, default), x)):
+        index = min(range(shards), key=lambda i: (loads[i], i))
+        buckets[index].append(name)
+        loads[index] += durations.get(name, default)
+    return [sorted(bucket) for bucket in buckets]
+
+
+class _OutcomeResult(unittest.TestResult):
+    """Records the outcome of each test, in a form which can be pickled."""
+
+    def __init__(self, shard):
+        super().__init__()
+        self.shard = shard
+        self.outcomes = []
+
+    def _add(self, test, outcome, message=''):
+        name = getattr(test, '_testMethodName', None) or str(test)
+        self.outcomes.append(ShardOutcome(name, self.shard, outcome, message))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._add(test, PASSED)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._add(test, FAILED, self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._add(test, ERROR, self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._add(test, SKIPPED, reason)
+
+
+def _run_shard(task):
+    """Run a shard of literate tests, in a worker process.
+
+    Returns:
+        A tuple of the tests' outcomes, their timings, and the copies
+        of the stores (such as a `Baseline`) they were run with.
+
+    """
+    (index, klasses, class_name, BaseClass, worker_setup, worker_teardown,
+     factory_kwargs) = task
+    stores = {
+        name: factory_kwargs[name] for name in _STORES
+        if factory_kwargs.get(name) is not None
+    }
+    if worker_setup is not None:
+        worker_setup(index)
+    try:
+        recorder = TimingRecorder()
+        # The parent process saves the merged stores, once.
+        TestClass = _rest_test_factory(
+            types.SimpleNamespace(**klasses),
+            class_name,
+            BaseClass,
+            recorder=recorder,
+            save=False,
+            **factory_kwargs
+        )
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestClass)
+        result = _OutcomeResult(index)
+        suite.run(result)
+        return result.outcomes, recorder.timings, stores
+    finally:
+        if worker_teardown is not None:
+            worker_teardown(index)
+
+
+class ShardReport(object):
+    """The merged results of a sharded run.
+
+    Attributes:
+        outcomes: A `ShardOutcome` for each generated test, sorted
+            by name.
+        timings: A `TimingRecorder` with every test's timing.
+        shards: The names of the literate tests in each shard.
+
+    """
+
+    def __init__(self, outcomes, timings, shards):
+        self.outcomes = sorted(outcomes, key=lambda outcome: outcome.name)
+        self.timings = timings
+        self.shards = shards
+
+    def problems(self):
+        return [
+            outcome for outcome in self.outcomes
+            if outcome.outcome in (FAILED, ERROR)
+        ]
+
+    def wasSuccessful(self):
+        return not self.problems()
+
+    def durations(self):
+        """Get how long each literate test took.
+
+        Pass these to the next `run_sharded` to balance its shards.
+
+        Returns:
+            A dictionary from literate test names to seconds.
+
+        """
+        return {timing.name: timing.total for timing in self.timings.timings}
+
+    def format(self):
+        """Summarize the run, with the message of each problem."""
+        counts = {}
+        for outcome in self.outcomes:
+            counts[outcome.outcome] = counts.get(outcome.outcome, 0) + 1
+        lines = [
+            'Ran {} tests in {} shards: {}'.format(
+                len(self.outcomes),
+                len(self.shards),
+                ', '.join(
+                    '{} {}'.format(counts[outcome], outcome)
+                    for outcome in (PASSED, FAILED, ERROR, SKIPPED)
+                    if outcome in counts
+                ),
+            )
+        ]
+        for outcome in self.problems():
+            lines.append('')
+            lines.append('{} ({}, shard {})'.format(
+                outcome.name,
+                outcome.outcome,
+                outcome.shard,
+            ))
+            lines.append(outcome.message)
+        return '\n'.join(lines)
+
+
+def run_sharded(module, class_name, processes=None,
+                BaseClass=unittest.TestCase, durations=None,
+                worker_setup=None, worker_teardown=None, **factory_kwargs):
+    """Run a module's literate tests across a pool of processes.
+
+    Each shard is run by `rest_test_factory`, in a fresh process.  So,
+    the literate test classes, `BaseClass`, the hooks and any other
+    arguments must be importable (or otherwise picklable.)
+
+    Args:
+        module: The module which holds the literate test classes.
+        class_name: The name of the generated test classes.
+        processes: The number of shards (and processes.)  Defaults to
+            the number of CPUs.
+        BaseClass: The base class of the generated test classes.
+        durations: If given, how long each test took on a previous run
+            (see `ShardReport.durations`), to balance the shards.
+        worker_setup: If given, called in each worker process with the
+            index of its shard, before its tests are run.  For example,
+            it could create a test database of the worker's own.
+        worker_teardown: If given, called with the shard's index after
+            its tests are run.
+        factory_kwargs: Passed to `rest_test_factory`.  A `baseline`
+            or `selection` is copied to each worker; the results the
+            workers record in them are merged, and saved once all of
+            the shards have run.  A `recorder` can't be given, since
+            each worker records its own timings; they are merged into
+            the report's `timings`.
+
+    Returns:
+        A `ShardReport`.
+
+    Raises:
+        TypeError: If `factory_kwargs` includes a `recorder`.
+
+    """
+    if 'recorder' in factory_kwargs:
+        raise TypeError(
+            'run_sharded records the timings itself; read them from '
+            'the ShardReport, rather than passing a recorder.'
+        )
+    processes = processes or os.cpu_count() or 1
+    klasses = _get_literate_classes(module)
+    shards = partition(list(klasses), processes, durations)
+    tasks = [
+        (
+            index,
+            {name: klasses[name] for name in shard},
+            class_name,
+            BaseClass,
+            worker_setup,
+            worker_teardown,
+            factory_kwargs,
+        )
+        for index, shard in enumerate(shards)
+        if shard
+    ]
+    # Each shard gets a fresh process, so no state leaks between them.
+    pool = multiprocessing.Pool(len(tasks) or 1, maxtasksperchild=1)
+    try:
+        results = pool.map(_run_shard, tasks, chunksize=1)
+    finally:
+        pool.terminate()
+
+    outcomes = []
+    timings = TimingRecorder()
+    for task, (shard_outcomes, shard_timings, stores) in zip(tasks, results):
+        outcomes.extend(shard_outcomes)
+        for timing in shard_timings:
+            timings.record(timing)
+        for name, store in stores.items():
+            factory_kwargs[name].merge(store, task[1].values())
+    for name in _STORES:
+        if factory_kwargs.get(name) is not None:
+            factory_kwargs[name].save()
+    return ShardReport(outcomes, timings, shards)
@@ -0,0 +1,300 @@
+"""Compact, immutable descriptions of literate tests.
+
+A `LiterateSpec` holds everything the runner, the matcher and the
+documentation generator read from a literate test: its request, the
+response it expects, and its docstrings.  `get_spec` extracts it once
+per class, and the result is shared.
+
+Fields defined by properties can depend on `setUp` (or on fixtures), so
+they aren't evaluated when the spec is extracted.  They are listed in
+the spec's `dynamic` attribute, and filled in from a set-up instance by
+`LiterateSpec.resolve`, along with any field setUp assigned.
+
+Specs can be pickled, or converted to JSON-compatible dictionaries with
+`to_dict` (and back with `LiterateSpec.from_dict`), so other tools can
+read them without importing the tests.  The matcher's markers (such as
+`Regex`) are encoded as dictionaries with a '$expectation' key.
+
+"""
+import inspect
+import threading
+import weakref
+
+from .fixtures import get_fixtures
+from .matcher import (
+    Each,
+    InRange,
+    OfType,
+    Ordered,
+    Regex,
+    Unique,
+    content_hash,
+)
+
+
+# The attributes of a literate test which describe its request, and
+# the response it expects.  Each may be a property.
+FIELDS = ('url', 'request_method', 'data', 'expected_data', 'expected_status')
+
+# The key which marks an encoded `matcher.Expectation`.
+EXPECTATION = '$expectation'
+
+# The types `OfType` can be given, by their names in JSON.
+_TYPES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'list': list,
+    'dict': dict,
+    'None': type(None),
+}
+_TYPE_NAMES = {kind: name for name, kind in _TYPES.items()}
+
+# Extracted specs, by class.
+_specs = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _encode(value):
+    """Convert an expected value to JSON-compatible data."""
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, (Unique, Ordered)):
+        return {
+            EXPECTATION: value.__class__.__name__,
+            'values': _encode(value.values),
+        }
+    if isinstance(value, Each):
+        return {EXPECTATION: 'Each', 'value': _encode(value.value)}
+    if isinstance(value, OfType):
+        return {
+            EXPECTATION: 'OfType',
+            'types': [_TYPE_NAMES[kind] for kind in value.types],
+        }
+    if isinstance(value, Regex):
+        return {
+            EXPECTATION: 'Regex',
+            'pattern': value.pattern,
+            'flags': int(value.flags),
+        }
+    if isinstance(value, InRange):
+        return {
+            EXPECTATION: 'InRange',
+            'minimum': value.minimum,
+            'maximum': value.maximum,
+        }
+    return value
+
+
+def _decode(value):
+    """Convert data from `_encode` back to an expected value."""
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kind = value.get(EXPECTATION)
+    if kind is None:
+        return {key: _decode(item) for key, item in value.items()}
+    if kind == 'Unique':
+        return Unique(_decode(value['values']))
+    if kind == 'Ordered':
+        return Ordered(_decode(value['values']))
+    if kind == 'Each':
+        return Each(_decode(value['value']))
+    if kind == 'OfType':
+        return OfType(*[_TYPES[name] for name in value['types']])
+    if kind == 'Regex':
+        return Regex(value['pattern'], value['flags'])
+    if kind == 'InRange':
+        return InRange(value['minimum'], value['maximum'])
+    raise ValueError('Unknown expectation: {!r}'.format(kind))
+
+
+class LiterateSpec(object):
+    """What a literate test sends, and what it expects back.
+
+    Specs are immutable.  Use `get_spec` to get the spec of a class.
+
+    Attributes:
+        name: The name of the literate test class.
+        module: The module which defines it.
+        qualname: Its qualified name.
+        url: The url to hit.
+        request_method: The method of the request.
+        data: The payload.
+        expected_data: The data expected back.
+        expected_status: The status expected back.
+        list_mode: How lists in `expected_data` are matched.
+        stream_response: Whether the response is matched as a stream.
+        docstring: The class's docstring.
+        setup_docs: The docstrings of its fixtures, then of its setUp.
+        dynamic: The names of the fields defined by properties, which
+            are None until the spec is resolved.
+        expected_hash: The content hash of `expected_data` (or None,
+            if it is dynamic.)
+
+    """
+
+    __slots__ = (
+        'name',
+        'module',
+        'qualname',
+        'url',
+        'request_method',
+        'data',
+        'expected_data',
+        'expected_status',
+        'list_mode',
+        'stream_response',
+        'docstring',
+        'setup_docs',
+        'dynamic',
+        'expected_hash',
+    )
+
+    def __init__(self, **values):
+        values['setup_docs'] = tuple(values.get('setup_docs', ()))
+        values['dynamic'] = tuple(values.get('dynamic', ()))
+        if 'expected_hash' not in values:
+            values['expected_hash'] = (
+                None if 'expected_data' in values['dynamic']
+                else content_hash(values.get('expected_data'))
+            )
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.pop(name, None))
+        if values:
+            raise TypeError('Unknown fields: {}'.format(
+                ', '.join(sorted(values)),
+            ))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('LiterateSpec is immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('LiterateSpec is immutable.')
+
+    def __reduce__(self):
+        return (_from_values, (self._values(),))
+
+    def __eq__(self, other):
+        if not isinstance(other, LiterateSpec):
+            return NotImplemented
+        # The matcher's markers don't compare by value; their encodings do.
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'LiterateSpec({}.{})'.format(self.module, self.qualname)
+
+    def _values(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def replace(self, **values):
+        """Get a copy of the spec, with some fields changed."""
+        new_values = self._values()
+        new_values.update(values)
+        if 'expected_data' in values:
+            del new_values['expected_hash']
+        return LiterateSpec(**new_values)
+
+    def resolve(self, instance, fields=FIELDS):
+        """Fill in the fields from an instance of the class.
+
+        Every field is read again, not just the dynamic ones: setUp can
+        assign a field on the instance, and a test can patch one on the
+        class after its spec was extracted.
+
+        Args:
+            instance: An instance of the literate test, after its setUp
+                has run.  If none of the fields are dynamic, the class
+                itself will do.
+            fields: The names of the fields to read.  Dynamic fields
+                which aren't read stay dynamic.
+
+        Returns:
+            The spec, if none of the fields changed; otherwise, a new
+            spec with their values.
+
+        """
+        values = {}
+        for name in fields:
+            value = getattr(instance, name)
+            if name in self.dynamic or value is not getattr(self, name):
+                values[name] = value
+        if not values:
+            return self
+        values['dynamic'] = [
+            name for name in self.dynamic if name not in fields
+        ]
+        return self.replace(**values)
+
+    def to_dict(self):
+        """Get the spec as JSON-compatible data."""
+        values = self._values()
+        values['data'] = _encode(self.data)
+        values['expected_data'] = _encode(self.expected_data)
+        values['setup_docs'] = list(self.setup_docs)
+        values['dynamic'] = list(self.dynamic)
+        return values
+
+    @classmethod
+    def from_dict(cls, values):
+        """Get a spec from the data of `to_dict`."""
+        values = dict(values)
+        values['data'] = _decode(values.get('data'))
+        values['expected_data'] = _decode(values.get('expected_data'))
+        return cls(**values)
+
+
+def _from_values(values):
+    return LiterateSpec(**values)
+
+
+def _extract(klass):
+    values = {
+        'name': klass.__name__,
+        'module': klass.__module__,
+        'qualname': klass.__qualname__,
+        'list_mode': klass.list_mode,
+        'stream_response': klass.stream_response,
+        'docstring': klass.__doc__,
+        'setup_docs': [fixture.__doc__ for fixture in get_fixtures(klass)]
+        + [klass.setUp.__doc__],
+    }
+    dynamic = []
+    for field in FIELDS:
+        value = inspect.getattr_static(klass, field)
+        if hasattr(value, '__get__'):
+            dynamic.append(field)
+        else:
+            values[field] = value
+    values['dynamic'] = dynamic
+    return LiterateSpec(**values)
+
+
+def get_spec(klass):
+    """Get the spec of a literate test.
+
+    The spec is extracted the first time, and shared afterwards, so
+    changes to the class's attributes after that aren't seen until the
+    spec is resolved.  Its dynamic fields aren't resolved; see
+    `LiterateSpec.resolve`.
+
+    Args:
+        klass: The LiterateRESTTest subclass.
+
+    Returns:
+        A `LiterateSpec`.
+
+    """
+    spec = _specs.get(klass)
+    if spec is None:
+        with _lock:
+            spec = _specs.get(klass)
+            if spec is None:
+                spec = _specs[klass] = _extract(klass)
+    return spec
@@ -0,0 +1,458 @@
+"""Read literate tests from their source, without importing them.
+
+Importing a module of literate tests runs its body, which (with Django)
+loads the settings and every app, just so that `docgen` can read some
+docstrings and literal attributes.  `read_specs` parses the source
+instead, and builds a `LiterateSpec` for each literate test whose
+documented fields (`url`, `request_method` and `data`) are literals, or
+module-level constants.  (A constant which is bound more than once,
+which might be changed, or which the class body shadows, is left to an
+import, since its value depends on where the class reads it.)
+
+Whatever can't be read with certainty is left to an import: classes
+whose documented fields are computed, whose base classes are imported,
+or which have attributes that might be fixtures, and names which might
+be bound to literate tests defined elsewhere (classes imported from
+other modules, or assigned from expressions.)  Modules with
+module-level control flow (which might define literate tests at run
+time), expressions (which might change the constants), star imports,
+or which rebind the name of a class, are imported outright.
+
+"""
+import ast
+import importlib
+
+from .models import LiterateRESTTest
+from .spec import LiterateSpec
+
+
+# The attributes a concrete literate test must define.
+REQUIRED = tuple(sorted(LiterateRESTTest.__abstractmethods__))
+
+# The name of this package.
+_PACKAGE = __name__.split('.')[0]
+
+# The fields which the documentation shows.
+DOCUMENTED = ('url', 'request_method', 'data')
+
+# The fields which are kept, if they are literals.
+_LITERAL_FIELDS = DOCUMENTED + ('expected_data', 'expected_status')
+
+# The configured attributes which are kept in the spec.
+_SPEC_CONFIGURED = ('list_mode', 'stream_response')
+
+# Attributes which literate tests configure, and which can't be fixtures.
+_CONFIGURED = frozenset(
+    name for name in vars(LiterateRESTTest) if not name.startswith('_')
+)
+
+# The kinds of class attributes.
+_LITERAL = 'literal'
+_DYNAMIC = 'dynamic'
+_DEFINED = 'defined'
+_ABSTRACT = 'abstract'
+_FIXTURE = 'fixture'
+
+
+class _Unknown(Exception):
+    """Raised when something can't be worked out from the source."""
+
+
+def _get_docstring(node):
+    """Get a docstring as the compiler would set `__doc__`.
+
+    The compiler may clean docstrings (Python 3.13 dedents them), so
+    the literal is compiled on its own, rather than read as it is.
+
+    """
+    docstring = ast.get_docstring(node, clean=False)
+    if docstring is None:
+        return None
+    namespace = {}
+    exec(compile(
+        'def function():\n    {!r}\n'.format(docstring),
+        '<docstring>',
+        'exec',
+    ), namespace)
+    return namespace['function'].__doc__
+
+
+def _get_targets(statement):
+    if isinstance(statement, ast.AnnAssign):
+        return [statement.target]
+    return statement.targets
+
+
+def _is_docstring(statement):
+    """Whether a statement is just a string, which does nothing."""
+    return (isinstance(statement, ast.Expr)
+            and isinstance(statement.value, ast.Constant)
+            and isinstance(statement.value.value, str))
+
+
+def _is_mutable(node):
+    return any(
+        isinstance(x, (ast.Dict, ast.List, ast.Set)) for x in ast.walk(node)
+    )
+
+
+def _may_be_class(name):
+    """Whether a name could be that of a class (by its CapWords case.)"""
+    return name[:1].isupper() and not name.isupper()
+
+
+def _get_name(node):
+    """Get the name a decorator or base refers to, ignoring its module."""
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+class _Module(object):
+    """The module-level definitions of a file of literate tests."""
+
+    def __init__(self, tree):
+        self.constants = {}
+        self.fixtures = {}
+        self.functions = set()
+        self.classes = {}
+        # Names which may be bound to literate tests from elsewhere.
+        self.borrowed = set()
+        # Names bound more than once, or constants which might be
+        # changed, whose values depend on where they are read.
+        self.rebound = set()
+        self._bound = set()
+        self._mutable = set()
+        self._chains = {}
+        for statement in tree.body:
+            self._read(statement)
+        self._find_changes(tree)
+
+    def _bind(self, name):
+        if name in self.classes:
+            # The class may be replaced by something else entirely.
+            raise _Unknown(name)
+        if name in self._bound:
+            self.rebound.add(name)
+        self._bound.add(name)
+        self.constants.pop(name, None)
+        self.fixtures.pop(name, None)
+        self.functions.discard(name)
+        self.borrowed.discard(name)
+
+    def _read(self, statement):
+        if isinstance(statement, ast.ClassDef):
+            self.classes.pop(statement.name, None)
+            self._bind(statement.name)
+            self.classes[statement.name] = statement
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._bind(statement.name)
+            names = [_get_name(x) for x in statement.decorator_list]
+            if names == ['fixture']:
+                self.fixtures[statement.name] = _get_docstring(statement)
+            elif not names:
+                self.functions.add(statement.name)
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = _get_targets(statement)
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    raise _Unknown(target)
+                self._bind(target.id)
+                try:
+                    self.constants[target.id] = ast.literal_eval(
+                        statement.value
+                    )
+                    if _is_mutable(statement.value):
+                        self._mutable.add(target.id)
+                except (ValueError, TypeError, SyntaxError):
+                    if _may_be_class(target.id):
+                        self.borrowed.add(target.id)
+        elif isinstance(statement, ast.Import):
+            for alias in statement.names:
+                # Binds a module.
+                self._bind(alias.asname or alias.name.split('.')[0])
+        elif isinstance(statement, ast.ImportFrom):
+            # This library doesn't define any literate tests.
+            library = statement.level == 0 and (
+                statement.module.split('.')[0] == _PACKAGE
+            )
+            for alias in statement.names:
+                if alias.name == '*':
+                    raise _Unknown(statement)
+                name = alias.asname or alias.name
+                self._bind(name)
+                if library:
+                    self._import_constant(statement.module, alias.name, name)
+                elif _may_be_class(name):
+                    self.borrowed.add(name)
+        elif isinstance(statement, ast.If) and _is_main_check(statement):
+            pass
+        elif not (_is_docstring(statement)
+                  or isinstance(statement, ast.Pass)):
+            # Expressions may change the constants (say, `DATA.update()`.)
+            raise _Unknown(statement)
+
+    def _import_constant(self, module_name, attribute, name):
+        """Read a constant (such as a list mode) from this library."""
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            raise _Unknown(module_name)
+        value = getattr(module, attribute, None)
+        if isinstance(value, (str, bool, int, float)):
+            self.constants[name] = value
+
+    def _find_changes(self, tree):
+        """Mark the constants which the module's code might change.
+
+        A mutable constant is only safe to read if every use of it is
+        the value of a class attribute; anything else could change it
+        (or an alias of it.)  Any constant declared `global` could be
+        rebound.
+
+        """
+        attributes = set()
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                attributes.update(
+                    statement.value for statement in node.body
+                    if isinstance(statement, (ast.Assign, ast.AnnAssign))
+                )
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Global):
+                self.rebound.update(node.names)
+            elif (isinstance(node, ast.Name)
+                    and node.id in self._mutable
+                    and node not in attributes):
+                self.rebound.add(node.id)
+
+    def get_chain(self, name):
+        """Get a class and its literate bases, the root first.
+
+        Returns:
+            A list of ClassDef nodes, or None if the class isn't a
+            literate test.
+
+        Raises:
+            _Unknown: If that depends on code outside of the file.
+
+        """
+        if name not in self._chains:
+            self._chains[name] = self._get_chain(self.classes[name])
+        return self._chains[name]
+
+    def _get_chain(self, node):
+        if node.decorator_list or node.keywords:
+            raise _Unknown(node.name)
+        if not node.bases:
+            return None
+        if len(node.bases) > 1:
+            raise _Unknown(node.name)
+        base = node.bases[0]
+        name = _get_name(base)
+        if name == 'LiterateRESTTest':
+            return [node]
+        if isinstance(base, ast.Name) and name in self.classes:
+            chain = self.get_chain(name)
+            return None if chain is None else chain + [node]
+        if name == 'object':
+            return None
+        raise _Unknown(node.name)
+
+    def get_value(self, name, node, bound=()):
+        """Get the kind (and value) of a class attribute's value.
+
+        Args:
+            name: The name of the attribute.
+            node: The expression of its value.
+            bound: The names bound earlier in the class body, which
+                shadow those of the module.
+
+        """
+        if isinstance(node, ast.Name) and (
+                node.id in self.rebound or node.id in bound):
+            # Only the module's last binding is known, not the one the
+            # class saw.
+            raise _Unknown(name)
+        if name in _LITERAL_FIELDS:
+            value = self._get_literal(node)
+            return (_DYNAMIC,) if value is None else value
+        if name in _CONFIGURED:
+            value = None
+            if name in _SPEC_CONFIGURED:
+                value = self._get_literal(node)
+            else:
+                try:
+                    value = (_LITERAL, ast.literal_eval(node))
+                except (ValueError, TypeError, SyntaxError):
+                    pass
+            return (_DEFINED,) if value is None else value
+        if isinstance(node, ast.Name):
+            if node.id in self.fixtures:
+                return (_FIXTURE, node.id, self.fixtures[node.id])
+            if node.id in self.functions or node.id in self.constants:
+                return (_DEFINED,)
+            if node.id in self.classes:
+                return (_DEFINED,)
+            raise _Unknown(name)
+        if isinstance(node, ast.Lambda):
+            return (_DEFINED,)
+        if isinstance(node, ast.Call):
+            if _get_name(node) == 'property':
+                return (_DYNAMIC,)
+            if _get_name(node) in ('staticmethod', 'classmethod'):
+                return (_DEFINED,)
+            raise _Unknown(name)
+        try:
+            return (_LITERAL, ast.literal_eval(node))
+        except (ValueError, TypeError, SyntaxError):
+            raise _Unknown(name)
+
+    def _get_literal(self, node):
+        """Get a literal, or a constant's value, or None."""
+        try:
+            return (_LITERAL, ast.literal_eval(node))
+        except (ValueError, TypeError, SyntaxError):
+            if isinstance(node, ast.Name) and node.id in self.constants:
+                return (_LITERAL, self.constants[node.id])
+        return None
+
+
+def _is_main_check(statement):
+    """Whether the statement is `if __name__ == '__main__':`."""
+    test = statement.test
+    return (isinstance(test, ast.Compare)
+            and isinstance(test.left, ast.Name)
+            and test.left.id == '__name__')
+
+
+def _get_function_value(node):
+    names = [_get_name(x) for x in node.decorator_list]
+    if any(x in ('abstractmethod', 'abstractproperty') for x in names):
+        return (_ABSTRACT,)
+    if names == ['fixture']:
+        return (_FIXTURE, node, _get_docstring(node))
+    if names == ['property']:
+        return (_DYNAMIC,)
+    if names in ([], ['staticmethod'], ['classmethod']):
+        return (_DEFINED, _get_docstring(node))
+    raise _Unknown(node.name)
+
+
+def _get_attributes(module, node):
+    """Get the attributes a class statement defines, in order."""
+    attributes = {}
+    for statement in node.body:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            attributes[statement.name] = _get_function_value(statement)
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = _get_targets(statement)
+            if statement.value is None:
+                continue
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    raise _Unknown(node.name)
+                attributes[target.id] = module.get_value(
+                    target.id,
+                    statement.value,
+                    attributes,
+                )
+        elif not (_is_docstring(statement)
+                  or isinstance(statement, ast.Pass)):
+            raise _Unknown(node.name)
+    return attributes
+
+
+def _get_spec(module, module_name, name):
+    """Get the spec of a literate test, or None if it is abstract."""
+    chain = module.get_chain(name)
+    if chain is None:
+        return None
+    merged = {}
+    fixtures = []
+    for node in chain:
+        attributes = _get_attributes(module, node)
+        merged.update(attributes)
+        for value in attributes.values():
+            if value[0] == _FIXTURE and value[1] not in [
+                    x[1] for x in fixtures]:
+                fixtures.append(value)
+    if any(merged.get(x, (_ABSTRACT,))[0] == _ABSTRACT for x in REQUIRED):
+        return None
+    if any(value[0] == _ABSTRACT for value in merged.values()):
+        return None
+
+    values = {
+        'name': name,
+        'module': module_name,
+        'qualname': name,
+        'docstring': _get_docstring(chain[-1]),
+        'list_mode': LiterateRESTTest.list_mode,
+        'stream_response': LiterateRESTTest.stream_response,
+    }
+    for field in _SPEC_CONFIGURED:
+        value = merged.get(field)
+        if value is None:
+            continue
+        if value[0] != _LITERAL:
+            raise _Unknown(name)
+        values[field] = value[1]
+    dynamic = []
+    for field in _LITERAL_FIELDS:
+        value = merged[field]
+        if value[0] == _LITERAL:
+            values[field] = value[1]
+        elif field in DOCUMENTED:
+            raise _Unknown(name)
+        else:
+            dynamic.append(field)
+    values['dynamic'] = dynamic
+
+    setup = merged.get('setUp')
+    if setup is None:
+        setup_doc = LiterateRESTTest.setUp.__doc__
+    elif setup[0] == _DEFINED and len(setup) == 2:
+        setup_doc = setup[1]
+    else:
+        raise _Unknown(name)
+    values['setup_docs'] = [x[2] for x in fixtures] + [setup_doc]
+    return LiterateSpec(**values)
+
+
+def read_specs(path, module_name):
+    """Read the specs of the literate tests in a file, from its source.
+
+    Args:
+        path: The path of the python file.
+        module_name: The name of its module.
+
+    Returns:
+        A tuple of a dictionary from class names to the specs which were
+        read, and the names which have to be imported to be read (as
+        they may be bound to literate tests.)  The names are None if
+        the whole module has to be imported.
+
+    """
+    with open(path, 'rb') as fin:
+        source = fin.read()
+    try:
+        module = _Module(ast.parse(source, path))
+    except (_Unknown, SyntaxError):
+        return {}, None
+
+    specs = {}
+    unknown = []
+    for name in sorted(module.classes):
+        try:
+            spec = _get_spec(module, module_name, name)
+        except _Unknown:
+            unknown.append(name)
+            continue
+        if spec is not None:
+            specs[name] = spec
+    unknown.extend(sorted(module.borrowed))
+    return specs, unknown
@@ -0,0 +1,681 @@
+"""Match responses against a matcher without decoding them fully.
+
+The streaming matcher reads a JSON document token by token.  Parts of
+the document which the expected value doesn't mention are skipped
+without being built, and matching stops as soon as every expectation
+has been satisfied (or one has failed.)  So checking a handful of keys
+in a very large response only ever holds a small part of it in memory.
+
+"""
+import codecs
+import json
+import re
+
+from .matcher import (
+    ORDERED,
+    UNIQUE,
+    Matcher,
+    MatcherException,
+    _DictMatcher,
+    _EachMatcher,
+    _ListMatcher,
+    _TypeMatcher,
+    _explain,
+    _format_failure,
+    _match,
+    _maximum_matching,
+    _preview,
+)
+
+
+# The size of the pieces that a response body is read in.
+CHUNK_SIZE = 64 * 1024
+
+_TOKEN = re.compile(r'''
+    [ \t\n\r]*
+    (?:
+        (?P<punctuation>[{}\[\],:])
+      | (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)
+      | (?P<literal>true|false|null)
+    )
+''', re.VERBOSE)
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+# The characters which can continue a number.
+_NUMBER_CHARACTERS = frozenset('0123456789.eE+-')
+
+_scanstring = json.decoder.scanstring
+
+# The kind of token for strings, numbers and literals.
+VALUE = 'value'
+
+
+class _Skipped(object):
+    """Stands in for a part of the response which wasn't built.
+
+    It is never equal to a terminal, and is neither a list nor
+    a dictionary, so it can't match anything it is compared with.
+
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<skipped>'
+
+
+_SKIPPED = _Skipped()
+
+
+def _chunks(source):
+    """Split a response body into chunks.
+
+    Args:
+        source: The body as bytes or a string, or an iterable
+            of byte (or string) chunks.
+
+    Yields:
+        Chunks of the body.
+
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        if not isinstance(source, str):
+            source = memoryview(source)
+        for start in range(0, len(source), CHUNK_SIZE):
+            yield source[start:start + CHUNK_SIZE]
+    else:
+        yield from source
+
+
+class _Tokenizer(object):
+    """Reads JSON tokens from an iterable of chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _read(self):
+        """Read more of the body into the buffer.
+
+        Reads until the unread part of the buffer has at least doubled,
+        so that a long token spanning many chunks is only rescanned a
+        logarithmic number of times.
+
+        Returns:
+            False, if there was nothing left to read.
+
+        """
+        if self.exhausted:
+            return False
+        pieces = [self.buffer[self.position:]]
+        wanted = max(len(pieces[0]), 1)
+        read = 0
+        while read < wanted:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                self.exhausted = True
+                pieces.append(self.decoder.decode(b'', final=True))
+                break
+            if not isinstance(chunk, str):
+                chunk = self.decoder.decode(chunk)
+            pieces.append(chunk)
+            read += len(chunk)
+        self.buffer = ''.join(pieces)
+        self.position = 0
+        return True
+
+    def next(self, decode=True):
+        """Read the next token.
+
+        Args:
+            decode: If false, the values of strings and numbers
+                aren't decoded (which is cheaper, when skipping.)
+
+        Returns:
+            A tuple of the token's kind, and its value.  The kind is
+            either a punctuation character or VALUE.
+
+        Raises:
+            ValueError: If the body isn't valid JSON.
+
+        """
+        while True:
+            match = _TOKEN.match(self.buffer, self.position)
+            # A number may be continued in the next chunk, unless
+            # it's followed by something which can't continue it.
+            # (The buffer may end with `1.`, or `1e-`.)
+            complete = match is not None and (
+                match.lastgroup != 'number'
+                or self.exhausted
+                or (match.end() < len(self.buffer)
+                    and self.buffer[match.end()] not in _NUMBER_CHARACTERS)
+            )
+            if complete:
+                break
+            if not self._read():
+                if self.buffer[self.position:].strip():
+                    raise ValueError('Invalid JSON: {}'.format(
+                        _preview.repr(self.buffer[self.position:]),
+                    ))
+                raise ValueError('Unexpected end of JSON')
+        self.position = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'punctuation':
+            return token, None
+        if not decode:
+            return VALUE, None
+        if kind == 'string':
+            return VALUE, _scanstring(token, 1)[0]
+        if kind == 'number':
+            if '.' in token or 'e' in token or 'E' in token:
+                return VALUE, float(token)
+            return VALUE, int(token)
+        return VALUE, _LITERALS[token]
+
+    def expect(self, kind):
+        token, _ = self.next()
+        if token != kind:
+            raise ValueError('Invalid JSON: expected {!r} but got {!r}'.format(
+                kind,
+                token,
+            ))
+
+    def skip(self, first):
+        """Skip a value.
+
+        Args:
+            first: The first token of the value.
+
+        """
+        depth = 0
+        kind = first[0]
+        while True:
+            if kind in '{[':
+                depth += 1
+            elif kind in '}]':
+                depth -= 1
+            if depth == 0:
+                return
+            kind = self.next(decode=False)[0]
+
+    def skip_rest(self):
+        """Skip the rest of the current list or dictionary."""
+        self.skip(('[', None))
+
+
+class _Shape(object):
+    """Describes which parts of a value have to be built.
+
+    Args:
+        keys: For dictionaries, the shape of each key to keep.  None,
+            if dictionaries aren't needed.
+        items: For lists, the shape of every element.  None, if lists
+            aren't needed.
+
+    """
+
+    __slots__ = ('keys', 'items')
+
+    def __init__(self, keys=None, items=None):
+        self.keys = keys
+        self.items = items
+
+    def merge(self, other):
+        """Get a shape which needs the parts either shape needs.
+
+        Shapes aren't changed once made, so the parts only one of them
+        needs are shared.  Shapes can be as deep as the expected value,
+        so they are merged with a stack, rather than recursively.
+
+        """
+        merged = _Shape()
+        pending = [(merged, self, other)]
+        while pending:
+            target, first, second = pending.pop()
+            if first.keys is None or second.keys is None:
+                target.keys = first.keys if second.keys is None else (
+                    second.keys
+                )
+            else:
+                target.keys = dict(first.keys)
+                for key, shape in second.keys.items():
+                    if key in first.keys:
+                        target.keys[key] = _Shape()
+                        pending.append(
+                            (target.keys[key], first.keys[key], shape)
+                        )
+                    else:
+                        target.keys[key] = shape
+            if first.items is None or second.items is None:
+                target.items = first.items if second.items is None else (
+                    second.items
+                )
+            else:
+                target.items = _Shape()
+                pending.append((target.items, first.items, second.items))
+        return merged
+
+
+def _get_children(matcher):
+    if isinstance(matcher, _DictMatcher):
+        return [child for _, child in matcher.matchers]
+    if isinstance(matcher, _ListMatcher):
+        return matcher.matchers
+    if isinstance(matcher, _EachMatcher):
+        return [matcher.matcher]
+    return []
+
+
+def _shape(matcher):
+    """Get the shape of the values a matcher node needs.
+
+    The shapes of a node's children are worked out before its own,
+    with a stack, so that deeply nested matchers don't hit the
+    recursion limit.
+
+    """
+    shapes = {}
+    pending = [(matcher, False)]
+    while pending:
+        node, ready = pending.pop()
+        if id(node) in shapes:
+            continue
+        if not ready:
+            pending.append((node, True))
+            pending.extend(
+                (child, False) for child in _get_children(node)
+                if id(child) not in shapes
+            )
+            continue
+        if isinstance(node, _DictMatcher):
+            shape = _Shape(keys={
+                key: shapes[id(child)] for key, child in node.matchers
+            })
+        elif isinstance(node, _ListMatcher):
+            shape = _Shape()
+            for child in node.matchers:
+                shape = shape.merge(shapes[id(child)])
+            shape = _Shape(items=shape)
+        elif isinstance(node, _EachMatcher):
+            shape = _Shape(items=shapes[id(node.matcher)])
+        elif isinstance(node, _TypeMatcher):
+            # Only the type of a list or dictionary is needed, not
+            # its contents.
+            shape = _Shape(
+                keys={} if dict in node.types else None,
+                items=_Shape() if list in node.types else None,
+            )
+        else:
+            shape = _Shape()
+        shapes[id(node)] = shape
+    return shapes[id(matcher)]
+
+
+def _element_shape(matcher):
+    """Get the shape of the elements a list matcher node needs."""
+    return _shape(matcher).items
+
+
+class _DictFrame(object):
+    """Matching a dictionary, in `_StreamMatcher.match`."""
+
+    __slots__ = ('remaining', 'tail', 'key', 'child_tail')
+
+    def __init__(self, matcher, tail):
+        self.remaining = dict(matcher.matchers)
+        self.tail = tail
+        self.key = None
+        self.child_tail = False
+
+    def next_child(self, stream):
+        """Find the next value to match.
+
+        Returns:
+            A tuple of the matcher, the first token and the tail flag
+            of the value, or whether the dictionary matched.
+
+        """
+        tokens = stream.tokens
+        while True:
+            kind, key = tokens.next()
+            if kind == '}':
+                break
+            if kind == ',':
+                continue
+            tokens.expect(':')
+            first = tokens.next()
+            child = self.remaining.pop(key, None)
+            if child is None:
+                tokens.skip(first)
+                continue
+            self.key = key
+            self.child_tail = self.tail and not self.remaining
+            return child, first, self.child_tail
+        if self.remaining:
+            return stream._fail('Key {!r} was not present'.format(
+                next(iter(self.remaining)),
+            ))
+        return True
+
+    def finish_child(self, stream, matched):
+        """Take the result of a value.
+
+        Returns:
+            Whether the dictionary matched, or None if it isn't known
+            yet.
+
+        """
+        if not matched:
+            stream.path.append(self.key)
+            return False
+        if self.child_tail:
+            return True
+        if not self.remaining:
+            stream.tokens.skip_rest()
+            return True
+        return None
+
+
+class _EachFrame(object):
+    """Matching a list with `Each`, in `_StreamMatcher.match`."""
+
+    __slots__ = ('matcher', 'count')
+
+    def __init__(self, matcher):
+        self.matcher = matcher.matcher
+        self.count = 0
+
+    def next_child(self, stream):
+        while True:
+            first = stream.tokens.next()
+            if first[0] == ']':
+                return True
+            if first[0] != ',':
+                return self.matcher, first, False
+
+    def finish_child(self, stream, matched):
+        if not matched:
+            stream.path.append(self.count)
+            return False
+        self.count += 1
+        return None
+
+
+class _StreamMatcher(object):
+    """Matches a compiled matcher against a stream of tokens.
+
+    On failure, `path` holds the keys and indices leading to the
+    failing part of the response (innermost first), and `message`
+    describes the failure.
+
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.path = []
+        self.message = None
+
+    def _fail(self, message):
+        self.message = message
+        return False
+
+    def _received(self, first):
+        """Describe an unexpected value, without building it."""
+        kind, value = first
+        if kind == VALUE:
+            return _preview.repr(value)
+        return 'a list' if kind == '[' else 'a dict'
+
+    def _open(self, first, shape):
+        """Start building a value: a terminal, or an empty container.
+
+        Containers the shape doesn't need are skipped.
+
+        """
+        kind, value = first
+        if kind == VALUE:
+            return value
+        if kind == '{' and shape.keys is not None:
+            return {}
+        if kind == '[' and shape.items is not None:
+            return []
+        self.tokens.skip(first)
+        return _SKIPPED
+
+    def build(self, first, shape):
+        """Build the parts of a value given by the shape.
+
+        The containers being filled are kept on a stack, so that deeply
+        nested values don't hit the recursion limit.
+
+        Args:
+            first: The first token of the value.
+            shape: A `_Shape`.
+
+        Returns:
+            The value, with unneeded parts skipped.
+
+        """
+        built = self._open(first, shape)
+        if first[0] == VALUE or built is _SKIPPED:
+            return built
+        pending = [(built, shape)]
+        while pending:
+            container, shape = pending[-1]
+            token = self.tokens.next()
+            kind = token[0]
+            if kind in '}]':
+                pending.pop()
+                continue
+            if kind == ',':
+                continue
+            if isinstance(container, dict):
+                key = token[1]
+                self.tokens.expect(':')
+                token = self.tokens.next()
+                if key not in shape.keys:
+                    self.tokens.skip(token)
+                    continue
+                child_shape = shape.keys[key]
+                value = container[key] = self._open(token, child_shape)
+            else:
+                child_shape = shape.items
+                value = self._open(token, child_shape)
+                container.append(value)
+            if token[0] != VALUE and value is not _SKIPPED:
+                pending.append((value, child_shape))
+        return built
+
+    def match(self, matcher, first, tail):
+        """Match the value starting with the given token.
+
+        Args:
+            matcher: A compiled matcher node.
+            first: The first token of the value.
+            tail: Whether nothing else has to be read once this value
+                matches.  If so, matching stops as soon as it can.
+
+        Returns:
+            True if the value matches.
+
+        """
+        # The dictionaries and `Each` lists being matched, innermost
+        # last, so that deeply nested values don't hit the recursion
+        # limit.
+        frames = []
+        matched = self._begin(frames, matcher, first, tail)
+        while frames:
+            frame = frames[-1]
+            if matched is not None:
+                matched = frame.finish_child(self, matched)
+                if matched is not None:
+                    frames.pop()
+                    continue
+            child = frame.next_child(self)
+            if isinstance(child, bool):
+                frames.pop()
+                matched = child
+            else:
+                matched = self._begin(frames, *child)
+        return matched
+
+    def _begin(self, frames, matcher, first, tail):
+        """Start matching a value.
+
+        Returns:
+            Whether the value matched, or None if a frame was pushed to
+            match its contents.
+
+        """
+        if isinstance(matcher, _DictMatcher):
+            if first[0] != '{':
+                return self._fail('Expected dict but received {}'.format(
+                    self._received(first),
+                ))
+            if not matcher.matchers and tail:
+                return True
+            frames.append(_DictFrame(matcher, tail))
+            return None
+        if isinstance(matcher, _EachMatcher):
+            if first[0] != '[':
+                return self._fail('Expected list but received {}'.format(
+                    self._received(first),
+                ))
+            frames.append(_EachFrame(matcher))
+            return None
+        if isinstance(matcher, _ListMatcher):
+            return self._match_list(matcher, first, tail)
+        value = self.build(first, _shape(matcher))
+        if _match(matcher, value):
+            return True
+        path, message = _explain(matcher, value)
+        self.path.extend(reversed(path))
+        return self._fail(message)
+
+    def _match_list(self, matcher, first, tail):
+        if first[0] != '[':
+            return self._fail('Expected list but received {}'.format(
+                self._received(first),
+            ))
+        shape = _element_shape(matcher)
+        matchers = matcher.matchers
+        # ANY mode: the expected items which haven't been matched yet.
+        pending = list(range(len(matchers)))
+        # UNIQUE mode: the compatibility table.
+        adjacency = [[] for _ in matchers]
+        # ORDERED mode: the next expected item to match.
+        position = 0
+        count = 0
+        done = not matchers
+        while not done:
+            first = self.tokens.next()
+            if first[0] == ']':
+                break
+            if first[0] == ',':
+                continue
+            element = self.build(first, shape)
+            if matcher.mode == UNIQUE:
+                for i, child in enumerate(matchers):
+                    if _match(child, element):
+                        adjacency[i].append(count)
+            elif matcher.mode == ORDERED:
+                if _match(matchers[position], element):
+                    position += 1
+                    done = position == len(matchers)
+            else:
+                pending = [
+                    i for i in pending if not _match(matchers[i], element)
+                ]
+                done = not pending
+            count += 1
+        if done:
+            if not tail:
+                self.tokens.skip_rest()
+            return True
+
+        if matcher.mode == UNIQUE:
+            if len(matchers) > count:
+                return self._fail(
+                    'Expected at least {} elements but received {}'.format(
+                        len(matchers),
+                        count,
+                    )
+                )
+            for i, compatible in enumerate(adjacency):
+                if not compatible:
+                    return self._fail(
+                        'No element matched expected item {}'.format(i)
+                    )
+            matched = _maximum_matching(adjacency, count)
+            if matched < len(matchers):
+                return self._fail(
+                    'Only {} of {} items matched distinct elements'.format(
+                        matched,
+                        len(matchers),
+                    )
+                )
+            return True
+        elif matcher.mode == ORDERED:
+            return self._fail(
+                'No element matched expected item {} in order'.format(
+                    position,
+                )
+            )
+        return self._fail(
+            'No element matched expected item {}'.format(pending[0])
+        )
+
+
+def _run(expected, source):
+    if not isinstance(expected, Matcher):
+        expected = Matcher(expected)
+    tokens = _Tokenizer(_chunks(source))
+    stream = _StreamMatcher(tokens)
+    matched = stream.match(expected.matcher, tokens.next(), tail=True)
+    return matched, stream
+
+
+def match_stream(expected, source):
+    """Tell whether a JSON response body matches the expected value.
+
+    Args:
+        expected: The expected value, or a compiled `Matcher` for it.
+        source: The body, as bytes or a string, or an iterable of
+            byte chunks (such as a streaming response's content.)
+
+    Returns:
+        True if the body matches.
+
+    Raises:
+        ValueError: If the body isn't valid JSON.
+
+    """
+    return _run(expected, source)[0]
+
+
+def assertMatchesStream(expected, source):
+    """Run the given check on a JSON body, raising if it fails.
+
+    The streaming counterpart of `matcher.assertMatches`.
+
+    Args:
+        expected: The expected value, or a compiled `Matcher` for it.
+        source: The body, as bytes or a string, or an iterable of
+            byte chunks.
+
+    Raises:
+        MatcherException: If the body doesn't match.
+        ValueError: If the body isn't valid JSON.
+
+    """
+    matched, stream = _run(expected, source)
+    if not matched:
+        path, message = _format_failure(reversed(stream.path), stream.message)
+        raise MatcherException(message, path)
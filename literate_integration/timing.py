@@ -0,0 +1,175 @@
+"""Time the phases of literate tests, and report on them.
+
+Pass a `TimingRecorder` to `rest_test_factory` (or
+`async_rest_test_factory`) as its `recorder`, and each generated test
+will record how long its literate test spent in `setUp`, in
+`request_function`, decoding the response, and matching it, along with
+the size of the response.  That tells an endpoint whose requests have
+become slow apart from a test which is slow because of its fixtures, or
+because of a huge payload.
+
+"""
+from contextlib import contextmanager
+
+import csv
+import json
+import threading
+import time
+import tracemalloc
+
+
+# The phases of a literate test, in the order they happen.
+PHASES = ('setup', 'request', 'json', 'match')
+
+# Resets the peak of the traced memory (new in Python 3.9.)
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+
+class Timing(object):
+    """The time spent in each phase of a single literate test.
+
+    Each phase's duration is in seconds, or None if the test
+    didn't reach it.  (Streamed responses are decoded while they're
+    matched, so their decoding time is part of `match`.)
+
+    Attributes:
+        name: The name of the literate test class.
+        size: The size of the response body in bytes, or None.  For
+            streamed responses, only the bytes which were read are
+            counted.
+        allocation: The peak memory allocated during the request, in
+            bytes, or None if it wasn't traced.  (Before Python 3.9,
+            it is only traced if nothing else was tracing memory.)
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.setup = None
+        self.request = None
+        self.json = None
+        self.match = None
+        self.size = None
+        self.allocation = None
+
+    @contextmanager
+    def phase(self, name, trace=False):
+        """Time a phase of the test.
+
+        The duration is recorded even if the phase raises.
+
+        Args:
+            name: The name of the phase.
+            trace: If true, the peak memory allocated during the phase
+                is recorded as `allocation`.  Tracing slows allocations
+                down, so the phase's duration will be inflated.
+
+        """
+        if trace:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            elif _reset_peak is not None:
+                _reset_peak()
+            else:
+                # The peak so far can't be told apart from the phase's.
+                trace = False
+        if trace:
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, name, time.perf_counter() - start)
+            if trace:
+                self.allocation = tracemalloc.get_traced_memory()[1] - before
+                if started:
+                    tracemalloc.stop()
+
+    @property
+    def total(self):
+        return sum(
+            getattr(self, phase) or 0.0
+            for phase in PHASES
+        )
+
+    def to_dict(self):
+        row = {'name': self.name}
+        for phase in PHASES:
+            row[phase] = getattr(self, phase)
+        row['size'] = self.size
+        row['allocation'] = self.allocation
+        row['total'] = self.total
+        return row
+
+
+class TimingRecorder(object):
+    """Collects the timings of literate tests.
+
+    Recording is thread-safe, so a recorder may be shared by the tests
+    of several generated test classes, including concurrent ones.
+
+    """
+
+    FIELDS = ('name',) + PHASES + ('size', 'allocation', 'total')
+
+    def __init__(self):
+        self.timings = []
+        self._lock = threading.Lock()
+
+    def record(self, timing):
+        with self._lock:
+            self.timings.append(timing)
+
+    def slowest(self, count=10, phase='total'):
+        """Get the slowest tests.
+
+        Args:
+            count: The number of tests to get.
+            phase: The phase to sort by: one of `PHASES`, 'total'
+                or 'size'.
+
+        Returns:
+            A list of the `Timing`s, slowest first.
+
+        """
+        return sorted(
+            self.timings,
+            key=lambda timing: getattr(timing, phase) or 0,
+            reverse=True,
+        )[:count]
+
+    def summary(self, count=10, phase='total'):
+        """Format the slowest tests as a table, in milliseconds."""
+        lines = ['{:<32} {:>9} {:>9} {:>9} {:>9} {:>9} {:>10}'.format(
+            'test', 'setup', 'request', 'json', 'match', 'total', 'bytes',
+        )]
+        for timing in self.slowest(count, phase):
+            lines.append('{:<32} {} {} {} {} {} {:>10}'.format(
+                timing.name[:32],
+                *[
+                    _format_ms(getattr(timing, field))
+                    for field in PHASES + ('total',)
+                ],
+                '-' if timing.size is None else timing.size
+            ))
+        return '\n'.join(lines)
+
+    def to_list(self):
+        return [timing.to_dict() for timing in self.timings]
+
+    def write_json(self, stream):
+        """Write the timings, as JSON, to a file-like object."""
+        json.dump(self.to_list(), stream, indent=4)
+
+    def write_csv(self, stream):
+        """Write the timings, as CSV, to a file-like object."""
+        writer = csv.DictWriter(stream, fieldnames=self.FIELDS)
+        writer.writeheader()
+        writer.writerows(self.to_list())
+
+
+def _format_ms(seconds):
+    if seconds is None:
+        return '{:>9}'.format('-')
+    return '{:>9.1f}'.format(seconds * 1000)
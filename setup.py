@@ -21,23 +21,28 @@ setup(
     license="MIT",
     keywords="documentation linter development",
     url="http://git.savantgroup.com/i3/literate_integration",
-    packages=find_packages(exclude=('tests', 'docs')),
+    packages=find_packages(exclude=('tests', 'docs', 'benchmarks')),
     long_description=read_full_documentation('README.md'),
     entry_points={
         'console_scripts': [
             'docgen = literate_integration.driver:main',
+            'literate-load = literate_integration.load:main',
+            'literate-manifest = literate_integration.manifest:main',
         ],
     },
     install_requires=[],
     setup_requires=[],
     tests_require=['pytest'],
-    python_requires='>=3.4',
+    python_requires='>=3.8',
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Documentation',
         'Topic :: Software Development :: Quality Assurance',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 )
@@ -0,0 +1,205 @@
+"""Tests the performance budgets of literate tests."""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from literate_integration.budgets import Baseline
+from literate_integration.factories import (
+    async_rest_test_factory,
+    rest_test_factory,
+)
+
+from .test_literate_rest_test import (
+    MockModule,
+    MockResponse,
+    PassingExampleTest,
+    StreamingExampleTest,
+    StreamingResponse,
+    run_tests,
+)
+
+
+class FastExampleTest(PassingExampleTest):
+    """An example whose request is within its latency budget."""
+
+    max_latency = 1.0
+
+
+class SlowExampleTest(PassingExampleTest):
+    """An example whose request is over its latency budget."""
+
+    max_latency = 0.01
+
+    @staticmethod
+    def request_function(url, data):
+        time.sleep(0.02)
+        return PassingExampleTest.request_function(url, data)
+
+
+class LargeExampleTest(PassingExampleTest):
+    """An example whose response is over its size budget."""
+
+    max_response_size = 16
+
+
+class LargeStreamingExampleTest(StreamingExampleTest):
+    """An example whose streamed response is over its size budget.
+
+    Matching stops well before the end of the response.
+
+    """
+
+    max_response_size = 1000
+
+    @staticmethod
+    def request_function(url, data):
+        return StreamingResponse(
+            [b'{"count": 2, "results": [{"id": 1}, {"id": 2}], "padding": "']
+            + [b'x' * 500] * 4
+            + [b'"}']
+        )
+
+
+class HungryExampleTest(PassingExampleTest):
+    """An example whose request allocates more than its budget."""
+
+    max_allocation = 1024 * 1024
+
+    @staticmethod
+    def request_function(url, data):
+        buffer = bytearray(4 * 1024 * 1024)
+        del buffer
+        return MockResponse({'count': 2, 'results': [{'id': 2}]}, 200)
+
+
+class FrugalExampleTest(HungryExampleTest):
+    """An example whose request allocates less than its budget."""
+
+    max_allocation = 16 * 1024 * 1024
+
+
+def get_problems(TestClass):
+    result = run_tests(TestClass)
+    return {
+        str(test).split()[0]: message
+        for test, message in result.failures + result.errors
+    }
+
+
+class BudgetTestCase(TestCase):
+
+    def test_latency_budget(self):
+        problems = get_problems(rest_test_factory(
+            type('Module', (), {
+                'FastExampleTest': FastExampleTest,
+                'SlowExampleTest': SlowExampleTest,
+            }),
+            'BudgetTests',
+        ))
+        self.assertEqual(list(problems), ['test_slow_example_test'])
+        self.assertTrue(
+            'over its budget of 10.0ms' in problems['test_slow_example_test']
+        )
+
+    def test_response_size_budget(self):
+        problems = get_problems(rest_test_factory(
+            MockModule(LargeExampleTest),
+            'BudgetTests',
+        ))
+        self.assertTrue(
+            'over its budget of 16' in problems['test_large_example_test']
+        )
+
+    def test_streamed_response_size_budget(self):
+        problems = get_problems(rest_test_factory(
+            MockModule(LargeStreamingExampleTest),
+            'BudgetTests',
+        ))
+        self.assertTrue('over its budget of 1000' in problems[
+            'test_large_streaming_example_test'
+        ])
+
+    def test_allocation_budget(self):
+        problems = get_problems(rest_test_factory(
+            type('Module', (), {
+                'FrugalExampleTest': FrugalExampleTest,
+                'HungryExampleTest': HungryExampleTest,
+            }),
+            'BudgetTests',
+            concurrency=2,
+        ))
+        self.assertEqual(list(problems), ['test_hungry_example_test'])
+        self.assertTrue('allocated' in problems['test_hungry_example_test'])
+
+    def test_asynchronous_budgets(self):
+        problems = get_problems(async_rest_test_factory(
+            type('Module', (), {
+                'FastExampleTest': FastExampleTest,
+                'SlowExampleTest': SlowExampleTest,
+            }),
+            'BudgetTests',
+            concurrency=2,
+        ))
+        self.assertEqual(list(problems), ['test_slow_example_test'])
+
+
+class BaselineTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_check(self):
+        baseline = Baseline(self.path, tolerance=0.5)
+        self.assertIsNone(baseline.check(PassingExampleTest, 0.1))
+        self.assertIsNone(baseline.check(PassingExampleTest, 0.14))
+        message = baseline.check(PassingExampleTest, 0.3)
+        self.assertTrue('300.0ms' in message)
+        self.assertTrue('114% longer' in message)
+        # A regression isn't recorded.
+        self.assertIsNotNone(baseline.check(PassingExampleTest, 0.3))
+
+    def test_floor(self):
+        baseline = Baseline(self.path, tolerance=0.1, floor=0.005)
+        baseline.check(PassingExampleTest, 0.001)
+        self.assertIsNone(baseline.check(PassingExampleTest, 0.004))
+        self.assertIsNotNone(baseline.check(PassingExampleTest, 0.01))
+
+    def test_regression_fails_the_next_run(self):
+        module = MockModule(SlowExampleTest)
+        SlowExampleTest.max_latency = None
+        self.addCleanup(setattr, SlowExampleTest, 'max_latency', 0.01)
+
+        problems = get_problems(rest_test_factory(
+            module,
+            'BaselineTests',
+            baseline=Baseline(self.path),
+        ))
+        self.assertEqual(problems, {})
+        with open(self.path) as fin:
+            latencies = json.load(fin)
+        self.assertEqual(len(latencies), 1)
+        key = list(latencies)[0]
+        self.assertTrue(key.endswith('.SlowExampleTest'))
+
+        # Pretend the last run was much faster.
+        latencies[key] = 0.001
+        with open(self.path, 'w') as fout:
+            json.dump(latencies, fout)
+        problems = get_problems(rest_test_factory(
+            module,
+            'BaselineTests',
+            baseline=Baseline(self.path),
+            concurrency=2,
+        ))
+        self.assertTrue(
+            'longer than its baseline of 1.0ms'
+            in problems['test_slow_example_test']
+        )
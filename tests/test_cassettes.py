@@ -0,0 +1,173 @@
+"""Tests recording and replaying literate tests' responses."""
+
+import json
+import os
+import shutil
+import tempfile
+import types
+from unittest import TestCase
+
+from literate_integration.cassettes import (
+    CassetteNotFound,
+    CassetteResponse,
+    CassetteStore,
+    ONCE,
+    RECORD,
+    REPLAY,
+)
+from literate_integration.factories import (
+    async_rest_test_factory,
+    rest_test_factory,
+)
+from literate_integration.timing import TimingRecorder
+
+from .test_literate_rest_test import (
+    MockModule,
+    MockResponse,
+    PassingExampleTest,
+    StreamedExampleTest,
+    run_tests,
+)
+
+
+class RecordableResponse(MockResponse):
+    """A mock response whose content is its data, as JSON."""
+
+    headers = {'Content-Type': 'application/json'}
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode('utf-8')
+
+
+def counting_request_function(url, data):
+    CountingExampleTest.sent += 1
+    return RecordableResponse({'count': 2, 'results': [{'id': 2}]}, 200)
+
+
+class CountingExampleTest(PassingExampleTest):
+    """An example which counts the requests it sends."""
+
+    sent = 0
+
+    request_function = staticmethod(counting_request_function)
+
+
+def get_counting_module(count):
+    klasses = {}
+    for i in range(count):
+        name = 'Counting{}Test'.format(i)
+        klasses[name] = type(name, (CountingExampleTest,), {
+            'url': '/counting/{}/'.format(i),
+            'expected_status': 200 if i != 3 else 201,
+        })
+    return types.SimpleNamespace(**klasses)
+
+
+class CassetteResponseTestCase(TestCase):
+
+    def test_round_trip(self):
+        for content in [b'{"id": 1}', b'\xff\xfe']:
+            response = CassetteResponse(201, {'X-Id': '1'}, content)
+            copy = CassetteResponse.from_dict(response.to_dict())
+            self.assertEqual(copy.status_code, 201)
+            self.assertEqual(copy.headers, {'X-Id': '1'})
+            self.assertEqual(copy.content, content)
+
+    def test_json(self):
+        response = CassetteResponse(200, {}, b'{"id": 1}')
+        self.assertEqual(response.json(), {'id': 1})
+
+
+class CassetteStoreTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        CountingExampleTest.sent = 0
+
+    def run_module(self, module, mode, **kwargs):
+        return run_tests(rest_test_factory(
+            module,
+            'CassetteTests',
+            cassettes=CassetteStore(self.directory, mode),
+            **kwargs
+        ))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            CassetteStore(self.directory, 'rewind')
+
+    def test_record_then_replay(self):
+        module = MockModule(CountingExampleTest)
+        result = self.run_module(module, RECORD)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(CountingExampleTest.sent, 1)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        result = self.run_module(module, REPLAY)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(CountingExampleTest.sent, 1)
+
+        result = self.run_module(module, RECORD)
+        self.assertEqual(CountingExampleTest.sent, 2)
+
+    def test_replay_missing(self):
+        result = self.run_module(MockModule(CountingExampleTest), REPLAY)
+        self.assertEqual(len(result.errors), 1)
+        self.assertTrue('CassetteNotFound' in result.errors[0][1])
+        self.assertEqual(CountingExampleTest.sent, 0)
+
+    def test_once(self):
+        module = MockModule(CountingExampleTest)
+        self.run_module(module, ONCE)
+        self.run_module(module, ONCE)
+        self.assertEqual(CountingExampleTest.sent, 1)
+
+    def test_key_includes_data(self):
+        store = CassetteStore(self.directory, ONCE)
+        instance = CountingExampleTest()
+        response = CountingExampleTest.request_function(None, None)
+        store.record(CountingExampleTest, instance, response)
+        replayed = store.replay(CountingExampleTest, instance)
+        self.assertEqual(replayed.headers, RecordableResponse.headers)
+        instance.data = {'page': 2}
+        self.assertIsNone(store.replay(CountingExampleTest, instance))
+        with self.assertRaises(CassetteNotFound):
+            CassetteStore(self.directory, REPLAY).replay(
+                CountingExampleTest,
+                instance,
+            )
+
+    def test_streamed_response_is_recorded(self):
+        module = MockModule(StreamedExampleTest)
+        first = self.run_module(module, RECORD)
+        second = self.run_module(module, REPLAY)
+        # The streamed example fails, both times the same way.
+        self.assertEqual(len(first.failures + first.errors), 1)
+        problems = second.failures + second.errors
+        self.assertEqual(len(problems), 1)
+        self.assertTrue('/results' in problems[0][1])
+
+    def test_replayed_requests_are_not_timed(self):
+        module = MockModule(CountingExampleTest)
+        self.run_module(module, RECORD)
+        recorder = TimingRecorder()
+        self.run_module(module, REPLAY, recorder=recorder)
+        self.assertIsNone(recorder.timings[0].request)
+        self.assertIsNotNone(recorder.timings[0].match)
+
+    def test_concurrent_and_asynchronous(self):
+        module = get_counting_module(4)
+        self.run_module(module, RECORD, concurrency=2)
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+        self.assertEqual(CountingExampleTest.sent, 4)
+        result = run_tests(async_rest_test_factory(
+            module,
+            'CassetteTests',
+            cassettes=CassetteStore(self.directory, REPLAY),
+            concurrency=2,
+        ))
+        self.assertEqual(CountingExampleTest.sent, 4)
+        self.assertEqual(result.testsRun, 4)
+        self.assertEqual(len(result.failures + result.errors), 1)
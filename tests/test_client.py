@@ -0,0 +1,190 @@
+"""Tests the pooled HTTP client against a local server."""
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+import json
+import threading
+import time
+import types
+
+from literate_integration.client import HTTPClient
+from literate_integration.factories import rest_test_factory
+from literate_integration.models import LiterateRESTTest
+
+from .test_literate_rest_test import run_tests
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Answers with a description of the request, and its connection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.most_in_flight = max(server.most_in_flight,
+                                        server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        content = json.dumps({
+            'method': self.command,
+            'path': self.path,
+            'body': json.loads(body) if body else None,
+            'connection': self.client_address[1],
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        if server.drop_connections:
+            # Close the connection without telling the client.
+            self.close_connection = True
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+
+class HTTPClientTestCase(TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.in_flight = 0
+        self.server.most_in_flight = 0
+        self.server.delay = 0
+        self.server.drop_connections = False
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = 'http://127.0.0.1:{}'.format(
+            self.server.server_address[1],
+        )
+
+    def get_client(self, **kwargs):
+        client = HTTPClient(self.base_url, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_connections_are_kept_alive(self):
+        client = self.get_client()
+        connections = {
+            client.request('GET', '/books/').json()['connection']
+            for _ in range(5)
+        }
+        self.assertEqual(len(connections), 1)
+
+    def test_data(self):
+        client = self.get_client()
+        response = client.request('GET', '/books/?a=1', {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['path'], '/books/?a=1&page=2')
+        self.assertEqual(
+            response.headers['Content-Type'],
+            'application/json',
+        )
+        response = client.request('post', '/books/', {'title': 'Emma'})
+        self.assertEqual(response.json()['method'], 'POST')
+        self.assertEqual(response.json()['body'], {'title': 'Emma'})
+        self.assertTrue(isinstance(response.content, bytes))
+
+    def test_pool_size_bounds_connections(self):
+        self.server.delay = 0.05
+        client = self.get_client(pool_size=3)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(
+                lambda i: client.request('GET', '/books/{}/'.format(i)),
+                range(12),
+            ))
+        self.assertEqual(self.server.most_in_flight, 3)
+        connections = {response.json()['connection'] for response in responses}
+        self.assertEqual(len(connections), 3)
+
+    def test_pool_timeout(self):
+        self.server.delay = 0.2
+        client = self.get_client(pool_size=1, pool_timeout=0.01)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(client.request, 'GET', '/books/')
+                for _ in range(2)
+            ]
+            errors = [future.exception() for future in futures]
+        self.assertEqual(
+            sorted(type(error).__name__ for error in errors),
+            ['NoneType', 'TimeoutError'],
+        )
+
+    def test_closed_connection_is_replaced(self):
+        self.server.drop_connections = True
+        client = self.get_client()
+        connections = [
+            client.request('GET', '/books/').json()['connection']
+            for _ in range(3)
+        ]
+        self.assertEqual(len(set(connections)), 3)
+
+    def test_request_function_uses_request_method(self):
+        client = self.get_client()
+
+        def get_test(name, method, status):
+            return type(name, (LiterateRESTTest,), {
+                'url': '/books/',
+                'data': {'title': 'Emma'},
+                'request_method': method,
+                'request_function': client.request_function,
+                'expected_data': {'method': method},
+                'expected_status': status,
+            })
+
+        module = types.SimpleNamespace(
+            CreateBookTest=get_test('CreateBookTest', 'POST', 200),
+            ListBooksTest=get_test('ListBooksTest', 'GET', 200),
+            DeleteBookTest=get_test('DeleteBookTest', 'DELETE', 204),
+        )
+        result = run_tests(rest_test_factory(
+            module,
+            'LiveTests',
+            concurrency=3,
+        ))
+        self.assertEqual(result.testsRun, 3)
+        problems = result.failures + result.errors
+        self.assertEqual(len(problems), 1)
+        self.assertTrue('test_delete_book_test' in str(problems[0][0]))
+
+    def test_request_method_may_be_a_property(self):
+        client = self.get_client()
+
+        class UpdateBookTest(LiterateRESTTest):
+            url = '/books/'
+            data = {'title': 'Emma'}
+            request_function = client.request_function
+            expected_data = {'method': 'PUT'}
+            expected_status = 200
+
+            @property
+            def request_method(self):
+                return 'PUT'
+
+        result = run_tests(rest_test_factory(
+            types.SimpleNamespace(UpdateBookTest=UpdateBookTest),
+            'LiveTests',
+        ))
+        self.assertEqual(result.testsRun, 1)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(
+            UpdateBookTest().request_function('/books/').json()['method'],
+            'PUT',
+        )
+        with self.assertRaises(TypeError):
+            UpdateBookTest.request_function('/books/')
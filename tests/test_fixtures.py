@@ -0,0 +1,159 @@
+"""Tests fixtures shared between literate tests."""
+
+import types
+from unittest import TestCase
+
+from literate_integration.document import _format_setup
+from literate_integration.factories import (
+    async_rest_test_factory,
+    rest_test_factory,
+)
+from literate_integration.fixtures import (
+    CLASS,
+    Fixture,
+    MODULE,
+    SESSION,
+    fixture,
+    get_fixtures,
+)
+from literate_integration.models import LiterateRESTTest
+
+from .test_literate_rest_test import MockResponse, run_tests
+
+
+class Catalog(object):
+    """Records how often it was seeded and torn down."""
+
+    def __init__(self):
+        self.seeded = 0
+        self.torn_down = []
+
+    def seed(self):
+        self.seeded += 1
+        return {'id': self.seeded}
+
+
+def get_module(scope, catalog, count=2):
+    """Get literate tests which all use a catalog fixture."""
+
+    @fixture(scope=scope, teardown=catalog.torn_down.append)
+    def seeded_catalog():
+        """Seed the catalog.
+
+        The catalog must hold the book, "Persuasion".
+
+        """
+        return catalog.seed()
+
+    def request_function(url, data):
+        return MockResponse({'url': url}, 200)
+
+    klasses = {}
+    for i in range(count):
+        name = 'Catalog{}Test'.format(i)
+        klasses[name] = type(name, (LiterateRESTTest,), {
+            'catalog': seeded_catalog,
+            'url': property(
+                lambda self: '/catalogs/{}/'.format(self.catalog['id'])
+            ),
+            'data': None,
+            'request_method': 'GET',
+            'request_function': staticmethod(request_function),
+            'expected_data': property(lambda self: {'url': self.url}),
+            'expected_status': 200,
+        })
+    return types.SimpleNamespace(**klasses), seeded_catalog
+
+
+class FixtureTestCase(TestCase):
+
+    def test_unknown_scope(self):
+        with self.assertRaises(ValueError):
+            Fixture(lambda: None, scope='galaxy')
+
+    def test_decorator(self):
+        @fixture
+        def plain():
+            return 1
+        self.assertEqual(plain.scope, MODULE)
+        self.assertEqual(plain.name, 'plain')
+
+    def test_descriptor(self):
+        catalog = Catalog()
+        module, seeded_catalog = get_module(SESSION, catalog, count=1)
+        self.assertIs(module.Catalog0Test.catalog, seeded_catalog)
+        self.assertEqual(module.Catalog0Test().catalog, {'id': 1})
+        self.assertEqual(module.Catalog0Test().catalog, {'id': 1})
+        self.assertEqual(get_fixtures(module.Catalog0Test), [seeded_catalog])
+        seeded_catalog.teardown()
+        self.assertEqual(catalog.torn_down, [{'id': 1}])
+
+
+class SharedFixtureTestCase(TestCase):
+
+    def test_module_scope_is_shared_between_classes(self):
+        catalog = Catalog()
+        module, seeded_catalog = get_module(MODULE, catalog)
+        self.addCleanup(seeded_catalog.teardown)
+        for name in ('FirstTests', 'SecondTests'):
+            result = run_tests(rest_test_factory(module, name))
+            self.assertTrue(result.wasSuccessful())
+            self.assertEqual(result.testsRun, 2)
+        self.assertEqual(catalog.seeded, 1)
+        self.assertEqual(catalog.torn_down, [])
+
+    def test_class_scope_is_torn_down_with_the_class(self):
+        catalog = Catalog()
+        module, seeded_catalog = get_module(CLASS, catalog)
+        for name in ('FirstTests', 'SecondTests'):
+            result = run_tests(rest_test_factory(module, name))
+            self.assertTrue(result.wasSuccessful())
+        self.assertEqual(catalog.seeded, 2)
+        self.assertEqual(catalog.torn_down, [{'id': 1}, {'id': 2}])
+
+    def test_fixtures_are_set_up_before_concurrent_requests(self):
+        catalog = Catalog()
+        module, seeded_catalog = get_module(CLASS, catalog, count=6)
+        result = run_tests(rest_test_factory(
+            module,
+            'ConcurrentTests',
+            concurrency=3,
+        ))
+        self.assertTrue(result.wasSuccessful())
+        result = run_tests(async_rest_test_factory(
+            module,
+            'AsyncTests',
+            concurrency=3,
+        ))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(catalog.seeded, 2)
+        self.assertEqual(len(catalog.torn_down), 2)
+
+
+class FixtureDocumentationTestCase(TestCase):
+
+    def test_fixture_is_documented(self):
+        module, seeded_catalog = get_module(MODULE, Catalog(), count=1)
+        self.assertEqual(
+            _format_setup(module.Catalog0Test),
+            '### Setup Required\n\n'
+            'The catalog must hold the book, "Persuasion".\n\n',
+        )
+
+    def test_fixture_and_set_up_are_documented(self):
+        module, seeded_catalog = get_module(MODULE, Catalog(), count=1)
+
+        class ShelvedTest(module.Catalog0Test):
+
+            def setUp(self):
+                """Shelve the book.
+
+                "Persuasion" must be shelved.
+                """
+
+        self.assertEqual(
+            _format_setup(ShelvedTest),
+            '### Setup Required\n\n'
+            'The catalog must hold the book, "Persuasion".\n\n'
+            '"Persuasion" must be shelved.\n',
+        )
@@ -0,0 +1,109 @@
+"""Tests caching rendered documentation between runs."""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from literate_integration.document import DOCGEN_VERSION
+from literate_integration.driver import (
+    generate_documentation,
+    get_cached_documentations,
+    get_static_documentations,
+)
+from literate_integration.fragments import FragmentCache
+
+from .test_static import DYNAMIC_SOURCE, SOURCE
+
+
+def get_output(files, cache=None):
+    stream = io.StringIO()
+    with contextlib.redirect_stdout(stream):
+        generate_documentation(files, cache=cache)
+    return stream.getvalue()
+
+
+class FragmentCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+        self.path = os.path.join(self.directory, 'fragments.json')
+
+    def write(self, name, source):
+        with open(name + '.py', 'w') as fout:
+            fout.write(source)
+        self.addCleanup(sys.modules.pop, name, None)
+        return name + '.py'
+
+    def run_cached(self, filename):
+        cache = FragmentCache(self.path)
+        documentation = get_cached_documentations(filename, cache)
+        cache.save()
+        self.assertEqual(
+            documentation,
+            list(get_static_documentations(filename)),
+        )
+        return cache
+
+    def test_unchanged_files_are_reused(self):
+        filename = self.write('fragments_books', SOURCE)
+        self.assertEqual(self.run_cached(filename).rendered, 2)
+        self.assertEqual(self.run_cached(filename).rendered, 0)
+
+        # Touching the file doesn't change it.
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        cache = FragmentCache(self.path)
+        self.assertIsNotNone(cache.get(filename))
+
+    def test_only_changed_tests_are_rendered(self):
+        filename = self.write('fragments_changed', SOURCE)
+        self.run_cached(filename)
+        self.write(
+            'fragments_changed',
+            SOURCE.replace("'Emma', 'authors'", "'Persuasion', 'authors'"),
+        )
+        cache = FragmentCache(self.path)
+        self.assertIsNone(cache.get(filename))
+        cache = self.run_cached(filename)
+        self.assertEqual(cache.rendered, 1)
+
+        # The old fragment is dropped.
+        with open(self.path) as fin:
+            self.assertEqual(len(json.load(fin)['fragments']), 2)
+
+    def test_output_matches_a_full_rebuild(self):
+        files = [
+            self.write('fragments_first', SOURCE),
+            self.write('fragments_second', SOURCE.replace('Emma', 'Sanditon')),
+        ]
+        expected = get_output(files)
+        self.assertEqual(get_output(files, self.path), expected)
+        self.assertEqual(get_output(files, self.path), expected)
+
+    def test_new_version_starts_afresh(self):
+        filename = self.write('fragments_version', SOURCE)
+        self.run_cached(filename)
+        with open(self.path) as fin:
+            cached = json.load(fin)
+        cached['version'] = DOCGEN_VERSION + 1
+        with open(self.path, 'w') as fout:
+            json.dump(cached, fout)
+        self.assertEqual(self.run_cached(filename).rendered, 2)
+
+    def test_imported_files_are_not_reused(self):
+        filename = self.write('fragments_dynamic', DYNAMIC_SOURCE)
+        self.run_cached(filename)
+        cache = self.run_cached(filename)
+        self.assertIsNone(cache.get(filename))
+        self.assertEqual(cache.rendered, 0)
@@ -1,10 +1,24 @@
 """Tests literate REST tests."""
 
+import asyncio
 import inspect
+import io
+import json
+import sys
+import threading
+import time
+import types
+import unittest
 from unittest import TestCase
 
+from literate_integration import factories
 from literate_integration.models import LiterateRESTTest
-from literate_integration.factories import rest_test_factory
+from literate_integration.factories import (
+    _get_matcher,
+    async_rest_test_factory,
+    rest_test_factory,
+    run_literate_tests,
+)
 
 # -------------------- HELPERS
 
@@ -94,6 +108,404 @@ class GoodExampleTestCase(TestCase):
         )
 
 
+class PassingExampleTest(LiterateRESTTest):
+    """An example whose mock response satisfies it."""
+
+    url = 'http://localhost:7000/api/books/'
+
+    request_function = get_mock_get(
+        {'count': 2, 'results': [{'id': 1}, {'id': 2}]},
+        200,
+    )
+    request_method = 'GET'
+
+    data = None
+
+    expected_data = {
+        'count': 2,
+        'results': [{'id': 2}],
+    }
+
+    expected_status = 200
+
+
+class CompiledMatcherTestCase(TestCase):
+    """Makes sure generated tests reuse their compiled matchers."""
+
+    def test_generated_test_passes_on_every_run(self):
+        TestClass = rest_test_factory(
+            MockModule(PassingExampleTest),
+            'PassingTests',
+        )
+        for _ in range(3):
+            TestClass('test_passing_example_test').test_passing_example_test()
+
+    def test_matcher_is_cached_per_class_and_content(self):
+        expected = PassingExampleTest.expected_data
+        matcher = _get_matcher(PassingExampleTest, expected)
+        self.assertIs(
+            matcher,
+            _get_matcher(PassingExampleTest, dict(expected)),
+        )
+        self.assertIsNot(
+            matcher,
+            _get_matcher(GoodExampleTest, expected),
+        )
+        self.assertIsNot(
+            matcher,
+            _get_matcher(PassingExampleTest, {'count': 3}),
+        )
+
+    def test_deeply_nested_expected_data(self):
+        expected = {'id': 1}
+        for _ in range(sys.getrecursionlimit() * 3):
+            expected = {'child': [expected]}
+
+        class DeepResponse(object):
+            status_code = 200
+            content = b'(deep)'
+
+            def json(self):
+                return expected
+
+        class DeepTest(PassingExampleTest):
+            expected_data = expected
+
+            def request_function(url, data):
+                return DeepResponse()
+
+        TestClass = rest_test_factory(MockModule(DeepTest), 'DeepTests')
+        TestClass('test_deep_test').test_deep_test()
+
+    def test_only_the_latest_matcher_is_kept(self):
+        for count in range(10):
+            _get_matcher(PassingExampleTest, {'count': count})
+        cached = [
+            key for key in factories._matchers
+            if key[0] is PassingExampleTest
+        ]
+        self.assertEqual(len(cached), 1)
+
+
+class UniqueExampleTest(PassingExampleTest):
+    """An example which needs distinct list elements."""
+
+    list_mode = 'unique'
+
+    expected_data = {
+        'results': [{'id': 2}, {'id': 2}],
+    }
+
+
+class ListModeTestCase(TestCase):
+
+    def test_list_mode_is_used_by_generated_test(self):
+        TestClass = rest_test_factory(
+            MockModule(UniqueExampleTest),
+            'UniqueTests',
+        )
+        with self.assertRaises(Exception):
+            TestClass('test_unique_example_test').test_unique_example_test()
+
+
+class JSONResponse(MockResponse):
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode('utf-8')
+
+    def json(self):
+        raise AssertionError('A streamed response should not be decoded.')
+
+
+class StreamedExampleTest(PassingExampleTest):
+    """An example whose response is matched as a stream."""
+
+    stream_response = True
+
+    @staticmethod
+    def request_function(url, data):
+        return JSONResponse({'count': 2, 'results': [{'id': 1}]}, 200)
+
+
+class StreamedResponseTestCase(TestCase):
+
+    def test_streamed_response_is_matched_without_json(self):
+        TestClass = rest_test_factory(
+            MockModule(StreamedExampleTest),
+            'StreamedTests',
+        )
+        test = TestClass('test_streamed_example_test')
+        with self.assertRaises(Exception) as context:
+            test.test_streamed_example_test()
+        self.assertTrue('/results' in str(context.exception))
+
+
+class StreamingResponse(object):
+    """Like Django's StreamingHttpResponse, which has no `content`."""
+
+    streaming = True
+
+    def __init__(self, chunks, status_code=200):
+        self.streaming_content = iter(chunks)
+        self.status_code = status_code
+
+    @property
+    def content(self):
+        raise AttributeError('This response has no content.')
+
+
+class StreamingExampleTest(StreamedExampleTest):
+    """An example whose response is a stream of chunks."""
+
+    @staticmethod
+    def request_function(url, data):
+        return StreamingResponse([
+            b'{"count": 2, "results": [{"id": 1},',
+            b' {"id": 2}]}',
+        ])
+
+
+class StreamingResponseTestCase(TestCase):
+
+    def test_streaming_content_is_matched(self):
+        TestClass = rest_test_factory(
+            MockModule(StreamingExampleTest),
+            'StreamingTests',
+        )
+        TestClass('test_streaming_example_test').test_streaming_example_test()
+
+    def test_wrong_status_of_streaming_response(self):
+
+        class WrongStatusTest(StreamingExampleTest):
+            expected_status = 201
+
+        TestClass = rest_test_factory(
+            MockModule(WrongStatusTest),
+            'WrongStatusTests',
+        )
+        test = TestClass('test_wrong_status_test')
+        with self.assertRaises(AssertionError) as context:
+            test.test_wrong_status_test()
+        self.assertTrue('200 != 201' in str(context.exception))
+
+
+class RequestLog(object):
+    """Records how many requests are in flight."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.events = []
+
+    def get_request_function(self, name):
+        def request_function(url, data):
+            with self.lock:
+                self.in_flight += 1
+                self.most_in_flight = max(self.most_in_flight, self.in_flight)
+                self.events.append(('start', name))
+            time.sleep(self.delay)
+            with self.lock:
+                self.in_flight -= 1
+                self.events.append(('end', name))
+            return MockResponse({'name': name}, 200)
+        return request_function
+
+
+def get_slow_module(log, count, serial=()):
+    klasses = {}
+    for i in range(count):
+        name = 'Slow{}Test'.format(i)
+        klasses[name] = type(name, (LiterateRESTTest,), {
+            'url': '/slow/{}/'.format(i),
+            'data': None,
+            'request_method': 'GET',
+            'request_function': staticmethod(log.get_request_function(name)),
+            'expected_data': {'name': name if i != 3 else 'wrong'},
+            'expected_status': 200,
+            'concurrent': name not in serial,
+        })
+    return types.SimpleNamespace(**klasses)
+
+
+def run_tests(TestClass):
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestClass)
+    return unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+
+
+class ConcurrentRunnerTestCase(TestCase):
+
+    def test_requests_are_sent_concurrently(self):
+        log = RequestLog(0.1)
+        TestClass = rest_test_factory(
+            get_slow_module(log, 8),
+            'SlowTests',
+            concurrency=4,
+        )
+        start = time.time()
+        result = run_tests(TestClass)
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(log.most_in_flight, 4)
+        self.assertEqual(result.testsRun, 8)
+        # Each test reports its own result.
+        problems = result.failures + result.errors
+        self.assertEqual(len(problems), 1)
+        self.assertTrue('test_slow3_test' in str(problems[0][0]))
+
+    def test_serial_tests_run_alone(self):
+        log = RequestLog(0.05)
+        TestClass = rest_test_factory(
+            get_slow_module(log, 6, serial=('Slow0Test',)),
+            'SlowTests',
+            concurrency=3,
+        )
+        run_tests(TestClass)
+        start = log.events.index(('start', 'Slow0Test'))
+        self.assertEqual(
+            log.events[start:start + 2],
+            [('start', 'Slow0Test'), ('end', 'Slow0Test')],
+        )
+        self.assertTrue(start >= 10)
+
+    def test_only_the_tests_being_run_send_requests(self):
+        log = RequestLog(0)
+        TestClass = rest_test_factory(
+            get_slow_module(log, 6),
+            'SlowTests',
+            concurrency=3,
+        )
+        suite = unittest.TestSuite([TestClass('test_slow0_test')])
+        result = unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(log.events, [
+            ('start', 'Slow0Test'),
+            ('end', 'Slow0Test'),
+        ])
+
+    def test_only_the_tests_selected_by_pytest_send_requests(self):
+        log = RequestLog(0)
+        TestClass = rest_test_factory(
+            get_slow_module(log, 6),
+            'SlowTests',
+            concurrency=3,
+        )
+        # pytest makes every instance, but only runs the selected items.
+        tests = [
+            TestClass('test_slow{}_test'.format(i)) for i in range(6)
+        ]
+        result = unittest.TestResult()
+        result.session = types.SimpleNamespace(items=[
+            types.SimpleNamespace(name=name, cls=TestClass)
+            for name in ('test_slow1_test', 'test_slow2_test')
+        ])
+        TestClass.setUpClass()
+        try:
+            tests[1].run(result)
+            tests[2].run(result)
+        finally:
+            TestClass.tearDownClass()
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(
+            sorted(set(name for _, name in log.events)),
+            ['Slow1Test', 'Slow2Test'],
+        )
+
+    def test_without_concurrency_requests_are_sequential(self):
+        log = RequestLog(0)
+        run_tests(rest_test_factory(get_slow_module(log, 4), 'SlowTests'))
+        self.assertEqual(log.most_in_flight, 1)
+
+
+class AsyncRequestLog(RequestLog):
+    """Records how many asynchronous requests are in flight."""
+
+    def get_request_function(self, name):
+        async def request_function(url, data):
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+            self.events.append(('start', name))
+            await asyncio.sleep(self.delay)
+            self.in_flight -= 1
+            self.events.append(('end', name))
+            return MockResponse({'name': name}, 200)
+        return request_function
+
+
+class AsyncRunnerTestCase(TestCase):
+
+    def test_coroutine_request_function_in_synchronous_test(self):
+        log = AsyncRequestLog(0)
+        result = run_tests(rest_test_factory(
+            get_slow_module(log, 4),
+            'AsyncTests',
+        ))
+        self.assertEqual(result.testsRun, 4)
+        self.assertEqual(len(result.failures + result.errors), 1)
+
+    def test_asynchronous_tests(self):
+        log = AsyncRequestLog(0)
+        result = run_tests(async_rest_test_factory(
+            get_slow_module(log, 4),
+            'AsyncTests',
+        ))
+        self.assertEqual(result.testsRun, 4)
+        self.assertEqual(log.most_in_flight, 1)
+        problems = result.failures + result.errors
+        self.assertEqual(len(problems), 1)
+        self.assertTrue('test_slow3_test' in str(problems[0][0]))
+
+    def test_asynchronous_tests_are_run_concurrently(self):
+        log = AsyncRequestLog(0.1)
+        TestClass = async_rest_test_factory(
+            get_slow_module(log, 12, serial=('Slow5Test',)),
+            'AsyncTests',
+            concurrency=5,
+        )
+        start = time.time()
+        result = run_tests(TestClass)
+        self.assertTrue(time.time() - start < 0.8)
+        self.assertEqual(log.most_in_flight, 5)
+        self.assertEqual(result.testsRun, 12)
+        problems = result.failures + result.errors
+        self.assertEqual(len(problems), 1)
+        self.assertTrue('test_slow3_test' in str(problems[0][0]))
+        self.assertEqual(log.events[-2:], [
+            ('start', 'Slow5Test'),
+            ('end', 'Slow5Test'),
+        ])
+
+    def test_only_the_tests_being_run_are_scheduled(self):
+        log = AsyncRequestLog(0)
+        TestClass = async_rest_test_factory(
+            get_slow_module(log, 6),
+            'AsyncTests',
+            concurrency=3,
+        )
+        suite = unittest.TestSuite([TestClass('test_slow2_test')])
+        result = unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(log.events, [
+            ('start', 'Slow2Test'),
+            ('end', 'Slow2Test'),
+        ])
+
+    def test_run_literate_tests(self):
+        log = AsyncRequestLog(0.01)
+        module = get_slow_module(log, 6)
+        checked = []
+        results = asyncio.run(run_literate_tests(
+            list(vars(module).values()),
+            concurrency=2,
+            on_result=lambda klass, error: checked.append(klass.__name__),
+        ))
+        self.assertEqual(log.most_in_flight, 2)
+        self.assertEqual(len(checked), 6)
+        failed = [k.__name__ for k, error in results.items() if error]
+        self.assertEqual(failed, ['Slow3Test'])
+
+
 # -------------------- BAD EXAMPLE
 
 class MissingDataTest(LiterateRESTTest):
@@ -0,0 +1,133 @@
+"""Tests replaying literate tests as load."""
+
+import time
+from unittest import TestCase
+
+from literate_integration.load import Histogram, PRECISION, run_load
+from literate_integration.models import LiterateRESTTest
+
+from .test_literate_rest_test import (
+    GoodExampleTest,
+    MockModule,
+    MockResponse,
+    PassingExampleTest,
+)
+
+
+class MismatchedExampleTest(LiterateRESTTest):
+    """An example whose response has the right status, but wrong data."""
+
+    url = 'http://localhost:7000/api/books/1/'
+
+    @staticmethod
+    def request_function(url, data):
+        return MockResponse({'id': 2}, 200)
+
+    request_method = 'GET'
+
+    data = None
+
+    expected_data = {'id': 1}
+
+    expected_status = 200
+
+
+class SlowExampleTest(PassingExampleTest):
+    """An example which takes a while to answer."""
+
+    @staticmethod
+    def request_function(url, data):
+        time.sleep(0.01)
+        return MockResponse({'count': 2, 'results': [{'id': 2}]}, 200)
+
+
+class HistogramTestCase(TestCase):
+
+    def test_percentiles_are_within_precision(self):
+        histogram = Histogram()
+        latencies = [i / 1000.0 for i in range(1, 1001)]
+        for latency in reversed(latencies):
+            histogram.record(latency)
+        for percent in (50, 95, 99, 100):
+            exact = latencies[percent * 10 - 1]
+            self.assertGreaterEqual(histogram.percentile(percent), exact)
+            self.assertLessEqual(
+                histogram.percentile(percent),
+                exact * (1 + PRECISION),
+            )
+
+    def test_merge(self):
+        first, second = Histogram(), Histogram()
+        first.record(0.001)
+        second.record(0.1)
+        second.record(0.1)
+        first.merge(second)
+        self.assertEqual(first.count, 3)
+        self.assertAlmostEqual(first.percentile(50), 0.1, delta=0.001)
+
+    def test_empty(self):
+        self.assertIsNone(Histogram().percentile(50))
+        self.assertIsNone(Histogram().mean)
+
+
+class RunLoadTestCase(TestCase):
+
+    def test_reports_each_class(self):
+        report = run_load(
+            [PassingExampleTest, GoodExampleTest],
+            0.05,
+            concurrency=2,
+            sample=1.0,
+        )
+        passing = report.stats['PassingExampleTest']
+        good = report.stats['GoodExampleTest']
+        self.assertGreater(passing.requests, 0)
+        self.assertEqual(passing.errors, 0)
+        self.assertEqual(passing.sampled, passing.requests)
+        # The good example's mock answers with a 400.
+        self.assertEqual(good.errors, good.requests)
+        self.assertEqual(good.mismatches, 0)
+        row = passing.to_dict(report.elapsed)
+        self.assertEqual(row['error_rate'], 0.0)
+        self.assertLessEqual(row['p50'], row['p95'])
+        self.assertLessEqual(row['p95'], row['p99'])
+        self.assertIn('PassingExampleTest', report.format())
+
+    def test_sampled_responses_are_validated(self):
+        report = run_load([MismatchedExampleTest], 0.05, sample=1.0)
+        stats = report.stats['MismatchedExampleTest']
+        self.assertEqual(stats.mismatches, stats.requests)
+        self.assertEqual(stats.errors, stats.requests)
+
+        report = run_load([MismatchedExampleTest], 0.05, sample=0.0)
+        stats = report.stats['MismatchedExampleTest']
+        self.assertEqual(stats.sampled, 0)
+        self.assertEqual(stats.errors, 0)
+
+    def test_rate_limits_requests(self):
+        report = run_load(
+            [PassingExampleTest],
+            0.2,
+            concurrency=4,
+            rate=50,
+        )
+        # At 50 requests a second, 0.2 seconds holds 10 requests.
+        self.assertEqual(report.stats['PassingExampleTest'].requests, 10)
+
+    def test_rate_counts_time_behind_schedule(self):
+        # The requests take 10ms, but one is due every 2.5ms, so they
+        # fall further and further behind.
+        report = run_load([SlowExampleTest], 0.1, rate=400)
+        stats = report.stats['SlowExampleTest']
+        self.assertEqual(stats.requests, 40)
+        self.assertGreater(stats.latencies.percentile(99), 0.2)
+        self.assertGreater(stats.latencies.mean, 0.1)
+
+    def test_concurrency(self):
+        report = run_load([SlowExampleTest], 0.1, concurrency=5)
+        # Each thread can only send about ten requests alone.
+        self.assertGreater(report.stats['SlowExampleTest'].requests, 20)
+
+    def test_accepts_module(self):
+        report = run_load(MockModule(PassingExampleTest), 0.01)
+        self.assertEqual(list(report.stats), ['PassingExampleTest'])
@@ -0,0 +1,97 @@
+"""Tests compiling literate tests into a manifest."""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from literate_integration.document import generate_rest_documentation
+from literate_integration.driver import generate_documentation
+from literate_integration.manifest import (
+    Manifest,
+    ManifestError,
+    compile_manifest,
+    write_manifest,
+)
+from literate_integration.spec import get_spec
+
+from .test_literate_rest_test import GoodExampleTest, PassingExampleTest
+from .test_spec import CountedTest, SetUpTest
+
+
+def get_output(files):
+    stream = io.StringIO()
+    with contextlib.redirect_stdout(stream):
+        generate_documentation(files)
+    return stream.getvalue()
+
+
+class ManifestTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'tests.litman')
+
+    def test_entries_are_read_back(self):
+        klasses = [GoodExampleTest, CountedTest, SetUpTest]
+        write_manifest(self.path, klasses)
+        with Manifest(self.path) as manifest:
+            self.assertEqual(len(manifest), 3)
+            self.assertEqual(list(manifest), [
+                'tests.test_literate_rest_test.GoodExampleTest',
+                'tests.test_spec.CountedTest',
+                'tests.test_spec.SetUpTest',
+            ])
+            self.assertTrue('tests.test_spec.CountedTest' in manifest)
+            self.assertFalse('tests.test_spec.MissingTest' in manifest)
+            for klass in klasses:
+                key = '{}.{}'.format(klass.__module__, klass.__qualname__)
+                self.assertEqual(manifest.get_spec(key), get_spec(klass))
+                self.assertEqual(
+                    manifest.get_documentation(key),
+                    generate_rest_documentation(klass),
+                )
+                self.assertEqual(len(manifest.get_digest(key)), 40)
+            spec = manifest.get_spec('tests.test_spec.SetUpTest')
+            self.assertEqual(spec.dynamic, ('url',))
+            with self.assertRaises(KeyError):
+                manifest.get_spec('tests.test_spec.MissingTest')
+
+    def test_digests_are_stable(self):
+        keys = [
+            'tests.test_literate_rest_test.GoodExampleTest',
+            'tests.test_literate_rest_test.PassingExampleTest',
+        ]
+        write_manifest(self.path, [GoodExampleTest, PassingExampleTest])
+        with Manifest(self.path) as manifest:
+            digests = [manifest.get_digest(key) for key in keys]
+        self.assertNotEqual(digests[0], digests[1])
+        write_manifest(self.path, [PassingExampleTest, GoodExampleTest])
+        with Manifest(self.path) as manifest:
+            self.assertEqual(
+                [manifest.get_digest(key) for key in keys],
+                digests,
+            )
+
+    def test_docgen_reads_manifests(self):
+        files = ['tests/test_registry.py', 'tests/test_spec.py']
+        # Each file's tests include those it imports.
+        self.assertEqual(compile_manifest(files, self.path), 9)
+        self.assertEqual(get_output([self.path]), get_output(files))
+
+    def test_invalid_files(self):
+        for content in (b'', b'not a manifest at all'):
+            with open(self.path, 'wb') as fout:
+                fout.write(content)
+            with self.assertRaises(ManifestError):
+                Manifest(self.path)
+        write_manifest(self.path, [GoodExampleTest])
+        with open(self.path, 'rb') as fin:
+            content = fin.read()
+        with open(self.path, 'wb') as fout:
+            fout.write(content[:20])
+        with self.assertRaises(ManifestError):
+            Manifest(self.path)
@@ -1,11 +1,33 @@
 """Tests for the response matcher."""
 
-from unittest import TestCase
+import hashlib
+import itertools
+import json
+import multiprocessing
+import pickle
+import random
+import sys
+import threading
+from unittest import TestCase, mock
 
+from literate_integration import matcher as matcher_module
 from literate_integration.matcher import (
+    Each,
+    InRange,
+    OfType,
+    Regex,
+    LIST_MODES,
     Matcher,
     MatcherException,
+    ORDERED,
+    Ordered,
+    UNIQUE,
+    Unique,
+    _match_iteratively,
+    _maximum_matching,
     assertMatches,
+    assertMatchesMany,
+    content_hash,
 )
 
 
@@ -68,4 +90,493 @@ class MatcherTestCase(TestCase):
         self.assertTrue(
             len(message) > 0
         )
-        self.assertTrue('In dict' in message)
+        self.assertTrue('/a/0/b' in message)
+
+    def test_compiled_matcher_can_be_reused(self):
+        matcher = Matcher({'results': [{'name': 'A'}]})
+        for _ in range(3):
+            self.assertTrue(matcher.matches({'results': [{'name': 'A'}]}))
+            self.assertFalse(matcher.matches({'results': [{'name': 'B'}]}))
+
+    def test_assert_matches_accepts_compiled_matcher(self):
+        matcher = Matcher({'a': 1})
+        assertMatches(matcher, {'a': 1})
+        with self.assertRaises(MatcherException):
+            assertMatches(matcher, {'a': 2})
+
+    def test_content_hash_ignores_key_order(self):
+        self.assertEqual(
+            content_hash({'a': 1, 'b': [1, 2]}),
+            content_hash({'b': [1, 2], 'a': 1}),
+        )
+        self.assertNotEqual(
+            content_hash({'a': 1}),
+            content_hash({'a': 2}),
+        )
+
+    def test_content_hash_is_the_hash_of_the_json(self):
+        value = {
+            'b': [1, 2.5, None, True, ('x', 'é')],
+            'a': {2: 'two', 1: {'c': Regex('[0-9]+')}},
+        }
+        encoded = json.dumps(
+            value,
+            sort_keys=True,
+            separators=(',', ':'),
+            default=repr,
+        )
+        self.assertEqual(
+            content_hash(value),
+            hashlib.sha1(encoded.encode('utf-8')).hexdigest(),
+        )
+
+    def test_content_hash_rejects_cycles(self):
+        value = []
+        value.append(value)
+        with self.assertRaises(ValueError):
+            content_hash(value)
+
+
+class IndexedListMatcherTestCase(TestCase):
+    """Tests for matching against long lists."""
+
+    def setUp(self):
+        self.rows = [
+            {'id': i, 'name': 'Row {}'.format(i), 'tags': [i % 3]}
+            for i in range(100)
+        ]
+
+    def test_dicts_with_terminal_keys_are_found(self):
+        matcher = Matcher([
+            {'id': 3, 'name': 'Row 3'},
+            {'id': 97, 'tags': [1]},
+        ])
+        self.assertTrue(matcher.matches(self.rows))
+
+    def test_index_requires_all_terminal_keys(self):
+        self.assertFalse(Matcher([{'id': 3, 'name': 'Row 4'}]).matches(
+            self.rows
+        ))
+        self.assertFalse(Matcher([{'id': 97, 'tags': [0]}]).matches(
+            self.rows
+        ))
+
+    def test_terminal_elements_are_found(self):
+        values = list(range(100)) + [[1], {'a': 1}]
+        self.assertTrue(Matcher([42, 99]).matches(values))
+        self.assertFalse(Matcher([100]).matches(values))
+
+    def test_index_keeps_equality_semantics(self):
+        values = list(range(2, 20)) + [True]
+        self.assertTrue(Matcher([1.0]).matches(values))
+
+    def test_unhashable_and_non_dict_elements_are_skipped(self):
+        values = [[1], 'id', None, {'id': [1]}] * 5 + [{'id': 1}]
+        self.assertTrue(Matcher([{'id': 1}]).matches(values))
+        self.assertFalse(Matcher([{'id': 2}]).matches(values))
+
+    def test_elements_without_terminal_keys_are_scanned(self):
+        self.assertTrue(Matcher([{'tags': [2]}]).matches(self.rows))
+        self.assertFalse(Matcher([{'tags': [3]}]).matches(self.rows))
+
+
+class UniqueListMatcherTestCase(TestCase):
+    """Tests for matching list elements one-to-one."""
+
+    def test_duplicates_need_distinct_elements(self):
+        expected = [{'name': 'A'}, {'name': 'A'}]
+        self.assertTrue(Matcher(expected).matches([{'name': 'A'}]))
+        self.assertFalse(
+            Matcher(expected, list_mode=UNIQUE).matches([{'name': 'A'}])
+        )
+        self.assertTrue(Matcher(expected, list_mode=UNIQUE).matches(
+            [{'name': 'B'}, {'name': 'A'}, {'name': 'A', 'id': 2}]
+        ))
+
+    def test_assignment_is_not_greedy(self):
+        # The first expected element can match either actual element,
+        # but the second can only match the first.
+        expected = Unique([{'a': 1}, {'a': 1, 'b': 2}])
+        self.assertTrue(Matcher(expected).matches([
+            {'a': 1, 'b': 2},
+            {'a': 1},
+        ]))
+
+    def test_marker_applies_to_subtree(self):
+        matcher = Matcher({'results': Unique([1, 1])})
+        self.assertFalse(matcher.matches({'results': [1, 2]}))
+        self.assertTrue(matcher.matches({'results': [1, 2, 1]}))
+
+    def test_unsupported_list_mode_raises(self):
+        with self.assertRaises(Exception):
+            Matcher([1], list_mode='sometimes')
+
+    def test_large_lists_match(self):
+        values = [{'id': i % 50, 'row': i} for i in range(500)]
+        expected = [{'id': i % 50} for i in range(500)]
+        self.assertTrue(Matcher(expected, list_mode=UNIQUE).matches(values))
+        self.assertFalse(
+            Matcher(expected + [{'id': 0}], list_mode=UNIQUE).matches(values)
+        )
+
+    def test_maximum_matching_agrees_with_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            left = rng.randint(0, 5)
+            right = rng.randint(0, 5)
+            adjacency = [
+                [j for j in range(right) if rng.random() < 0.4]
+                for _ in range(left)
+            ]
+            best = 0
+            for size in range(min(left, right), 0, -1):
+                found = any(
+                    all(
+                        rights[i] in adjacency[lefts[i]]
+                        for i in range(size)
+                    )
+                    for lefts in itertools.combinations(range(left), size)
+                    for rights in itertools.permutations(range(right), size)
+                )
+                if found:
+                    best = size
+                    break
+            self.assertEqual(_maximum_matching(adjacency, right), best)
+
+
+class OrderedListMatcherTestCase(TestCase):
+    """Tests for matching list elements in order."""
+
+    def test_subsequence_matches(self):
+        matcher = Matcher([1, 3], list_mode=ORDERED)
+        self.assertTrue(matcher.matches([1, 2, 3]))
+        self.assertTrue(matcher.matches([0, 1, 3]))
+        self.assertFalse(matcher.matches([3, 2, 1]))
+        self.assertFalse(matcher.matches([1]))
+
+    def test_elements_are_not_reused(self):
+        matcher = Matcher([{'a': 1}, {'a': 1}], list_mode=ORDERED)
+        self.assertFalse(matcher.matches([{'a': 1}]))
+        self.assertTrue(matcher.matches([{'a': 1}, {'b': 2}, {'a': 1}]))
+
+    def test_ordered_marker_inside_unordered_value(self):
+        matcher = Matcher({
+            'timeline': Ordered([{'day': 1}, {'day': 2}]),
+            'tags': ['b', 'a'],
+        })
+        self.assertTrue(matcher.matches({
+            'timeline': [{'day': 1}, {'day': 2}],
+            'tags': ['a', 'b'],
+        }))
+        self.assertFalse(matcher.matches({
+            'timeline': [{'day': 2}, {'day': 1}],
+            'tags': ['a', 'b'],
+        }))
+
+    def test_nested_lists_inherit_mode(self):
+        matcher = Matcher(Ordered([[2, 1]]))
+        self.assertTrue(matcher.matches([[2, 0, 1]]))
+        self.assertFalse(matcher.matches([[1, 2]]))
+
+
+class FailureMessageTestCase(TestCase):
+    """Tests for the messages of failed matches."""
+
+    def get_exception(self, expected, actual):
+        with self.assertRaises(MatcherException) as context:
+            assertMatches(expected, actual)
+        return context.exception
+
+    def test_path_is_a_json_pointer(self):
+        exception = self.get_exception(
+            {'results': [{'id': 3, 'a/b': {'c~': 1}}]},
+            {'results': [{'id': 3, 'a/b': {'c~': 2}}]},
+        )
+        self.assertEqual(exception.path, '/results/0/a~1b/c~0')
+        self.assertEqual(
+            exception.message,
+            'At /results/0/a~1b/c~0: Expected 1 but received 2',
+        )
+
+    def test_missing_key_is_reported(self):
+        exception = self.get_exception({'a': {'b': 1}}, {'a': {}})
+        self.assertEqual(exception.path, '/a')
+        self.assertTrue("'b' was not present" in exception.message)
+
+    def test_root_failure_has_no_path(self):
+        exception = self.get_exception(1, 2)
+        self.assertEqual(exception.path, '')
+        self.assertEqual(exception.message, 'Expected 1 but received 2')
+
+    def test_unmatched_list_item_is_reported(self):
+        exception = self.get_exception(
+            {'results': [{'name': 'A'}, {'name': 'C'}]},
+            {'results': [{'name': 'A'}, {'name': 'B'}]},
+        )
+        self.assertEqual(exception.path, '/results')
+        self.assertTrue('expected item 1' in exception.message)
+
+    def test_preview_of_large_value_is_bounded(self):
+        actual = {'results': {'rows': list(range(100000))}}
+        exception = self.get_exception({'results': []}, actual)
+        self.assertTrue(exception.message.startswith(
+            'At /results: Expected list but received'
+        ))
+        self.assertTrue(len(exception.message) < 200)
+
+    def test_concurrent_failures_keep_their_own_paths(self):
+        matcher = Matcher({'a': {'b': [{'id': 1, 'c': 1}]}, 'd': 1})
+        cases = [
+            ({'a': {'b': [{'id': 1, 'c': 2}]}, 'd': 1}, '/a/b/0/c'),
+            ({'a': {'b': [{'id': 1, 'c': 1}]}, 'd': 2}, '/d'),
+            ({'a': {'b': [{'id': 1, 'c': 1}]}, 'd': 1}, None),
+        ]
+        barrier = threading.Barrier(len(cases) * 4)
+        errors = []
+
+        def check(actual, expected_path):
+            barrier.wait()
+            for _ in range(200):
+                try:
+                    assertMatches(matcher, actual)
+                    path = None
+                except MatcherException as mex:
+                    path = mex.path
+                if path != expected_path:
+                    errors.append((expected_path, path))
+
+        threads = [
+            threading.Thread(target=check, args=case)
+            for case in cases * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_assert_matches_is_reentrant(self):
+        class Inner(object):
+            def __eq__(self, other):
+                # Run a failing assertion in the middle of another.
+                with self.assertRaises(MatcherException):
+                    assertMatches({'x': 1}, {'x': 2})
+                return False
+
+        inner = Inner()
+        inner.assertRaises = self.assertRaises
+        with self.assertRaises(MatcherException) as context:
+            assertMatches({'y': 1}, {'y': inner})
+        self.assertEqual(context.exception.path, '/y')
+
+
+def _nest(depth, leaf):
+    value = leaf
+    for i in range(depth):
+        value = {'level': i, 'child': [value]}
+    return value
+
+
+class IterativeMatcherTestCase(TestCase):
+    """Tests for the explicit-stack matching engine."""
+
+    def random_value(self, rng, depth):
+        kind = rng.randint(0, 3 if depth > 0 else 1)
+        if kind == 0:
+            return rng.randint(0, 3)
+        if kind == 1:
+            return rng.choice(['a', 'b', None, True])
+        if kind == 2:
+            return [
+                self.random_value(rng, depth - 1)
+                for _ in range(rng.randint(0, 4))
+            ]
+        return {
+            key: self.random_value(rng, depth - 1)
+            for key in rng.sample('abcd', rng.randint(0, 3))
+        }
+
+    def test_agrees_with_recursive_engine(self):
+        rng = random.Random(11)
+        for mode in LIST_MODES:
+            for _ in range(300):
+                matcher = Matcher(self.random_value(rng, 3), list_mode=mode)
+                actual = self.random_value(rng, 4)
+                self.assertEqual(
+                    matcher.matches(actual),
+                    _match_iteratively(matcher.matcher, actual, max_depth=0),
+                )
+                # A value always matches itself.
+                itself = Matcher(actual, list_mode=mode)
+                self.assertTrue(
+                    _match_iteratively(itself.matcher, actual, max_depth=0)
+                )
+
+    def test_deeply_nested_values_match(self):
+        depth = sys.getrecursionlimit() * 3
+        expected = _nest(depth, {'id': 1})
+        self.assertTrue(Matcher(expected).matches(_nest(depth, {'id': 1})))
+        self.assertFalse(Matcher(expected).matches(_nest(depth, {'id': 2})))
+
+    def test_deeply_nested_values_are_hashed(self):
+        depth = sys.getrecursionlimit() * 3
+        self.assertEqual(
+            content_hash(_nest(depth, {'id': 1})),
+            content_hash(_nest(depth, {'id': 1})),
+        )
+        self.assertNotEqual(
+            content_hash(_nest(depth, {'id': 1})),
+            content_hash(_nest(depth, {'id': 2})),
+        )
+
+    def test_deeply_nested_failures_are_explained(self):
+        depth = sys.getrecursionlimit() * 2
+        with self.assertRaises(MatcherException) as context:
+            assertMatches(_nest(depth, 1), _nest(depth, 2))
+        self.assertEqual(
+            context.exception.path,
+            '/child/0' * depth,
+        )
+
+
+class BatchMatcherTestCase(TestCase):
+    """Tests for matching many values at once."""
+
+    def setUp(self):
+        self.matcher = Matcher({'status': 'ok', 'items': [{'id': 1}]})
+        self.payloads = [
+            {'status': 'ok', 'items': [{'id': i % 3}, {'id': 1}]}
+            if i % 4 else
+            {'status': 'failed', 'items': []}
+            for i in range(40)
+        ]
+
+    def test_results_are_in_order(self):
+        results = self.matcher.match_batch(iter(self.payloads))
+        self.assertEqual([r.index for r in results], list(range(40)))
+        self.assertEqual(
+            [r.matched for r in results],
+            [bool(i % 4) for i in range(40)],
+        )
+        self.assertEqual(results[0].path, '/status')
+        self.assertEqual(results[1].message, '')
+
+    def test_raw_bodies_are_streamed(self):
+        bodies = [json.dumps(p).encode('utf-8') for p in self.payloads]
+        self.assertEqual(
+            self.matcher.match_batch(bodies),
+            self.matcher.match_batch(self.payloads),
+        )
+
+    def test_process_pool_gives_same_results(self):
+        self.assertEqual(
+            self.matcher.match_batch(self.payloads, processes=2, chunksize=7),
+            self.matcher.match_batch(self.payloads),
+        )
+
+    def test_pickled_matchers_index_lists(self):
+        matcher = pickle.loads(pickle.dumps(Matcher([5])))
+        self.assertTrue(matcher.matches(list(range(20))))
+
+    def test_spawned_process_pool_gives_same_results(self):
+        # Spawned processes unpickle the matcher in a fresh interpreter.
+        context = multiprocessing.get_context('spawn')
+        matcher = Matcher([5])
+        payloads = [list(range(20)), [1] * 20]
+        with mock.patch.object(matcher_module.multiprocessing, 'Pool',
+                               context.Pool):
+            results = matcher.match_batch(payloads, processes=2)
+        self.assertEqual([r.matched for r in results], [True, False])
+
+    def test_assert_matches_many(self):
+        good = [p for p in self.payloads if p['status'] == 'ok']
+        self.assertEqual(len(assertMatchesMany(self.matcher, good)), 30)
+        with self.assertRaises(MatcherException) as context:
+            assertMatchesMany(self.matcher, self.payloads)
+        self.assertTrue(context.exception.message.startswith(
+            '10 of 40 values did not match:'
+        ))
+        self.assertEqual(context.exception.path, '/status')
+        self.assertEqual(len(context.exception.results), 40)
+
+
+class ExpectationTestCase(TestCase):
+    """Tests for type, pattern, range and all-element expectations."""
+
+    ISO_DATE = r'^[0-9]{4}-[0-9]{2}-[0-9]{2}'
+
+    def test_types_are_matched_exactly(self):
+        self.assertTrue(Matcher(OfType(int)).matches(3))
+        self.assertFalse(Matcher(OfType(int)).matches(True))
+        self.assertFalse(Matcher(OfType(int)).matches(3.0))
+        self.assertTrue(Matcher(OfType(int, float)).matches(3.0))
+        self.assertTrue(Matcher(OfType(type(None))).matches(None))
+        self.assertTrue(Matcher(OfType(dict)).matches({}))
+
+    def test_regex(self):
+        matcher = Matcher({'created': Regex(self.ISO_DATE)})
+        self.assertTrue(matcher.matches({'created': '2018-03-01T12:00'}))
+        self.assertFalse(matcher.matches({'created': 'March 1st'}))
+        self.assertFalse(matcher.matches({'created': 20180301}))
+
+    def test_range(self):
+        self.assertTrue(Matcher(InRange(0, 10)).matches(10))
+        self.assertTrue(Matcher(InRange(0, 10)).matches(0.5))
+        self.assertFalse(Matcher(InRange(0, 10)).matches(11))
+        self.assertFalse(Matcher(InRange(0, 10)).matches('5'))
+        self.assertTrue(Matcher(InRange(minimum=5)).matches(1e9))
+        self.assertFalse(Matcher(InRange(maximum=5)).matches(True))
+
+    def test_each(self):
+        matcher = Matcher({'results': Each({
+            'id': OfType(int),
+            'created': Regex(self.ISO_DATE),
+        })})
+        rows = [
+            {'id': i, 'created': '2018-03-{:02}'.format(i + 1)}
+            for i in range(20)
+        ]
+        self.assertTrue(matcher.matches({'results': rows}))
+        self.assertTrue(matcher.matches({'results': []}))
+        rows[13] = {'id': '13', 'created': '2018-03-14'}
+        self.assertFalse(matcher.matches({'results': rows}))
+        with self.assertRaises(MatcherException) as context:
+            assertMatches(matcher, {'results': rows})
+        self.assertEqual(context.exception.path, '/results/13/id')
+        self.assertEqual(
+            context.exception.message,
+            "At /results/13/id: Expected int but received '13'",
+        )
+
+    def test_each_type_fast_path(self):
+        self.assertTrue(Matcher(Each(OfType(str))).matches(['a', 'b']))
+        self.assertFalse(Matcher(Each(OfType(str))).matches(['a', 1]))
+        self.assertFalse(Matcher(Each(OfType(str))).matches('ab'))
+
+    def test_expectations_inside_lists(self):
+        matcher = Matcher([{'id': 3, 'score': InRange(0, 1)}])
+        self.assertTrue(matcher.matches(
+            [{'id': i, 'score': i / 10} for i in range(10)]
+        ))
+        self.assertFalse(matcher.matches(
+            [{'id': i, 'score': i} for i in range(10)]
+        ))
+
+    def test_expectations_are_hashed_by_content(self):
+        self.assertEqual(
+            content_hash({'a': Each(OfType(int))}),
+            content_hash({'a': Each(OfType(int))}),
+        )
+        self.assertNotEqual(
+            content_hash({'a': Each(OfType(int))}),
+            content_hash({'a': Each(OfType(str))}),
+        )
+
+    def test_iterative_engine(self):
+        matcher = Matcher({'a': Each({'b': OfType(int)})})
+        self.assertTrue(_match_iteratively(
+            matcher.matcher, {'a': [{'b': 1}]}, max_depth=0,
+        ))
+        self.assertFalse(_match_iteratively(
+            matcher.matcher, {'a': [{'b': 1}, {}]}, max_depth=0,
+        ))
@@ -0,0 +1,170 @@
+"""Tests the registry of literate tests."""
+
+import abc
+import sys
+import types
+from unittest import TestCase
+
+from literate_integration.driver import get_documentations
+from literate_integration.factories import rest_test_factory
+from literate_integration.models import LiterateRESTTest
+from literate_integration.registry import (
+    find_incomplete_tests,
+    find_literate_tests,
+    get_abstract_attributes,
+    get_literate_tests,
+    is_registered,
+)
+
+# A module's literate tests include those it imports.
+from .test_literate_rest_test import (
+    MockResponse,
+    PassingExampleTest,
+    run_tests,
+)
+
+
+def request_function(url, data):
+    return MockResponse({'url': url}, 200)
+
+
+class RegisteredBaseTest(LiterateRESTTest):
+    """A base for literate tests, which leaves `url` undefined."""
+
+    abstract = True
+    data = None
+    request_method = 'GET'
+    request_function = staticmethod(request_function)
+    expected_status = 200
+
+    @property
+    def expected_data(self):
+        return {'url': self.url}
+
+
+class ListRegisteredBooksTest(RegisteredBaseTest):
+    """Listing books."""
+
+    url = '/books/'
+    tags = ('books', 'registry-smoke')
+
+
+class ListRegisteredAuthorsTest(RegisteredBaseTest):
+    """Listing authors."""
+
+    url = '/authors/'
+    tags = ('registry-smoke',)
+
+
+class RegistryTestCase(TestCase):
+
+    def test_abstract_classes_are_not_registered(self):
+        self.assertFalse(is_registered(LiterateRESTTest))
+        self.assertFalse(is_registered(RegisteredBaseTest))
+        self.assertEqual(
+            get_abstract_attributes(RegisteredBaseTest),
+            frozenset(['url']),
+        )
+        self.assertTrue(is_registered(ListRegisteredBooksTest))
+        self.assertEqual(
+            get_abstract_attributes(ListRegisteredBooksTest),
+            frozenset(),
+        )
+
+    def test_abstract_attributes_match_abc(self):
+        class AbstractTest(RegisteredBaseTest):
+            @abc.abstractmethod
+            def extra(self):
+                ...
+
+        self.assertEqual(
+            get_abstract_attributes(AbstractTest),
+            AbstractTest.__abstractmethods__,
+        )
+        self.assertFalse(is_registered(AbstractTest))
+
+    def test_incomplete_tests_fail(self):
+        class IncompleteTest(RegisteredBaseTest):
+            """Forgets its url."""
+
+        class BaseLiterateRESTTest(RegisteredBaseTest):
+            """Named as a base."""
+
+        module = types.ModuleType('incomplete')
+        module.IncompleteTest = IncompleteTest
+        module.BaseLiterateRESTTest = BaseLiterateRESTTest
+        module.RegisteredBaseTest = RegisteredBaseTest
+        self.assertFalse(is_registered(IncompleteTest))
+        self.assertEqual(find_literate_tests(module), {})
+        self.assertEqual(
+            find_incomplete_tests(module),
+            {'IncompleteTest': IncompleteTest},
+        )
+        result = run_tests(rest_test_factory(module, 'IncompleteTests'))
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(len(result.failures), 1)
+        self.assertTrue('must define url' in result.failures[0][1])
+
+    def test_lookup_by_module(self):
+        self.assertEqual(
+            get_literate_tests(__name__),
+            [ListRegisteredAuthorsTest, ListRegisteredBooksTest],
+        )
+        self.assertEqual(
+            list(find_literate_tests(sys.modules[__name__]).items()),
+            [
+                ('ListRegisteredAuthorsTest', ListRegisteredAuthorsTest),
+                ('ListRegisteredBooksTest', ListRegisteredBooksTest),
+                ('PassingExampleTest', PassingExampleTest),
+            ],
+        )
+        self.assertTrue(is_registered(PassingExampleTest))
+
+    def test_imported_tests_are_found(self):
+        module = types.ModuleType('aggregate')
+        module.ListBooks = ListRegisteredBooksTest
+        module.RegisteredBaseTest = RegisteredBaseTest
+        self.assertEqual(
+            find_literate_tests(module),
+            {'ListBooks': ListRegisteredBooksTest},
+        )
+        TestClass = rest_test_factory(module, 'AggregateTests')
+        result = run_tests(TestClass)
+        self.assertEqual(result.testsRun, 1)
+        self.assertTrue(result.wasSuccessful())
+
+    def test_lookup_by_tag(self):
+        self.assertEqual(
+            get_literate_tests(tag='registry-smoke'),
+            [ListRegisteredAuthorsTest, ListRegisteredBooksTest],
+        )
+        self.assertEqual(
+            get_literate_tests(__name__, tag='books'),
+            [ListRegisteredBooksTest],
+        )
+        self.assertEqual(get_literate_tests(tag='missing'), [])
+
+    def test_tags_must_not_be_a_string(self):
+        with self.assertRaises(TypeError):
+            type('BadTagsTest', (ListRegisteredBooksTest,), {'tags': 'a'})
+
+    def test_namespaces_are_searched(self):
+        module = types.SimpleNamespace(
+            Books=ListRegisteredBooksTest,
+            Base=RegisteredBaseTest,
+            other=object,
+        )
+        self.assertEqual(
+            find_literate_tests(module),
+            {'Books': ListRegisteredBooksTest},
+        )
+
+    def test_factory_and_docgen_use_the_registry(self):
+        module = sys.modules[__name__]
+        TestClass = rest_test_factory(module, 'RegisteredTests')
+        result = run_tests(TestClass)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(result.testsRun, 3)
+        documentations = list(get_documentations(module))
+        self.assertEqual(len(documentations), 3)
+        self.assertTrue('Listing authors' in documentations[0])
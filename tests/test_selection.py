@@ -0,0 +1,162 @@
+"""Tests skipping literate tests which are unchanged since they passed."""
+
+import os
+import shutil
+import tempfile
+import types
+from unittest import TestCase
+
+from literate_integration.factories import (
+    async_rest_test_factory,
+    rest_test_factory,
+)
+from literate_integration.fixtures import fixture
+from literate_integration.models import LiterateRESTTest
+from literate_integration.selection import ResultsCache
+
+from .test_literate_rest_test import MockResponse, run_tests
+
+
+class CountingRequests(object):
+    """A request function which counts the requests sent to each url."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.counts = {}
+
+    def __call__(self, url, data):
+        self.counts[url] = self.counts.get(url, 0) + 1
+        return MockResponse({'url': url}, self.status)
+
+
+class SelectedTest(LiterateRESTTest):
+    """A literate test whose request function is set by each test."""
+
+    url = '/selected/'
+    data = None
+    request_method = 'GET'
+    expected_status = 200
+    expected_data = {'url': '/selected/'}
+
+
+class OtherSelectedTest(SelectedTest):
+    url = '/other/'
+    expected_data = {'url': '/other/'}
+
+
+class ResultsCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'results.json')
+        self.dependency = os.path.join(self.directory, 'views.py')
+        with open(self.dependency, 'w') as fout:
+            fout.write('VERSION = 1\n')
+
+    def get_module(self, requests, **attributes):
+        attributes = dict(
+            {
+                'request_function': staticmethod(requests),
+                'dependencies': (self.dependency,),
+            },
+            **attributes
+        )
+        return types.SimpleNamespace(
+            SelectedTest=type('SelectedTest', (SelectedTest,), attributes),
+            OtherSelectedTest=type(
+                'OtherSelectedTest',
+                (OtherSelectedTest,),
+                attributes,
+            ),
+        )
+
+    def run_module(self, module, factory=rest_test_factory, **kwargs):
+        return run_tests(factory(
+            module,
+            'SelectedTests',
+            selection=ResultsCache(self.path),
+            **kwargs
+        ))
+
+    def test_unchanged_tests_are_skipped(self):
+        requests = CountingRequests()
+        module = self.get_module(requests)
+        result = self.run_module(module)
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(len(result.skipped), 0)
+        self.assertTrue(os.path.exists(self.path))
+
+        result = self.run_module(module)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(len(result.skipped), 2)
+        self.assertEqual(requests.counts, {'/selected/': 1, '/other/': 1})
+
+    def test_changed_dependency_reruns_tests(self):
+        requests = CountingRequests()
+        module = self.get_module(requests)
+        self.run_module(module)
+        with open(self.dependency, 'w') as fout:
+            fout.write('VERSION = 2\n')
+        result = self.run_module(module)
+        self.assertEqual(len(result.skipped), 0)
+        self.assertEqual(requests.counts, {'/selected/': 2, '/other/': 2})
+
+    def test_changed_fields_rerun_tests(self):
+        requests = CountingRequests()
+        self.run_module(self.get_module(requests))
+        result = self.run_module(self.get_module(requests, data={'a': 1}))
+        self.assertEqual(len(result.skipped), 0)
+
+        cache = ResultsCache(self.path)
+        self.assertNotEqual(
+            cache.fingerprint(SelectedTest),
+            cache.fingerprint(OtherSelectedTest),
+        )
+
+    def test_changed_fixtures_rerun_tests(self):
+        def seed_one():
+            return 1
+
+        def seed_two():
+            return 2
+
+        requests = CountingRequests()
+        self.run_module(self.get_module(requests, catalog=fixture(seed_one)))
+        result = self.run_module(
+            self.get_module(requests, catalog=fixture(seed_one)),
+        )
+        self.assertEqual(len(result.skipped), 2)
+        result = self.run_module(
+            self.get_module(requests, catalog=fixture(seed_two)),
+        )
+        self.assertEqual(len(result.skipped), 0)
+
+    def test_failed_tests_are_rerun(self):
+        requests = CountingRequests(status=500)
+        module = self.get_module(requests)
+        result = self.run_module(module, concurrency=2)
+        self.assertEqual(len(result.failures), 2)
+        result = self.run_module(module, concurrency=2)
+        self.assertEqual(len(result.failures), 2)
+        self.assertEqual(requests.counts, {'/selected/': 2, '/other/': 2})
+
+    def test_concurrent_runner_only_sends_changed_requests(self):
+        requests = CountingRequests()
+        module = self.get_module(requests)
+        self.run_module(module, concurrency=2)
+        module.OtherSelectedTest.expected_status = 200
+        module.OtherSelectedTest.dependencies = ('missing.module.name',)
+        result = self.run_module(module, concurrency=2)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(len(result.skipped), 1)
+        self.assertEqual(requests.counts, {'/selected/': 1, '/other/': 2})
+
+    def test_async_factory(self):
+        requests = CountingRequests()
+        module = self.get_module(requests)
+        self.run_module(module, async_rest_test_factory, concurrency=2)
+        result = self.run_module(module, async_rest_test_factory)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(len(result.skipped), 2)
+        self.assertEqual(requests.counts, {'/selected/': 1, '/other/': 1})
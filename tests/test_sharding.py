@@ -0,0 +1,181 @@
+"""Tests running literate tests across a pool of processes."""
+
+import functools
+import os
+import shutil
+import tempfile
+import types
+from unittest import TestCase
+
+from literate_integration.budgets import Baseline
+from literate_integration.models import LiterateRESTTest
+from literate_integration.selection import ResultsCache
+from literate_integration.sharding import (
+    ERROR,
+    FAILED,
+    PASSED,
+    SKIPPED,
+    partition,
+    run_sharded,
+)
+from literate_integration.timing import TimingRecorder
+
+from .test_literate_rest_test import MockResponse
+
+
+def request_function(url, data):
+    return MockResponse({'url': url, 'pid': os.getpid()}, 200)
+
+
+class ShardedTest(LiterateRESTTest):
+    """A literate test which answers with the url it was sent."""
+
+    url = '/sharded/'
+    data = None
+    request_method = 'GET'
+    request_function = staticmethod(request_function)
+    expected_status = 200
+
+    @property
+    def expected_data(self):
+        return {'url': self.url}
+
+
+# The literate tests have to be importable, to be sent to the workers.
+for _i in range(8):
+    _name = 'Sharded{}Test'.format(_i)
+    globals()[_name] = type(_name, (ShardedTest,), {
+        '__module__': __name__,
+        'url': '/sharded/{}/'.format(_i),
+        'expected_status': 200 if _i != 5 else 201,
+    })
+
+MODULE = types.SimpleNamespace(**{
+    'Sharded{}Test'.format(i): globals()['Sharded{}Test'.format(i)]
+    for i in range(8)
+})
+
+
+def record_worker(directory, event, index):
+    """Leave a file naming the shard, and the worker's process."""
+    path = os.path.join(directory, '{}-{}-{}'.format(
+        event,
+        index,
+        os.getpid(),
+    ))
+    open(path, 'w').close()
+
+
+class PartitionTestCase(TestCase):
+
+    def test_hash_is_stable(self):
+        names = ['Example{}Test'.format(i) for i in range(40)]
+        shards = partition(names, 4)
+        self.assertEqual(shards, partition(list(reversed(names)), 4))
+        self.assertEqual(sorted(sum(shards, [])), sorted(names))
+        for shard in shards:
+            self.assertTrue(shard)
+
+    def test_durations_balance_shards(self):
+        durations = {'A': 8, 'B': 5, 'C': 4, 'D': 3, 'E': 2, 'F': 1}
+        shards = partition(list(durations) + ['G'], 2, durations)
+        loads = [sum(durations.get(name, 3.8) for name in s) for s in shards]
+        self.assertTrue(abs(loads[0] - loads[1]) <= 1)
+        self.assertEqual(shards, [['A', 'E', 'G'], ['B', 'C', 'D', 'F']])
+
+
+class RunShardedTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_results_and_timings_are_merged(self):
+        report = run_sharded(
+            MODULE,
+            'ShardedTests',
+            processes=3,
+            worker_setup=functools.partial(
+                record_worker,
+                self.directory,
+                'setup',
+            ),
+            worker_teardown=functools.partial(
+                record_worker,
+                self.directory,
+                'teardown',
+            ),
+        )
+        self.assertEqual(len(report.shards), 3)
+        self.assertEqual(len(report.outcomes), 8)
+        self.assertFalse(report.wasSuccessful())
+        problems = report.problems()
+        self.assertEqual(len(problems), 1)
+        self.assertEqual(problems[0].name, 'test_sharded5_test')
+        self.assertIn(problems[0].outcome, (FAILED, ERROR))
+        self.assertEqual(
+            [outcome.outcome for outcome in report.outcomes].count(PASSED),
+            7,
+        )
+        self.assertTrue('test_sharded5_test' in report.format())
+        self.assertEqual(
+            sorted(report.durations()),
+            sorted(vars(MODULE)),
+        )
+
+        # Each shard was set up, and torn down, in a process of its own.
+        events = [name.split('-') for name in os.listdir(self.directory)]
+        setups = [(i, pid) for event, i, pid in events if event == 'setup']
+        self.assertEqual(sorted(i for i, pid in setups), ['0', '1', '2'])
+        self.assertEqual(len({pid for i, pid in setups}), 3)
+        self.assertTrue(str(os.getpid()) not in {pid for i, pid in setups})
+        self.assertEqual(len(events), 6)
+
+    def test_durations_are_used(self):
+        durations = {name: 1.0 for name in vars(MODULE)}
+        durations['Sharded0Test'] = 10.0
+        report = run_sharded(
+            MODULE,
+            'ShardedTests',
+            processes=2,
+            durations=durations,
+        )
+        self.assertEqual(report.shards[0], ['Sharded0Test'])
+        self.assertEqual(len(report.outcomes), 8)
+
+    def test_stores_are_merged_and_saved(self):
+        baseline_path = os.path.join(self.directory, 'baseline.json')
+        selection_path = os.path.join(self.directory, 'selection.json')
+        report = run_sharded(
+            MODULE,
+            'ShardedTests',
+            processes=3,
+            baseline=Baseline(baseline_path),
+            selection=ResultsCache(selection_path),
+        )
+        self.assertEqual(len(report.problems()), 1)
+        passed = sorted(
+            '{}.Sharded{}Test'.format(__name__, i) for i in range(8) if i != 5
+        )
+        self.assertEqual(sorted(Baseline(baseline_path).latencies), passed)
+        self.assertEqual(sorted(ResultsCache(selection_path).passed), passed)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ['baseline.json', 'selection.json'],
+        )
+
+        # The next run skips the tests which passed.
+        report = run_sharded(
+            MODULE,
+            'ShardedTests',
+            processes=3,
+            selection=ResultsCache(selection_path),
+        )
+        outcomes = [outcome.outcome for outcome in report.outcomes]
+        self.assertEqual(outcomes.count(SKIPPED), 7)
+        self.assertEqual(sorted(ResultsCache(selection_path).passed), passed)
+
+    def test_recorder_is_rejected(self):
+        with self.assertRaises(TypeError) as context:
+            run_sharded(MODULE, 'ShardedTests', recorder=TimingRecorder())
+        self.assertTrue('ShardReport' in str(context.exception))
@@ -0,0 +1,240 @@
+"""Tests the specs extracted from literate tests."""
+
+import json
+import pickle
+from unittest import TestCase, mock
+
+from literate_integration.document import generate_rest_documentation
+from literate_integration.factories import rest_test_factory
+from literate_integration.matcher import (
+    Each,
+    InRange,
+    OfType,
+    Ordered,
+    Regex,
+    Unique,
+    assertMatches,
+)
+from literate_integration.models import LiterateRESTTest
+from literate_integration.spec import LiterateSpec, get_spec
+
+from .test_literate_rest_test import (
+    GoodExampleTest,
+    MockModule,
+    MockResponse,
+    run_tests,
+)
+
+
+class CountedTest(LiterateRESTTest):
+    """Counts its instances.
+
+    Its spec should be enough to send the request.
+
+    """
+
+    instances = 0
+
+    url = '/counted/'
+    data = {'page': 1}
+    request_method = 'GET'
+    expected_status = 200
+    expected_data = {
+        'items': Each({'id': OfType(int), 'name': Regex('^[A-Z]')}),
+        'tags': Unique(['a', 'b']),
+        'pages': Ordered([1, InRange(2, 3)]),
+    }
+
+    def __new__(cls):
+        CountedTest.instances += 1
+        return super().__new__(cls)
+
+    @staticmethod
+    def request_function(url, data):
+        return MockResponse({
+            'items': [{'id': 1, 'name': 'Emma'}],
+            'tags': ['b', 'a'],
+            'pages': [1, 3],
+        }, 200)
+
+
+class SetUpTest(CountedTest):
+    """Builds its url in setUp."""
+
+    shelf = 1
+
+    def setUp(self):
+        """Pick a shelf.
+
+        A shelf must be picked.
+
+        """
+        self.shelf = 3
+
+    @property
+    def url(self):
+        return '/shelves/{}/'.format(self.shelf)
+
+
+class AssignedTest(LiterateRESTTest):
+    """Assigns its fields in setUp."""
+
+    url = '/books/'
+    data = None
+    request_method = 'POST'
+    expected_status = 200
+    expected_data = None
+    sent = []
+
+    def setUp(self):
+        self.data = {'book': 7}
+        self.expected_data = {'book': 7}
+
+    @classmethod
+    def request_function(cls, url, data):
+        cls.sent.append((url, data))
+        return MockResponse({'book': 7}, 200)
+
+
+class InitializedTest(AssignedTest):
+    """Assigns its data when it is created."""
+
+    def __init__(self):
+        self.data = {'book': 8}
+
+    def setUp(self):
+        pass
+
+
+class ExpectsSetUpTest(SetUpTest):
+    """Expects the shelf it picked in setUp."""
+
+    @property
+    def expected_data(self):
+        return {'shelf': self.picked}
+
+    def setUp(self):
+        self.picked = 3
+
+
+class LiterateSpecTestCase(TestCase):
+
+    def test_extracted_once(self):
+        spec = get_spec(CountedTest)
+        self.assertTrue(spec is get_spec(CountedTest))
+        self.assertEqual(spec.name, 'CountedTest')
+        self.assertEqual(spec.url, '/counted/')
+        self.assertEqual(spec.dynamic, ())
+        self.assertTrue(spec.expected_hash)
+        self.assertFalse(hasattr(spec, '__dict__'))
+
+    def test_immutable(self):
+        spec = get_spec(CountedTest)
+        with self.assertRaises(AttributeError):
+            spec.url = '/other/'
+        with self.assertRaises(AttributeError):
+            del spec.url
+        changed = spec.replace(url='/other/')
+        self.assertEqual(changed.url, '/other/')
+        self.assertEqual(spec.url, '/counted/')
+
+    def test_dynamic_fields_are_resolved(self):
+        spec = get_spec(SetUpTest)
+        self.assertEqual(spec.dynamic, ('url',))
+        self.assertEqual(spec.url, None)
+        instance = SetUpTest()
+        instance.setUp()
+        resolved = spec.resolve(instance)
+        self.assertEqual(resolved.url, '/shelves/3/')
+        self.assertEqual(resolved.dynamic, ())
+        self.assertEqual(resolved.resolve(instance), resolved)
+        self.assertTrue(get_spec(CountedTest).resolve(CountedTest)
+                        is get_spec(CountedTest))
+
+    def test_serialized(self):
+        spec = get_spec(CountedTest)
+        self.assertEqual(pickle.loads(pickle.dumps(spec)), spec)
+        self.assertTrue(isinstance(
+            pickle.loads(pickle.dumps(spec)).expected_data['items'],
+            Each,
+        ))
+
+        encoded = json.loads(json.dumps(spec.to_dict()))
+        decoded = LiterateSpec.from_dict(encoded)
+        self.assertEqual(decoded.expected_hash, spec.expected_hash)
+        self.assertEqual(
+            repr(decoded.expected_data),
+            repr(spec.expected_data),
+        )
+        assertMatches(decoded.expected_data, {
+            'items': [{'id': 1, 'name': 'Emma'}],
+            'tags': ['b', 'a'],
+            'pages': [1, 3],
+        })
+
+    def test_runner_only_instantiates_when_needed(self):
+        CountedTest.instances = 0
+        result = run_tests(rest_test_factory(
+            MockModule(CountedTest),
+            'CountedTests',
+        ))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(CountedTest.instances, 0)
+
+        result = run_tests(rest_test_factory(
+            MockModule(SetUpTest),
+            'SetUpTests',
+        ))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(CountedTest.instances, 1)
+
+    def test_fields_assigned_in_set_up_are_sent(self):
+        AssignedTest.sent = []
+        result = run_tests(rest_test_factory(
+            MockModule(AssignedTest),
+            'AssignedTests',
+        ))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(AssignedTest.sent, [('/books/', {'book': 7})])
+
+        InitializedTest.sent = []
+        run_tests(rest_test_factory(
+            MockModule(InitializedTest),
+            'InitializedTests',
+        ))
+        self.assertEqual(InitializedTest.sent, [('/books/', {'book': 8})])
+
+    def test_patched_fields_are_sent(self):
+        sent = []
+        original = CountedTest.request_function
+
+        def request_function(url, data):
+            sent.append((url, data))
+            return original(url, data)
+
+        get_spec(CountedTest)
+        with mock.patch.object(CountedTest, 'data', {'page': 2}), \
+                mock.patch.object(CountedTest, 'url', '/patched/'), \
+                mock.patch.object(
+                    CountedTest, 'request_function', request_function):
+            result = run_tests(rest_test_factory(
+                MockModule(CountedTest),
+                'CountedTests',
+            ))
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(sent, [('/patched/', {'page': 2})])
+
+    def test_documentation_from_spec(self):
+        documentation = generate_rest_documentation(GoodExampleTest)
+        spec = LiterateSpec.from_dict(
+            json.loads(json.dumps(get_spec(GoodExampleTest).to_dict()))
+        )
+        self.assertEqual(generate_rest_documentation(spec), documentation)
+
+        documentation = generate_rest_documentation(SetUpTest)
+        self.assertTrue('A shelf must be picked.' in documentation)
+        self.assertTrue('/shelves/1/' in documentation)
+
+    def test_documentation_does_not_resolve_expectations(self):
+        documentation = generate_rest_documentation(ExpectsSetUpTest)
+        self.assertTrue('/shelves/1/' in documentation)
@@ -0,0 +1,317 @@
+"""Tests reading literate tests from their source."""
+
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+from unittest import TestCase
+
+from literate_integration.driver import (
+    get_documentations,
+    get_static_documentations,
+)
+from literate_integration.static import read_specs
+
+
+SOURCE = textwrap.dedent('''
+    """Literate tests which can be read from their source."""
+    from literate_integration.fixtures import fixture
+    from literate_integration.matcher import Regex
+    from literate_integration.models import LiterateRESTTest
+
+    BOOKS = '/api/books/'
+
+
+    @fixture
+    def catalog():
+        """Seed the catalog.
+
+        The catalog must hold at least one book.
+
+        """
+        return {'id': 1}
+
+
+    def request_function(url, data):
+        return None
+
+
+    class BookTest(LiterateRESTTest):
+        """Not a test in itself."""
+
+        abstract = True
+
+        request_function = staticmethod(request_function)
+        request_method = 'GET'
+        data = None
+        expected_status = 200
+
+
+    class ListBooksTest(BookTest):
+        """Listing books.
+
+        Lists every book in the catalog.
+        """
+
+        catalog = catalog
+        url = BOOKS
+        expected_data = {'title': Regex('^[A-Z]')}
+
+        def setUp(self):
+            """Shelve the books.
+
+              The books must be shelved.
+            """
+
+
+    class CreateBookTest(BookTest):
+        """Creating a book."""
+
+        url = BOOKS
+        request_method = 'POST'
+        data = {'title': 'Emma', 'authors': [1, 2, 3]}
+        expected_status = 201
+        expected_data = {'title': 'Emma'}
+''')
+
+DYNAMIC_SOURCE = SOURCE + textwrap.dedent('''
+
+    class GetBookTest(BookTest):
+        """Getting a book."""
+
+        catalog = catalog
+        expected_data = {}
+
+        @property
+        def url(self):
+            return '{}{}/'.format(BOOKS, self.catalog['id'])
+''')
+
+
+class StaticTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        self.addCleanup(os.chdir, cwd)
+
+    def write(self, name, source):
+        with open(name + '.py', 'w') as fout:
+            fout.write(source)
+        self.addCleanup(sys.modules.pop, name, None)
+        return name + '.py'
+
+    def test_documentation_matches_import(self):
+        imported = self.write('static_imported', SOURCE)
+        documentation = list(get_documentations(
+            __import__('static_imported'),
+        ))
+        self.assertEqual(len(documentation), 2)
+        self.assertEqual(
+            list(get_static_documentations(imported)),
+            documentation,
+        )
+
+        # Importing this module would fail, but it isn't imported.
+        unimported = self.write(
+            'static_unimported',
+            SOURCE + '\nSETTINGS = raise_on_import()\n',
+        )
+        specs, unknown = read_specs(unimported, 'static_unimported')
+        self.assertEqual(sorted(specs), ['CreateBookTest', 'ListBooksTest'])
+        self.assertEqual(unknown, [])
+        self.assertEqual(
+            list(get_static_documentations(unimported)),
+            documentation,
+        )
+        self.assertTrue('static_unimported' not in sys.modules)
+
+    def test_spec(self):
+        filename = self.write('static_spec', SOURCE)
+        spec = read_specs(filename, 'static_spec')[0]['ListBooksTest']
+        self.assertEqual(spec.module, 'static_spec')
+        self.assertEqual(spec.url, '/api/books/')
+        self.assertEqual(spec.dynamic, ('expected_data',))
+        self.assertTrue(spec.setup_docs[0].startswith('Seed the catalog.'))
+        self.assertTrue('must be shelved' in spec.setup_docs[1])
+
+    def test_dynamic_classes_are_imported(self):
+        filename = self.write('static_dynamic', DYNAMIC_SOURCE)
+        specs, unknown = read_specs(filename, 'static_dynamic')
+        self.assertEqual(unknown, ['GetBookTest'])
+        documentation = list(get_static_documentations(filename))
+        self.assertEqual(len(documentation), 3)
+        self.assertTrue('/api/books/1/' in documentation[1])
+        self.assertEqual(
+            documentation,
+            list(get_documentations(sys.modules['static_dynamic'])),
+        )
+
+    def test_control_flow_imports_the_module(self):
+        filename = self.write(
+            'static_loop',
+            SOURCE + '\nfor i in range(2):\n    pass\n',
+        )
+        self.assertEqual(read_specs(filename, 'static_loop'), ({}, None))
+        documentation = list(get_static_documentations(filename))
+        self.assertEqual(len(documentation), 2)
+        self.assertTrue('static_loop' in sys.modules)
+
+    def test_imported_tests_are_documented(self):
+        self.write('static_books', SOURCE)
+        filename = self.write('static_aggregate', textwrap.dedent('''
+            from literate_integration.models import LiterateRESTTest
+            from static_books import CreateBookTest
+            from static_books import BOOKS, request_function
+        '''))
+        specs, unknown = read_specs(filename, 'static_aggregate')
+        self.assertEqual((specs, unknown), ({}, ['CreateBookTest']))
+        documentation = list(get_static_documentations(filename))
+        self.assertEqual(len(documentation), 1)
+        self.assertTrue('Creating a book' in documentation[0])
+        self.assertEqual(
+            documentation,
+            list(get_documentations(sys.modules['static_aggregate'])),
+        )
+
+    def test_rebound_constants_are_imported(self):
+        filename = self.write('static_rebound', textwrap.dedent('''
+            from literate_integration.models import LiterateRESTTest
+
+            PATH = '/api/v1/'
+
+
+            class PathTest(LiterateRESTTest):
+                """Using the first version."""
+
+                url = PATH
+                request_method = 'GET'
+                data = None
+                expected_status = 200
+                expected_data = {}
+
+                @staticmethod
+                def request_function(url, data):
+                    return None
+
+
+            PATH = '/api/v2/'
+        '''))
+        specs, unknown = read_specs(filename, 'static_rebound')
+        self.assertEqual((specs, unknown), ({}, ['PathTest']))
+        documentation = list(get_static_documentations(filename))
+        self.assertTrue('/api/v1/' in documentation[0])
+        self.assertEqual(
+            documentation,
+            list(get_documentations(sys.modules['static_rebound'])),
+        )
+
+    def assertMatchesImport(self, name, source):
+        filename = self.write(name, textwrap.dedent(source))
+        documentation = list(get_static_documentations(filename))
+        self.assertEqual(len(documentation), 1)
+        self.assertEqual(
+            documentation,
+            list(get_documentations(__import__(name))),
+        )
+        return documentation[0]
+
+    def test_shadowed_constants_are_imported(self):
+        documentation = self.assertMatchesImport('static_shadowed', '''
+            from literate_integration.models import LiterateRESTTest
+
+            BASE = 'http://wrong/'
+
+
+            class ShadowTest(LiterateRESTTest):
+                """Reading the class's own name."""
+
+                BASE = 'http://right/'
+                url = BASE
+                request_method = 'GET'
+                data = None
+                expected_status = 200
+                expected_data = {}
+
+                @staticmethod
+                def request_function(url, data):
+                    return None
+        ''')
+        self.assertTrue('http://right/' in documentation)
+
+    def test_changed_constants_are_imported(self):
+        source = '''
+            from literate_integration.models import LiterateRESTTest
+
+            DATA = {{'a': 1}}
+            {}
+
+
+            class ChangedTest(LiterateRESTTest):
+                """Sending changed data."""
+
+                url = '/changed/'
+                request_method = 'POST'
+                data = DATA
+                expected_status = 200
+                expected_data = {{}}
+
+                @staticmethod
+                def request_function(url, data):
+                    return None
+        '''
+        changes = (
+            "DATA.update(b=2)",
+            "DATA['b'] = 2",
+            "ALIAS = DATA\nALIAS['b'] = 2",
+            "def change():\n    DATA['b'] = 2\nCHANGED = change()",
+        )
+        for index, change in enumerate(changes):
+            documentation = self.assertMatchesImport(
+                'static_changed_{}'.format(index),
+                source.format(change.replace('\n', '\n            ')),
+            )
+            self.assertTrue('"b": 2' in documentation)
+
+    def test_configured_names_are_read(self):
+        filename = self.write('static_configured', textwrap.dedent('''
+            from literate_integration.matcher import UNIQUE
+            from literate_integration.models import LiterateRESTTest
+            from settings import STREAMED
+
+
+            class ConfiguredTest(LiterateRESTTest):
+                """Configured by name."""
+
+                url = '/configured/'
+                request_method = 'GET'
+                data = None
+                expected_status = 200
+                expected_data = {}
+                list_mode = UNIQUE
+
+                @staticmethod
+                def request_function(url, data):
+                    return None
+
+
+            class StreamedTest(ConfiguredTest):
+                """Streamed, maybe."""
+
+                stream_response = STREAMED
+        '''))
+        specs, unknown = read_specs(filename, 'static_configured')
+        self.assertEqual(specs['ConfiguredTest'].list_mode, 'unique')
+        self.assertEqual(unknown, ['StreamedTest'])
+
+    def test_star_imports_import_the_module(self):
+        filename = self.write(
+            'static_star',
+            'from static_star_books import *\n',
+        )
+        self.assertEqual(read_specs(filename, 'static_star'), ({}, None))
@@ -0,0 +1,190 @@
+"""Tests for matching JSON bodies as streams."""
+
+import json
+import random
+import sys
+from unittest import TestCase
+
+from literate_integration.matcher import (
+    Each,
+    InRange,
+    LIST_MODES,
+    Matcher,
+    MatcherException,
+    OfType,
+    Ordered,
+    Regex,
+    Unique,
+)
+from literate_integration.streaming import (
+    assertMatchesStream,
+    match_stream,
+)
+
+
+def one_byte_chunks(text):
+    data = text.encode('utf-8')
+    for i in range(len(data)):
+        yield data[i:i + 1]
+
+
+class LimitedChunks(object):
+    """Chunks which fail if they are read past a point."""
+
+    def __init__(self, text, limit):
+        self.data = text.encode('utf-8')
+        self.limit = limit
+        self.read = 0
+
+    def __iter__(self):
+        for i in range(0, len(self.data), 16):
+            self.read = i + 16
+            if self.read > self.limit:
+                raise AssertionError('Read past {} bytes'.format(self.limit))
+            yield self.data[i:i + 16]
+
+
+class StreamingMatcherTestCase(TestCase):
+
+    def random_value(self, rng, depth):
+        kind = rng.randint(0, 3 if depth > 0 else 1)
+        if kind == 0:
+            return rng.choice([0, 1, -2, 2.5, 1e3])
+        if kind == 1:
+            return rng.choice(['a', 'b', 'é "q"', None, True, False])
+        if kind == 2:
+            return [
+                self.random_value(rng, depth - 1)
+                for _ in range(rng.randint(0, 4))
+            ]
+        return {
+            key: self.random_value(rng, depth - 1)
+            for key in rng.sample('abcd', rng.randint(0, 3))
+        }
+
+    def test_agrees_with_matcher(self):
+        rng = random.Random(3)
+        for mode in LIST_MODES:
+            for _ in range(300):
+                matcher = Matcher(self.random_value(rng, 3), list_mode=mode)
+                actual = self.random_value(rng, 4)
+                text = json.dumps(actual, indent=rng.choice([None, 2]))
+                self.assertEqual(
+                    match_stream(matcher, text.encode('utf-8')),
+                    matcher.matches(actual),
+                    '{} against {}'.format(mode, text),
+                )
+
+    def test_one_byte_chunks(self):
+        text = json.dumps({
+            'name': 'Amélie',
+            'scores': [1.5e-3, -20, 300],
+            'ok': True,
+        })
+        self.assertTrue(match_stream(
+            {'name': 'Amélie', 'scores': [-20], 'ok': True},
+            one_byte_chunks(text),
+        ))
+        self.assertFalse(match_stream(
+            {'scores': [0.0015, 30]},
+            one_byte_chunks(text),
+        ))
+
+    def test_numbers_split_between_chunks(self):
+        text = b'{"a": 1.5, "b": 2e-3, "c": 4E+2, "d": 7}'
+        for split in (b'1.', b'2e', b'2e-', b'4E+', b'7'):
+            end = text.index(split) + len(split)
+            chunks = [text[:end], text[end:]]
+            self.assertTrue(
+                match_stream({'a': 1.5, 'b': 0.002, 'c': 400.0}, chunks),
+                split,
+            )
+            self.assertFalse(match_stream({'a': 1}, chunks), split)
+            self.assertFalse(match_stream({'b': 2}, chunks), split)
+            self.assertFalse(match_stream({'c': 4}, chunks), split)
+        self.assertTrue(match_stream({'a': 1.5}, [b'{"a": 1.', b'5}']))
+        self.assertFalse(match_stream({'a': 1}, [b'{"a": 1.', b'5, "b": 2}']))
+
+    def test_stops_once_expectations_are_met(self):
+        text = json.dumps({
+            'count': 3,
+            'results': [{'id': i, 'blob': 'x' * 100} for i in range(100)],
+        })
+        chunks = LimitedChunks(text, 400)
+        self.assertTrue(match_stream(
+            {'count': 3, 'results': [{'id': 1}]},
+            chunks,
+        ))
+        self.assertTrue(chunks.read < 400)
+
+    def test_stops_at_first_failure(self):
+        text = json.dumps({'count': 3, 'results': ['x' * 100] * 100})
+        self.assertFalse(match_stream(
+            {'count': 2, 'results': []},
+            LimitedChunks(text, 100),
+        ))
+
+    def test_marked_lists(self):
+        text = json.dumps({'a': [{'n': 1}, {'n': 2}, {'n': 1}]})
+        self.assertTrue(match_stream({'a': Unique([{'n': 1}] * 2)}, text))
+        self.assertFalse(match_stream({'a': Unique([{'n': 2}] * 2)}, text))
+        self.assertTrue(match_stream({'a': Ordered([{'n': 2}, {'n': 1}])}, text))
+        self.assertFalse(match_stream({'a': Ordered([{'n': 1}] * 3)}, text))
+
+    def test_expectations(self):
+        text = json.dumps({
+            'results': [{'id': i, 'tags': ['a'] * i} for i in range(5)],
+            'next': None,
+        })
+        self.assertTrue(match_stream({
+            'results': Each({'id': InRange(0, 4), 'tags': OfType(list)}),
+            'next': OfType(str, type(None)),
+        }, text))
+        with self.assertRaises(MatcherException) as context:
+            assertMatchesStream(
+                {'results': Each({'id': InRange(0, 3)})},
+                text,
+            )
+        self.assertEqual(context.exception.path, '/results/4/id')
+        self.assertFalse(match_stream({'next': Regex('.')}, text))
+
+    def test_failure_path(self):
+        with self.assertRaises(MatcherException) as context:
+            assertMatchesStream(
+                {'a': {'b': {'c': [1]}}},
+                b'{"z": [1, {"b": 2}], "a": {"b": {"c": [2]}}}',
+            )
+        self.assertEqual(context.exception.path, '/a/b/c')
+        with self.assertRaises(MatcherException) as context:
+            assertMatchesStream({'a': {'b': 1}}, b'{"a": {"c": 1}}')
+        self.assertEqual(
+            context.exception.message,
+            "At /a: Key 'b' was not present",
+        )
+
+    def test_invalid_json_raises(self):
+        with self.assertRaises(ValueError):
+            match_stream({'a': 1}, b'{"a": nope}')
+        with self.assertRaises(ValueError):
+            match_stream({'a': 1}, b'{"b": 1, "a"')
+
+    def test_deeply_nested_values(self):
+        depth = sys.getrecursionlimit() * 3
+        nested = 1
+        for _ in range(depth):
+            nested = [nested]
+        matcher = Matcher(nested)
+        text = '[' * depth + '1' + ']' * depth
+        self.assertTrue(matcher.matches(nested))
+        self.assertTrue(match_stream(matcher, text))
+        self.assertFalse(match_stream(matcher, text.replace('1', '2')))
+        self.assertTrue(matcher.check(text.encode('utf-8')).matched)
+
+        expected = {'id': 1}
+        for _ in range(depth):
+            expected = {'child': Each(expected)}
+        text = '{"child": [' * depth + '{"id": 1}' + ']}' * depth
+        self.assertTrue(match_stream(expected, text))
+        with self.assertRaises(MatcherException) as context:
+            assertMatchesStream(expected, text.replace('1', '2'))
+        self.assertEqual(context.exception.path, '/child/0' * depth + '/id')
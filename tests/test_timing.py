@@ -0,0 +1,195 @@
+"""Tests timing the phases of literate tests."""
+
+import csv
+import io
+import json
+import time
+import tracemalloc
+from unittest import TestCase
+
+from literate_integration import timing as timing_module
+from literate_integration.factories import (
+    async_rest_test_factory,
+    rest_test_factory,
+)
+from literate_integration.timing import PHASES, Timing, TimingRecorder
+
+from .test_literate_rest_test import (
+    MockModule,
+    PassingExampleTest,
+    RequestLog,
+    StreamedExampleTest,
+    get_slow_module,
+    run_tests,
+)
+
+
+class SlowSetUpExampleTest(PassingExampleTest):
+    """An example whose fixtures take a while to set up."""
+
+    def setUp(self):
+        time.sleep(0.02)
+
+
+def get_timing(recorder, name):
+    timings = [x for x in recorder.timings if x.name == name]
+    assert len(timings) == 1
+    return timings[0]
+
+
+class TimingTestCase(TestCase):
+
+    def test_phase_is_recorded_when_it_raises(self):
+        timing = Timing('Example')
+        with self.assertRaises(ValueError):
+            with timing.phase('match'):
+                raise ValueError()
+        self.assertIsNotNone(timing.match)
+        self.assertIsNone(timing.json)
+        self.assertEqual(timing.total, timing.match)
+
+    def test_allocation_is_traced(self):
+        timing = Timing('Example')
+        with timing.phase('request', trace=True):
+            block = bytearray(1024 * 1024)
+        del block
+        self.assertTrue(timing.allocation >= 1024 * 1024)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_allocation_without_reset_peak(self):
+        # Before Python 3.9, the peak can't be reset.
+        original = timing_module._reset_peak
+        timing_module._reset_peak = None
+        try:
+            timing = Timing('Example')
+            with timing.phase('request', trace=True):
+                block = bytearray(1024 * 1024)
+            del block
+            self.assertTrue(timing.allocation >= 1024 * 1024)
+
+            tracemalloc.start()
+            try:
+                timing = Timing('Example')
+                with timing.phase('request', trace=True):
+                    pass
+                self.assertIsNone(timing.allocation)
+                self.assertIsNotNone(timing.request)
+                self.assertTrue(tracemalloc.is_tracing())
+            finally:
+                tracemalloc.stop()
+        finally:
+            timing_module._reset_peak = original
+
+
+class RecorderTestCase(TestCase):
+
+    def test_phases_are_recorded(self):
+        recorder = TimingRecorder()
+        run_tests(rest_test_factory(
+            MockModule(SlowSetUpExampleTest),
+            'TimedTests',
+            recorder=recorder,
+        ))
+        timing = get_timing(recorder, 'SlowSetUpExampleTest')
+        for phase in PHASES:
+            self.assertIsNotNone(getattr(timing, phase))
+        self.assertTrue(timing.setup >= 0.02)
+        self.assertTrue(timing.setup > timing.request)
+        self.assertEqual(
+            timing.size,
+            len(str(PassingExampleTest.request_function(None, None).data)),
+        )
+
+    def test_failing_tests_are_recorded(self):
+        recorder = TimingRecorder()
+        log = RequestLog(0.01)
+        run_tests(rest_test_factory(
+            get_slow_module(log, 4),
+            'TimedTests',
+            recorder=recorder,
+        ))
+        self.assertEqual(len(recorder.timings), 4)
+        self.assertIsNotNone(get_timing(recorder, 'Slow3Test').match)
+        self.assertTrue(get_timing(recorder, 'Slow0Test').request >= 0.01)
+
+    def test_concurrent_tests_are_recorded(self):
+        recorder = TimingRecorder()
+        run_tests(rest_test_factory(
+            get_slow_module(RequestLog(0.01), 6, serial=('Slow0Test',)),
+            'TimedTests',
+            concurrency=3,
+            recorder=recorder,
+        ))
+        self.assertEqual(len(recorder.timings), 6)
+        for timing in recorder.timings:
+            self.assertTrue(timing.request >= 0.01)
+
+    def test_asynchronous_tests_are_recorded(self):
+        recorder = TimingRecorder()
+        run_tests(async_rest_test_factory(
+            get_slow_module(RequestLog(0), 6, serial=('Slow0Test',)),
+            'TimedTests',
+            concurrency=3,
+            recorder=recorder,
+        ))
+        self.assertEqual(
+            sorted(timing.name for timing in recorder.timings),
+            ['Slow{}Test'.format(i) for i in range(6)],
+        )
+
+    def test_streamed_response_size(self):
+        recorder = TimingRecorder()
+        run_tests(rest_test_factory(
+            MockModule(StreamedExampleTest),
+            'TimedTests',
+            recorder=recorder,
+        ))
+        timing = get_timing(recorder, 'StreamedExampleTest')
+        self.assertTrue(timing.size > 0)
+        self.assertIsNone(timing.json)
+        self.assertIsNotNone(timing.match)
+
+
+class ReportTestCase(TestCase):
+
+    def setUp(self):
+        self.recorder = TimingRecorder()
+        for i, (setup, size) in enumerate([(0.1, 10), (0.3, 5), (0.2, 20)]):
+            timing = Timing('Example{}Test'.format(i))
+            timing.setup = setup
+            timing.request = 0.01
+            timing.size = size
+            self.recorder.record(timing)
+
+    def test_slowest(self):
+        self.assertEqual(
+            [timing.name for timing in self.recorder.slowest(2)],
+            ['Example1Test', 'Example2Test'],
+        )
+        self.assertEqual(
+            self.recorder.slowest(1, phase='size')[0].name,
+            'Example2Test',
+        )
+
+    def test_summary(self):
+        lines = self.recorder.summary(2).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('Example1Test'))
+        self.assertTrue('300.0' in lines[1])
+
+    def test_json(self):
+        stream = io.StringIO()
+        self.recorder.write_json(stream)
+        rows = json.loads(stream.getvalue())
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['setup'], 0.1)
+        self.assertIsNone(rows[0]['match'])
+        self.assertAlmostEqual(rows[0]['total'], 0.11)
+
+    def test_csv(self):
+        stream = io.StringIO()
+        self.recorder.write_csv(stream)
+        rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2]['name'], 'Example2Test')
+        self.assertEqual(rows[2]['size'], '20')